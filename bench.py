@@ -0,0 +1,253 @@
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from itertools import accumulate
+
+from plan import QueryPlan
+from search import (keyword_to_titles, title_to_info, search, article_length, key_by_author,
+                    filter_to_author, filter_out, articles_from_year)
+from store import ArticleStore
+
+# Throughput, latency and memory benchmarks for index building, search and
+# every advanced filter, run over synthetic corpora shaped like METADATA.
+#
+#   python bench.py --sizes 1000 10000 100000 --output results.json
+#   python bench.py --sizes 1000 10000 --baseline results.json
+#
+# Articles are [title, author, timestamp, length, keywords] like METADATA.
+# Keywords are drawn from a Zipf distribution over a vocabulary that grows
+# with the square root of the corpus (Heaps' law), so a few keywords are in a
+# large share of the articles and most in only a handful. Authors follow a
+# Zipf distribution too; timestamps and lengths span the same ranges as
+# METADATA. Queries pick keywords with the same skew, so popular keywords
+# are searched most often.
+#
+# Every benchmark is timed call by call and reported as operations per
+# second and p50/p99 latency; one extra call is run under tracemalloc for its
+# peak memory. Corpora of 10**7 articles need tens of gigabytes with
+# KEYWORDS_PER_ARTICLE keywords each; lower --keywords for those.
+#
+# With --baseline, results are compared to a saved run and the command exits
+# with status 1 if any benchmark got slower or bigger by more than
+# --tolerance.
+
+SEED = 0
+KEYWORDS_PER_ARTICLE = 46
+AUTHORS_PER_ARTICLE = 1 / 100
+ZIPF_EXPONENT = 1.0
+FIRST_TIMESTAMP = 1034459202
+LAST_TIMESTAMP = 1263393671
+MAX_LENGTH = 120000
+
+MIN_RUNS = 5
+MIN_SECONDS = 0.5
+MAX_RUNS = 1000
+QUERIES = 50
+
+
+def zipf_weights(count, exponent=ZIPF_EXPONENT):
+    """
+    Returns cumulative Zipf weights for ranks 1 to count, for
+    random.choices(cum_weights=...).
+    """
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def generate_metadata(count, seed=SEED, keywords_per_article=KEYWORDS_PER_ARTICLE, exponent=ZIPF_EXPONENT):
+    """
+    Arguments:
+    - count: Number of articles.
+    - seed: Random seed; the same arguments always give the same corpus.
+    - keywords_per_article: Average number of keyword draws per article.
+    - exponent: Zipf exponent of the keyword and author distributions.
+
+    Returns:
+    - 2D list of article metadata in METADATA order: title, author,
+      timestamp, length and keywords for each article.
+    """
+    rng = random.Random(seed)
+    vocabulary = ["kw%d" % rank for rank in range(max(int(40 * math.sqrt(count)), 100))]
+    authors = ["author %d" % rank for rank in range(max(int(count * AUTHORS_PER_ARTICLE), 10))]
+    keyword_weights = zipf_weights(len(vocabulary), exponent)
+    author_weights = zipf_weights(len(authors), exponent)
+
+    metadata = []
+    for doc_id in range(count):
+        drawn = rng.choices(vocabulary, cum_weights=keyword_weights,
+                            k=int(rng.expovariate(1 / keywords_per_article)) if keywords_per_article else 0)
+        metadata.append([
+            "Article %d" % doc_id,
+            rng.choices(authors, cum_weights=author_weights)[0],
+            rng.randrange(FIRST_TIMESTAMP, LAST_TIMESTAMP),
+            min(int(rng.lognormvariate(8.5, 1.0)), MAX_LENGTH),
+            list(dict.fromkeys(drawn)),
+        ])
+    return metadata
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def measure(function, inputs, min_runs=MIN_RUNS, min_seconds=MIN_SECONDS, max_runs=MAX_RUNS):
+    """
+    Arguments:
+    - function: Function to benchmark.
+    - inputs: Non-empty list of argument tuples, used in turn.
+    - min_runs, min_seconds: Keep calling until both are reached...
+    - max_runs: ...or this many calls have been made.
+
+    Returns:
+    - Dictionary with runs, ops_per_sec, p50_ms, p99_ms and peak_bytes (the
+      most memory allocated at once during one traced call).
+    """
+    latencies = []
+    started = time.perf_counter()
+    gc.collect()
+    while len(latencies) < max_runs and (len(latencies) < min_runs or time.perf_counter() - started < min_seconds):
+        arguments = inputs[len(latencies) % len(inputs)]
+        before = time.perf_counter_ns()
+        function(*arguments)
+        latencies.append(time.perf_counter_ns() - before)
+
+    tracemalloc.start()
+    function(*inputs[0])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "runs": len(latencies),
+        "ops_per_sec": len(latencies) * 1e9 / sum(latencies) if sum(latencies) else math.inf,
+        "p50_ms": _percentile(latencies, 0.5) / 1e6,
+        "p99_ms": _percentile(latencies, 0.99) / 1e6,
+        "peak_bytes": peak,
+    }
+
+
+def benchmarks(metadata, seed=SEED):
+    """
+    Returns {name: (function, inputs)} for every benchmark over one corpus:
+    the index builds, keyword search, every advanced filter of
+    display_result() over search results, and the same queries as
+    QueryPlans over an ArticleStore.
+    """
+    rng = random.Random(seed)
+    keyword_index = keyword_to_titles(metadata)
+    info = title_to_info(metadata)
+    store = ArticleStore.from_metadata(metadata)
+
+    by_frequency = sorted(keyword_index, key=lambda keyword: -len(keyword_index[keyword]))
+    keywords = rng.choices(by_frequency, cum_weights=zipf_weights(len(by_frequency)), k=QUERIES)
+    results = [search(keyword, keyword_index) for keyword in keywords]
+    authors = [info[titles[0]]["author"] if titles else "nobody" for titles in results]
+    years = [rng.randrange(2003, 2010) for _ in keywords]
+    lengths = [rng.randrange(1000, 20000) for _ in keywords]
+    excluded = rng.choices(by_frequency[:20], k=QUERIES)
+
+    return {
+        "keyword_to_titles": (keyword_to_titles, [(metadata,)]),
+        "title_to_info": (title_to_info, [(metadata,)]),
+        "store_build": (ArticleStore.from_metadata, [(metadata,)]),
+        "search": (search, [(keyword, keyword_index) for keyword in keywords]),
+        "article_length": (article_length, [(length, titles, info) for length, titles in zip(lengths, results)]),
+        "key_by_author": (key_by_author, [(titles, info) for titles in results]),
+        "filter_to_author": (filter_to_author, [(author, titles, info) for author, titles in zip(authors, results)]),
+        "filter_out": (filter_out, [(keyword, titles, keyword_index) for keyword, titles in zip(excluded, results)]),
+        "articles_from_year": (articles_from_year, [(year, titles, info) for year, titles in zip(years, results)]),
+        "plan_search": (QueryPlan.run, [(QueryPlan(keyword), store) for keyword in keywords]),
+        "plan_filters": (QueryPlan.run, [(QueryPlan(keyword).max_length(length).exclude(other).in_year(year), store)
+                                         for keyword, length, other, year in zip(keywords, lengths, excluded, years)]),
+    }
+
+
+def run(sizes, seed=SEED, keywords_per_article=KEYWORDS_PER_ARTICLE, only=None, **options):
+    """
+    Arguments:
+    - sizes: Corpus sizes (number of articles) to benchmark.
+    - seed: Random seed for the corpora and queries.
+    - keywords_per_article: See generate_metadata().
+    - only: Names of the benchmarks to run, or None for all of them.
+    - options: Passed on to measure().
+
+    Returns:
+    - JSON-serializable report: {"python": version, "results": {size:
+      {benchmark name: measurements}}}, sizes as strings.
+    """
+    report = {"python": platform.python_version(), "seed": seed,
+              "keywords_per_article": keywords_per_article, "results": {}}
+    for size in sizes:
+        metadata = generate_metadata(size, seed, keywords_per_article)
+        results = report["results"][str(size)] = {}
+        for name, (function, inputs) in benchmarks(metadata, seed).items():
+            if only is None or name in only:
+                results[name] = measure(function, inputs, **options)
+    return report
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Arguments:
+    - report: Report from run().
+    - baseline: Earlier report to compare against.
+    - tolerance: Allowed relative increase, e.g. 0.2 for 20%.
+
+    Returns:
+    - List of (size, benchmark, metric, baseline value, new value) for
+      every p50/p99 latency or peak memory that grew by more than
+      tolerance. Benchmarks missing from either report are skipped.
+    """
+    regressions = []
+    for size, results in report["results"].items():
+        for name, measured in results.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            for metric in ("p50_ms", "p99_ms", "peak_bytes"):
+                if measured[metric] > before[metric] * (1 + tolerance):
+                    regressions.append((size, name, metric, before[metric], measured[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark index building, search and filters.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="corpus sizes in articles (default: 1000 10000 100000)")
+    parser.add_argument("--only", nargs="+", help="names of the benchmarks to run")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--keywords", type=int, default=KEYWORDS_PER_ARTICLE,
+                        help="average keywords per article (default: %d)" % KEYWORDS_PER_ARTICLE)
+    parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS,
+                        help="time to spend on each benchmark (default: %g)" % MIN_SECONDS)
+    parser.add_argument("--output", help="file to write the JSON report to (default: stdout)")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown or growth against the baseline (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.seed, args.keywords, args.only, min_seconds=args.min_seconds)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for size, name, metric, before, after in regressions:
+            print("REGRESSION %s @ %s articles: %s %.6g -> %.6g" % (name, size, metric, before, after), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+# In-process cache of query results.
+#
+# Entries are keyed on a query's normalized key (QueryPlan.key()) and belong
+# to one version of one index: the first lookup against a different
+# index.version drops everything cached so far, so a rebuilt or edited index
+# never serves stale results. Results are shared between callers and must not
+# be modified.
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of query results with optional time-to-live.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        """
+        Arguments:
+        - maxsize: Most results kept; the least recently used is evicted.
+        - ttl: Seconds a result stays valid, or None to keep it until evicted.
+        - clock: Function returning the current time in seconds.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """
+        Drops every cached result. Counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns hit/miss/eviction counters and the current size.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def get(self, key, index, compute):
+        """
+        Arguments:
+        - key: Hashable key of the query.
+        - index: Index the query runs against; its version scopes the entry.
+        - compute: Function called with no arguments to produce the result on
+                   a miss.
+
+        Returns:
+        - The cached result for key, computing and storing it on a miss.
+        """
+        with self._lock:
+            if index.version != self._version:
+                self._entries.clear()
+                self._version = index.version
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, result = entry
+                if expires is None or expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+            self.misses += 1
+            version = self._version
+
+        result = compute()
+
+        with self._lock:
+            if self._version == version and self.maxsize > 0:
+                expires = None if self.ttl is None else self.clock() + self.ttl
+                self._entries[key] = (expires, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def run(self, plan, index):
+        """
+        Returns plan.run(index), served from the cache when possible.
+        """
+        return self.get(("run", plan.key()), index, lambda: plan.run(index))
@@ -0,0 +1,389 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from itertools import accumulate
+
+# Compressed posting lists and bitmaps.
+#
+# A posting list is cut into blocks of BLOCK_SIZE doc ids. For every block the
+# first doc id is stored in full; these form the skip pointers, so finding the
+# block that may hold a doc id is a binary search over one value per block.
+# The rest of the block is stored as gaps between consecutive doc ids, packed
+# at the narrowest width that fits the block's largest gap:
+#
+#   width 0   every gap is 1 (a run of consecutive doc ids), nothing stored
+#   width 1   gaps below 2**8, one byte each
+#   width 2   gaps below 2**16, two bytes each
+#   width 4   anything else
+#
+# Widths are whole bytes so a block decodes with two C-level calls,
+# array.frombytes() and itertools.accumulate(), rather than a Python loop over
+# bits. Common keywords, whose gaps are small, shrink from four bytes per doc
+# id to one or less; rare keywords keep their doc ids nearly as they were.
+#
+# Keywords found in a large share of all articles (BITMAP_RATIO or more) are
+# better kept as a bitmap with one bit per article: smaller than even one
+# byte per doc id, and "is this article in the list" is a single bit test, so
+# intersecting a short list with a bitmap never walks the bitmap (see
+# BitmapPostings and QueryPlan.doc_ids()).
+#
+# Encoded layout (native byte order, no alignment):
+#
+#   header       variable-byte integer (7 bits per byte, low bits first, high
+#                bit set on every byte but the last) holding count * 2, plus 1
+#                for a bitmap
+#   bitmap       bit doc_id % 8 of byte doc_id // 8 is set for every doc id
+#   one block    u32 first doc id, then the packed gaps; the width is the
+#                number of gap bytes divided by count - 1
+#   more blocks  u32 first doc id per block, u32 end offset of each block's
+#                gaps, u8 width per block, then the packed gaps
+#
+# Most keywords appear in a handful of articles, so a single-block list
+# carries no per-block tables: a one-article list takes five bytes.
+
+BLOCK_SIZE = 128
+BITMAP_RATIO = 1 / 8
+
+_WIDTH_TYPES = {1: "B", 2: "H", 4: "I"}
+
+
+def _width(largest_gap, run):
+    if run:
+        return 0
+    if largest_gap < 1 << 8:
+        return 1
+    if largest_gap < 1 << 16:
+        return 2
+    return 4
+
+
+# Positions of the set bits of every byte value, for walking a bitmap.
+_SET_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def _encode_header(count, bitmap=False):
+    value = count * 2 + bitmap
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append(value & 0x7F | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _decode_header(view):
+    """
+    Returns (count, is a bitmap, number of bytes the header took).
+    """
+    value = shift = position = 0
+    while True:
+        byte = view[position]
+        value |= (byte & 0x7F) << shift
+        position += 1
+        if byte < 0x80:
+            return value >> 1, bool(value & 1), position
+        shift += 7
+
+
+def encode_postings(doc_ids):
+    """
+    Arguments:
+    - doc_ids: Sorted sequence of distinct doc ids.
+
+    Returns:
+    - Bytes of the compressed posting list (see the layout above).
+    """
+    doc_ids = array("I", doc_ids)
+    firsts = array("I")
+    ends = array("I")
+    widths = array("B")
+    data = bytearray()
+    for start in range(0, len(doc_ids), BLOCK_SIZE):
+        block = doc_ids[start:start + BLOCK_SIZE]
+        gaps = [b - a for a, b in zip(block, block[1:])]
+        width = _width(max(gaps, default=0), all(gap == 1 for gap in gaps))
+        firsts.append(block[0])
+        if width:
+            data += array(_WIDTH_TYPES[width], gaps).tobytes()
+        ends.append(len(data))
+        widths.append(width)
+    if len(firsts) <= 1:
+        return _encode_header(len(doc_ids)) + firsts.tobytes() + bytes(data)
+    return _encode_header(len(doc_ids)) + firsts.tobytes() + ends.tobytes() + widths.tobytes() + bytes(data)
+
+
+def encode_bitmap(doc_ids):
+    """
+    Arguments:
+    - doc_ids: Sorted sequence of distinct doc ids.
+
+    Returns:
+    - Bytes of the posting list as a bitmap (see the layout above), one bit
+      per doc id up to the largest.
+    """
+    bits = bytearray(doc_ids[-1] // 8 + 1 if len(doc_ids) else 0)
+    for doc_id in doc_ids:
+        bits[doc_id >> 3] |= 1 << (doc_id & 7)
+    return _encode_header(len(doc_ids), bitmap=True) + bytes(bits)
+
+
+def encode(doc_ids, article_count, bitmap_ratio=BITMAP_RATIO):
+    """
+    Returns the encoded posting list: a bitmap if the doc ids cover at least
+    bitmap_ratio of article_count articles (never with bitmap_ratio None),
+    block-compressed otherwise.
+    """
+    if bitmap_ratio is not None and len(doc_ids) and len(doc_ids) >= bitmap_ratio * article_count:
+        return encode_bitmap(doc_ids)
+    return encode_postings(doc_ids)
+
+
+def open_postings(buffer):
+    """
+    Returns a BitmapPostings or CompressedPostings reading an encoded list.
+    """
+    view = memoryview(buffer).cast("B")
+    if _decode_header(view)[1]:
+        return BitmapPostings(view)
+    return CompressedPostings(view)
+
+
+class CompressedPostings:
+    """
+    Read-only sorted sequence of doc ids decoded block by block from an
+    encode_postings() buffer (bytes, or a memoryview into an index file).
+
+    Indexing decodes the block holding the position and keeps the last block
+    decoded, so the forward walks in postings.py decode each block once.
+    seek() uses the skip pointers to jump straight to the right block.
+    """
+
+    __slots__ = ("_count", "_firsts", "_ends", "_widths", "_data", "_cache")
+
+    def __init__(self, buffer):
+        view = memoryview(buffer).cast("B")
+        count, _, position = _decode_header(view)
+        blocks = -(-count // BLOCK_SIZE)
+        self._count = count
+        self._firsts = view[position:position + 4 * blocks].cast("I")
+        position += 4 * blocks
+        if blocks == 1:
+            self._data = view[position:]
+            self._ends = (len(self._data),)
+            self._widths = (len(self._data) // (count - 1) if count > 1 else 0,)
+        else:
+            self._ends = view[position:position + 4 * blocks].cast("I")
+            position += 4 * blocks
+            self._widths = view[position:position + blocks]
+            self._data = view[position + blocks:]
+        self._cache = (-1, None)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for block in range(len(self._firsts)):
+            yield from self._decode(block)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.decode()[index]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("posting index out of range")
+        block, offset = divmod(index, BLOCK_SIZE)
+        return self.block(block)[offset]
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return "CompressedPostings(%r)" % list(self)
+
+    def _decode(self, block):
+        count = min(BLOCK_SIZE, self._count - block * BLOCK_SIZE)
+        first = self._firsts[block]
+        width = self._widths[block]
+        if width == 0:
+            return array("I", range(first, first + count))
+        gaps = array(_WIDTH_TYPES[width])
+        gaps.frombytes(self._data[self._ends[block - 1] if block else 0:self._ends[block]])
+        return array("I", accumulate(gaps, initial=first))
+
+    def block(self, block):
+        """
+        Returns the doc ids of one block as an array, decoding it unless it
+        was the last block asked for.
+        """
+        cached, values = self._cache
+        if cached != block:
+            values = self._decode(block)
+            self._cache = (block, values)
+        return values
+
+    def decode(self):
+        """
+        Returns every doc id as an array.
+        """
+        result = array("I")
+        for block in range(len(self._firsts)):
+            result.extend(self._decode(block))
+        return result
+
+    def intersect(self, doc_ids):
+        """
+        Returns the doc ids from a sorted sequence that are also in this
+        list. Each doc id is located through the skip pointers and only the
+        blocks holding candidates are decoded, each once.
+        """
+        firsts = self._firsts
+        result = []
+        block = -1
+        values = ()
+        for doc_id in doc_ids:
+            found = bisect_right(firsts, doc_id, max(block, 0)) - 1
+            if found < 0:
+                continue
+            if found != block:
+                block = found
+                values = self.block(block)
+            position = bisect_left(values, doc_id)
+            if position < len(values) and values[position] == doc_id:
+                result.append(doc_id)
+        return result
+
+    def seek(self, target, lo=0):
+        """
+        Returns the first position at or after lo whose doc id is >= target,
+        like postings.gallop(). The skip pointers pick the block, so only
+        that block is decoded.
+        """
+        if lo >= self._count:
+            return lo
+        block = lo // BLOCK_SIZE
+        found = bisect_right(self._firsts, target, block) - 1
+        if found < block:
+            return lo
+        start = found * BLOCK_SIZE
+        return start + bisect_left(self.block(found), target, max(lo - start, 0))
+
+
+class BitmapPostings:
+    """
+    Read-only sorted sequence of doc ids stored as a bitmap. Membership
+    tests read one bit; indexing and seek() decode the whole list once and
+    keep it.
+    """
+
+    __slots__ = ("_count", "_bits", "_decoded")
+
+    def __init__(self, buffer):
+        view = memoryview(buffer).cast("B")
+        count, _, position = _decode_header(view)
+        self._count = count
+        self._bits = view[position:]
+        self._decoded = None
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, doc_id):
+        byte = doc_id >> 3
+        return 0 <= byte < len(self._bits) and self._bits[byte] >> (doc_id & 7) & 1 == 1
+
+    def __iter__(self):
+        set_bits = _SET_BITS
+        for byte_index, byte in enumerate(self._bits):
+            if byte:
+                base = byte_index << 3
+                for bit in set_bits[byte]:
+                    yield base + bit
+
+    def __getitem__(self, index):
+        return self.decode()[index]
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return "BitmapPostings(%r)" % list(self)
+
+    def bitmap(self):
+        """
+        Returns the bitmap itself: a memoryview of bytes, bit doc_id % 8 of
+        byte doc_id // 8 set for every doc id.
+        """
+        return self._bits
+
+    def decode(self):
+        """
+        Returns every doc id as an array, decoded on first use.
+        """
+        if self._decoded is None:
+            self._decoded = array("I", self)
+        return self._decoded
+
+    def intersect(self, doc_ids):
+        """
+        Returns the doc ids from a sequence that are also in the bitmap, by
+        testing one bit each.
+        """
+        return [doc_id for doc_id in doc_ids if doc_id in self]
+
+    def difference(self, doc_ids):
+        """
+        Returns the doc ids from a sequence that are not in the bitmap.
+        """
+        return [doc_id for doc_id in doc_ids if doc_id not in self]
+
+    def seek(self, target, lo=0):
+        """
+        Same as postings.gallop() over the decoded doc ids.
+        """
+        decoded = self.decode()
+        return bisect_left(decoded, target, lo) if lo < len(decoded) else lo
+
+
+class CompressedPostingMap(Mapping):
+    """
+    Read-only mapping from keyword to CompressedPostings or BitmapPostings,
+    holding only the encoded bytes of each list.
+    """
+
+    def __init__(self, encoded):
+        self._encoded = encoded
+
+    def __getitem__(self, keyword):
+        return open_postings(self._encoded[keyword])
+
+    def __contains__(self, keyword):
+        return keyword in self._encoded
+
+    def __iter__(self):
+        return iter(self._encoded)
+
+    def __len__(self):
+        return len(self._encoded)
+
+    def nbytes(self):
+        """
+        Returns the total size of the encoded posting lists.
+        """
+        return sum(len(encoded) for encoded in self._encoded.values())
+
+
+def compress(postings, article_count=0, bitmap_ratio=None):
+    """
+    Returns a CompressedPostingMap holding the same lists as a mapping from
+    keyword to sorted doc ids. With bitmap_ratio, lists covering that share
+    of article_count articles are stored as bitmaps.
+    """
+    return CompressedPostingMap({keyword: encode(doc_ids, article_count, bitmap_ratio)
+                                 for keyword, doc_ids in postings.items()})
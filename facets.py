@@ -0,0 +1,174 @@
+import time
+from array import array
+from bisect import bisect_right
+
+from vector import VECTORIZE_MIN, doc_id_array, numpy
+
+# Facet counts over a result set: how many of the results each author wrote,
+# were published each year and fall in each length bucket, optionally with
+# the first few titles of each.
+#
+#   facet_counts(index, QueryPlan('music').doc_ids(index), examples=3)
+#
+# The year and length bucket of every article are computed once per index
+# version (FacetColumns, cached by ArticleStore.facet_columns(), and stored in
+# index files so processes sharing one do not each compute them), so counting
+# is one walk over the doc ids that reads three small integer columns and
+# bumps three lists of counters; no title lists or per-author dictionaries
+# are built. With NumPy and a large result set, each facet is one bincount()
+# instead.
+
+# Lower bounds of the length buckets; the last bucket is open-ended.
+LENGTH_BUCKETS = (0, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+
+def length_bucket_labels(bounds=LENGTH_BUCKETS):
+    """
+    Returns a label such as "1000-2499" or "100000+" for each bucket.
+    """
+    labels = ["%d-%d" % (low, high - 1) for low, high in zip(bounds, bounds[1:])]
+    return labels + ["%d+" % bounds[-1]]
+
+
+class FacetColumns:
+    """
+    Year and length bucket of every article, indexed by doc id.
+    """
+
+    def __init__(self, first_year, year_count, years, bounds, buckets):
+        """
+        Arguments:
+        - first_year: Earliest publication year.
+        - year_count: Number of years from first_year to the latest.
+        - years: Publication year of each article minus first_year.
+        - bounds: Ascending lower bounds of the length buckets.
+        - buckets: Length bucket of each article, a position in bounds.
+        """
+        self.first_year = first_year
+        self.year_count = year_count
+        self.years = years
+        self.bounds = bounds
+        self.buckets = buckets
+        self.labels = length_bucket_labels(bounds)
+
+    @classmethod
+    def from_store(cls, index, bounds=LENGTH_BUCKETS):
+        """
+        Returns the FacetColumns of an ArticleStore, computed from its
+        timestamps and lengths.
+        """
+        years = [time.gmtime(timestamp).tm_year for timestamp in index.timestamps]
+        first_year = min(years, default=1970)
+        return cls(first_year, max(years, default=first_year - 1) - first_year + 1,
+                   array("H", [year - first_year for year in years]), tuple(bounds),
+                   array("B", [max(bisect_right(bounds, length) - 1, 0) for length in index.lengths]))
+
+
+def facet_counts(index, doc_ids, examples=0, ignore_case=False, vectorized=None):
+    """
+    Arguments:
+    - index: ArticleStore the doc ids come from.
+    - doc_ids: Doc ids of a result set, e.g. QueryPlan(...).doc_ids(index).
+    - examples: Number of titles to return with each facet value, in index
+                order.
+    - ignore_case: Count authors whose names differ only in case together,
+                   under the first spelling among the authors.
+    - vectorized: Count with NumPy. Defaults to True when NumPy is installed
+                  and there are at least VECTORIZE_MIN doc ids.
+
+    Returns:
+    - Dictionary with "author", "year" and "length" facets, each a list of
+      {"value": ..., "count": ...} dictionaries (plus "examples", a list of
+      titles, when examples is set) for the values that occur. Authors are
+      ordered by count, most first, ties by name; years and length buckets
+      in ascending order.
+    """
+    columns = index.facet_columns()
+    author_codes, author_names = _author_groups(index, ignore_case)
+    if vectorized is None:
+        vectorized = len(doc_ids) >= VECTORIZE_MIN and numpy() is not None
+    count_facets = _numpy_counts if vectorized else _counts
+    facets = count_facets(doc_ids, [(index.author_ids, author_codes, len(author_names)),
+                                     (columns.years, None, columns.year_count),
+                                     (columns.buckets, None, len(columns.labels))], examples)
+
+    result = {}
+    for name, (counts, firsts), value_of in zip(
+            ("author", "year", "length"), facets,
+            (author_names.__getitem__, lambda code: columns.first_year + code, columns.labels.__getitem__)):
+        values = []
+        for code, count in enumerate(counts):
+            if count:
+                value = {"value": value_of(code), "count": count}
+                if examples:
+                    value["examples"] = index.titles_for(firsts[code])
+                values.append(value)
+        result[name] = values
+    result["author"].sort(key=lambda value: (-value["count"], value["value"]))
+    return result
+
+
+def _author_groups(index, ignore_case):
+    """
+    Returns (code of each author id, name of each code). Without ignore_case
+    codes are the author ids themselves.
+    """
+    if not ignore_case:
+        return None, list(index.authors)
+    folded = {}
+    codes = array("I")
+    names = []
+    for name in index.authors:
+        code = folded.setdefault(name.casefold(), len(names))
+        if code == len(names):
+            names.append(name)
+        codes.append(code)
+    return codes, names
+
+
+def _counts(doc_ids, facets, examples):
+    """
+    Returns [(counts by code, first doc ids by code)] for each (column,
+    recoding or None, number of codes) in facets, in one walk over doc_ids.
+    """
+    (authors, recode, author_size), (years, _, year_size), (buckets, _, bucket_size) = facets
+    author_counts = [0] * author_size
+    year_counts = [0] * year_size
+    bucket_counts = [0] * bucket_size
+    firsts = [[[] for _ in range(size)] for size in (author_size, year_size, bucket_size)]
+    for doc_id in doc_ids:
+        author = authors[doc_id]
+        if recode is not None:
+            author = recode[author]
+        year = years[doc_id]
+        bucket = buckets[doc_id]
+        author_counts[author] += 1
+        year_counts[year] += 1
+        bucket_counts[bucket] += 1
+        if examples:
+            for lists, code in zip(firsts, (author, year, bucket)):
+                if len(lists[code]) < examples:
+                    lists[code].append(doc_id)
+    return list(zip((author_counts, year_counts, bucket_counts), firsts))
+
+
+def _numpy_counts(doc_ids, facets, examples):
+    """
+    Same as _counts() with one bincount() per facet.
+    """
+    np = numpy()
+    doc_ids = doc_id_array(doc_ids)
+    result = []
+    for column, recode, size in facets:
+        codes = np.frombuffer(column, dtype="u%d" % memoryview(column).itemsize)[doc_ids]
+        if recode is not None:
+            codes = np.frombuffer(recode, dtype=np.uint32)[codes]
+        counts = np.bincount(codes, minlength=size)
+        firsts = None
+        if examples:
+            order = np.argsort(codes, kind="stable")
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            firsts = [doc_ids[order[start:start + min(count, examples)]].tolist()
+                      for start, count in zip(starts.tolist(), counts.tolist())]
+        result.append((counts.tolist(), firsts))
+    return result
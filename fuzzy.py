@@ -0,0 +1,149 @@
+import re
+
+# Typo-tolerant keyword lookups.
+#
+# A DeletionIndex finds every keyword within a small edit distance of a
+# misspelled word without comparing the word to the whole vocabulary. At
+# build time each keyword is stored under every string obtained by deleting
+# up to max_distance of its characters ("music" under "music", "usic",
+# "msic", ..., "sic", "mic", ...). Two words within edit distance d always
+# share such a deletion, so a lookup generates the deletions of the query
+# word, collects the keywords stored under them and computes the exact edit
+# distance for those few candidates only.
+#
+# Distances count insertions, deletions, substitutions and swaps of two
+# adjacent characters ("msuic" is one edit from "music"). A keyword of
+# length L is stored under about L**2 / 2 strings at distance 2. Index files
+# store the variants as a posting table from variant to keyword ids (see
+# index_file.py), so a process reading one looks them up in the mapping
+# instead of building its own copy; in-memory stores build the index on
+# first use.
+#
+# In boolean queries "musc~" matches keywords within MAX_EDIT_DISTANCE of
+# "musc" and "musc~1" those within one edit.
+
+MAX_EDIT_DISTANCE = 2
+
+FUZZY_PATTERN = re.compile(r"(.+)~([0-9]?)")
+
+
+def split_fuzzy(token):
+    """
+    Returns (keyword, distance) for a fuzzy query term such as "musc~" or
+    "musc~1", or None for any other token.
+    """
+    match = FUZZY_PATTERN.fullmatch(token)
+    if match is None:
+        return None
+    keyword, distance = match.groups()
+    return keyword, int(distance) if distance else MAX_EDIT_DISTANCE
+
+
+def _deletes(word, max_distance):
+    """
+    Returns the set of strings obtained by deleting up to max_distance
+    characters from word, word itself included.
+    """
+    result = {word}
+    level = {word}
+    for _ in range(max_distance):
+        level = {variant[:i] + variant[i + 1:] for variant in level for i in range(len(variant))}
+        result |= level
+    return result
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the edit distance between two strings, where adjacent swaps
+    count as one edit, or limit + 1 if it is more than limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if before is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                distance = min(distance, before[j - 2] + 1)
+            current[j] = distance
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class DeletionIndex:
+    """
+    Maps every deletion variant of the keywords to the keywords it came
+    from, for finding keywords near a misspelled word.
+    """
+
+    def __init__(self, terms, max_distance=MAX_EDIT_DISTANCE, variants=None):
+        """
+        Arguments:
+        - terms: Sequence of distinct keywords.
+        - max_distance: Largest edit distance lookups may ask for.
+        - variants: Mapping from every deletion variant to the positions in
+                    terms of the keywords it came from, as built here for
+                    max_distance (e.g. read from an index file). Built when
+                    not given.
+        """
+        if variants is None:
+            variants = {}
+            for position, term in enumerate(terms):
+                for variant in _deletes(term, max_distance):
+                    variants.setdefault(variant, []).append(position)
+        self.terms = terms
+        self.max_distance = max_distance
+        self.variants = variants
+
+    def lookup(self, word, max_distance=None):
+        """
+        Arguments:
+        - word: Word to look up, possibly misspelled.
+        - max_distance: Largest edit distance to accept, at most the one the
+                        index was built for. Defaults to that.
+
+        Returns:
+        - List of (distance, keyword) for the keywords within max_distance of
+          word, nearest first, ties in alphabetical order.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        if not 0 <= max_distance <= self.max_distance:
+            raise ValueError("max_distance must be between 0 and %d" % self.max_distance)
+
+        positions = set()
+        for variant in _deletes(word, max_distance):
+            positions.update(self.variants.get(variant, ()))
+        result = []
+        for position in positions:
+            term = self.terms[position]
+            distance = edit_distance(word, term, max_distance)
+            if distance <= max_distance:
+                result.append((distance, term))
+        result.sort()
+        return result
+
+
+def fuzzy_postings(keyword, index, max_distance=MAX_EDIT_DISTANCE):
+    """
+    Returns the sorted doc ids of articles containing any keyword within
+    max_distance edits of keyword.
+    """
+    doc_ids = set()
+    for _, term in index.term_dictionary().similar(keyword, max_distance):
+        doc_ids.update(index.keyword_postings(term))
+    return sorted(doc_ids)
+
+
+def fuzzy_search(keyword, index, max_distance=MAX_EDIT_DISTANCE):
+    """
+    Returns the titles of articles containing keyword or any keyword within
+    max_distance edits of it (e.g. "muisc" finds the "music" articles), in
+    index order.
+    """
+    return index.titles_for(fuzzy_postings(keyword, index, max_distance))
@@ -0,0 +1,552 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Mapping
+
+import wiki
+from compressed import encode, open_postings
+from fuzzy import DeletionIndex
+from instrument import count
+from store import STOPWORDS, ArticleStore, SortedColumn
+from terms import TermDictionary
+
+# On-disk index built from wiki.METADATA.
+#
+# The file is written once by a build step (`python index_file.py`) and then
+# memory-mapped by every process that needs to search. Nothing is decoded
+# up front: keyword and title lookups binary-search the sorted tables inside
+# the mapping, so opening the index costs the same for 100 articles as for
+# 10 million.
+#
+# The mapping is read-only and backed by the file, so every process that
+# opens the same file, or is forked after opening it, reads one physical copy
+# of the index from the page cache: N workers do not use N times the memory.
+# Everything a query touches (term dictionary, postings, columns, facet
+# columns) is a memoryview into the mapping, and NumPy views of the columns
+# (see vector.py) are made with np.frombuffer() without copying either.
+#
+# Layout (native byte order, every section aligned to 8 bytes):
+#
+#   header       magic, format version, byte-order mark, source fingerprint,
+#                number of articles, number of keywords
+#   directory    (offset, length) for each section below
+#   sections     title string table, doc ids sorted by title, author string
+#                table, author id / timestamp / length columns, keyword string
+#                table, posting offsets, compressed postings, timestamps and
+#                lengths in ascending order with the doc id of each, then
+#                the author postings and case-folded author postings, the
+#                stopword string table, keyword ids sorted by reversed
+#                keyword (for suffix lookups, see terms.py), and the facet
+#                columns: first year and number of years, year of each
+#                article, length bucket bounds, length bucket of each
+#                article (see facets.py), then the number of articles
+#                containing each keyword and the keyword ids sorted by that
+#                number (for autocomplete), and the deletion variants of the
+#                keywords as a posting table of keyword ids (see fuzzy.py)
+#
+# A posting table (keywords, authors) is four sections: a sorted string
+# table of keys, u64 offsets into the postings, and the postings. Keyword
+# postings are compressed lists or bitmaps (see compressed.py) and their
+# offsets count bytes; author postings and deletion variant keyword ids are
+# plain u32 values.
+#
+# A string table is two sections: u64 offsets (one more than the number of
+# strings) and the UTF-8 blob they point into.
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wiki.idx")
+SOURCE_PATH = wiki.METADATA_PATH
+
+MAGIC = b"WIKIIDX\x00"
+VERSION = 10
+BYTE_ORDER_MARK = 0x01020304
+
+HEADER = struct.Struct("=8sIIqqII")
+
+(
+    TITLE_OFFSETS,
+    TITLE_BLOB,
+    TITLE_ORDER,
+    AUTHOR_OFFSETS,
+    AUTHOR_BLOB,
+    AUTHOR_IDS,
+    TIMESTAMPS,
+    LENGTHS,
+    TERM_OFFSETS,
+    TERM_BLOB,
+    POSTING_OFFSETS,
+    POSTINGS,
+    SORTED_TIMESTAMPS,
+    TIMESTAMP_ORDER,
+    SORTED_LENGTHS,
+    LENGTH_ORDER,
+    AUTHOR_TERM_OFFSETS,
+    AUTHOR_TERM_BLOB,
+    AUTHOR_POSTING_OFFSETS,
+    AUTHOR_POSTINGS,
+    FOLDED_TERM_OFFSETS,
+    FOLDED_TERM_BLOB,
+    FOLDED_POSTING_OFFSETS,
+    FOLDED_POSTINGS,
+    STOPWORD_OFFSETS,
+    STOPWORD_BLOB,
+    SUFFIX_ORDER,
+    YEAR_RANGE,
+    YEARS,
+    LENGTH_BUCKET_BOUNDS,
+    LENGTH_BUCKETS,
+    TERM_FREQUENCIES,
+    FREQUENCY_ORDER,
+    VARIANT_OFFSETS,
+    VARIANT_BLOB,
+    VARIANT_TERM_OFFSETS,
+    VARIANT_TERMS,
+) = range(37)
+SECTION_COUNT = 37
+
+DIRECTORY = struct.Struct("=" + "QQ" * SECTION_COUNT)
+
+# Typecode used for each section when it is viewed through memoryview.cast().
+SECTION_TYPES = {
+    TITLE_OFFSETS: "Q",
+    TITLE_BLOB: "B",
+    TITLE_ORDER: "I",
+    AUTHOR_OFFSETS: "Q",
+    AUTHOR_BLOB: "B",
+    AUTHOR_IDS: "I",
+    TIMESTAMPS: "q",
+    LENGTHS: "q",
+    TERM_OFFSETS: "Q",
+    TERM_BLOB: "B",
+    POSTING_OFFSETS: "Q",
+    POSTINGS: "B",
+    SORTED_TIMESTAMPS: "q",
+    TIMESTAMP_ORDER: "I",
+    SORTED_LENGTHS: "q",
+    LENGTH_ORDER: "I",
+    AUTHOR_TERM_OFFSETS: "Q",
+    AUTHOR_TERM_BLOB: "B",
+    AUTHOR_POSTING_OFFSETS: "Q",
+    AUTHOR_POSTINGS: "I",
+    FOLDED_TERM_OFFSETS: "Q",
+    FOLDED_TERM_BLOB: "B",
+    FOLDED_POSTING_OFFSETS: "Q",
+    FOLDED_POSTINGS: "I",
+    STOPWORD_OFFSETS: "Q",
+    STOPWORD_BLOB: "B",
+    SUFFIX_ORDER: "I",
+    YEAR_RANGE: "q",
+    YEARS: "H",
+    LENGTH_BUCKET_BOUNDS: "q",
+    LENGTH_BUCKETS: "B",
+    TERM_FREQUENCIES: "I",
+    FREQUENCY_ORDER: "I",
+    VARIANT_OFFSETS: "Q",
+    VARIANT_BLOB: "B",
+    VARIANT_TERM_OFFSETS: "Q",
+    VARIANT_TERMS: "I",
+}
+
+
+class IndexFormatError(ValueError):
+    """
+    Raised when a file is not an index this version of the code can read.
+    """
+
+
+def source_fingerprint(path=SOURCE_PATH):
+    """
+    Arguments:
+    - path: File the article metadata is loaded from.
+
+    Returns:
+    - (size, mtime in nanoseconds) of the file, or (0, 0) if it is missing.
+      An index is stale when the fingerprint stored in it no longer matches.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (0, 0)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _string_table(strings):
+    """
+    Returns (offsets bytes, blob bytes) for a list of strings.
+    """
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets.tobytes(), bytes(blob)
+
+
+def _posting_table(postings, article_count=None):
+    """
+    Returns the four sections (key offsets, key blob, posting offsets,
+    postings) of a mapping from string to sorted doc ids. With article_count,
+    each list is stored by compressed.encode() (as a bitmap if it is dense
+    enough) and offsets are in bytes.
+    """
+    compressed = article_count is not None
+    keys = sorted(postings, key=lambda key: key.encode("utf-8"))
+    posting_offsets = array("Q", [0])
+    all_postings = bytearray() if compressed else array("I")
+    for key in keys:
+        if compressed:
+            all_postings += encode(postings[key], article_count)
+        else:
+            all_postings.extend(postings[key])
+        posting_offsets.append(len(all_postings))
+    return _string_table(keys) + (posting_offsets.tobytes(), bytes(all_postings))
+
+
+def encode_index(metadata, fingerprint=(0, 0), stopwords=None):
+    """
+    Arguments:
+    - metadata: 2D list of article metadata containing
+                [title, author, timestamp, article length, keywords]
+                for each article, or an iterator yielding them (read once).
+    - fingerprint: (size, mtime_ns) of the metadata source, stored in the header.
+    - stopwords: Keywords to leave out of the index (see store.STOPWORDS).
+
+    Returns:
+    - Bytes of a complete index file.
+    """
+    return encode_store(ArticleStore.from_metadata(metadata, stopwords=stopwords), fingerprint)
+
+
+def encode_store(store, fingerprint=(0, 0)):
+    """
+    Arguments:
+    - store: ArticleStore to serialize.
+    - fingerprint: (size, mtime_ns) of the metadata source, stored in the header.
+
+    Returns:
+    - Bytes of a complete index file. Doc ids are kept as they are, so posting
+      lists keep the order keyword_to_titles() returns titles in.
+    """
+    titles = list(store.titles)
+    encoded_titles = [title.encode("utf-8") for title in titles]
+    title_order = array("I", sorted(range(len(titles)), key=encoded_titles.__getitem__))
+
+    sections = [None] * SECTION_COUNT
+    sections[TITLE_OFFSETS], sections[TITLE_BLOB] = _string_table(titles)
+    sections[TITLE_ORDER] = title_order.tobytes()
+    sections[AUTHOR_OFFSETS], sections[AUTHOR_BLOB] = _string_table(store.authors)
+    sections[AUTHOR_IDS] = array("I", store.author_ids).tobytes()
+    sections[TIMESTAMPS] = array("q", store.timestamps).tobytes()
+    sections[LENGTHS] = array("q", store.lengths).tobytes()
+    sections[TERM_OFFSETS:POSTINGS + 1] = _posting_table(store.postings, store.article_count())
+    sections[SORTED_TIMESTAMPS] = array("q", store.by_timestamp.values).tobytes()
+    sections[TIMESTAMP_ORDER] = array("I", store.by_timestamp.doc_ids).tobytes()
+    sections[SORTED_LENGTHS] = array("q", store.by_length.values).tobytes()
+    sections[LENGTH_ORDER] = array("I", store.by_length.doc_ids).tobytes()
+    sections[AUTHOR_TERM_OFFSETS:AUTHOR_POSTINGS + 1] = _posting_table(store.author_postings)
+    sections[FOLDED_TERM_OFFSETS:FOLDED_POSTINGS + 1] = _posting_table(store.folded_author_postings)
+    sections[STOPWORD_OFFSETS], sections[STOPWORD_BLOB] = _string_table(sorted(store.stopwords))
+    terms = store.term_dictionary()
+    sections[SUFFIX_ORDER] = array("I", terms.suffix_order).tobytes()
+    facets = store.facet_columns()
+    sections[YEAR_RANGE] = array("q", [facets.first_year, facets.year_count]).tobytes()
+    sections[YEARS] = array("H", facets.years).tobytes()
+    sections[LENGTH_BUCKET_BOUNDS] = array("q", facets.bounds).tobytes()
+    sections[LENGTH_BUCKETS] = array("B", facets.buckets).tobytes()
+    sections[TERM_FREQUENCIES] = array("I", terms.frequencies()).tobytes()
+    sections[FREQUENCY_ORDER] = array("I", terms.frequency_order()).tobytes()
+    sections[VARIANT_OFFSETS:VARIANT_TERMS + 1] = _posting_table(terms.deletion_index().variants)
+
+    header = HEADER.pack(MAGIC, VERSION, BYTE_ORDER_MARK, fingerprint[0],
+                         fingerprint[1], len(titles), len(store.postings))
+    position = _align(HEADER.size + DIRECTORY.size)
+    directory = []
+    for section in sections:
+        directory += [position, len(section)]
+        position = _align(position + len(section))
+
+    out = bytearray(header + DIRECTORY.pack(*directory))
+    for section in sections:
+        out += b"\x00" * (_align(len(out)) - len(out))
+        out += section
+    return bytes(out)
+
+
+def _align(position):
+    return (position + 7) & ~7
+
+
+def build_index(metadata, path=INDEX_PATH, fingerprint=(0, 0), stopwords=None):
+    """
+    Arguments:
+    - metadata: 2D list of article metadata, or an iterator yielding it.
+    - path: Where to write the index file.
+    - fingerprint: Source fingerprint stored in the header.
+    - stopwords: Keywords to leave out of the index.
+
+    Returns:
+    - The encoded index bytes. The file is written to a temporary name and
+      renamed into place, so readers never see a partially written index.
+      It gets the usual permissions of a new file (0666 less the umask)
+      rather than mkstemp()'s 0600, so workers running as other users can
+      map it.
+    """
+    data = encode_index(metadata, fingerprint, stopwords)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".wiki-idx-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o666 & ~_umask())
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return data
+
+
+def _umask():
+    """
+    Returns the process umask, which can only be read by setting it.
+    """
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+class StringTable:
+    """
+    Read-only sequence of strings stored as offsets + UTF-8 blob.
+    """
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.raw(i), "utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def raw(self, i):
+        return self._blob[self._offsets[i]:self._offsets[i + 1]]
+
+    def find(self, key, order=None):
+        """
+        Arguments:
+        - key: String to look for.
+        - order: Optional permutation that lists the strings in sorted order.
+                 Without it the table itself must be sorted.
+
+        Returns:
+        - Position of key in the table, or -1 if it is not present.
+        """
+        encoded = key.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = order[mid] if order is not None else mid
+            if bytes(self.raw(i)) < encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(self):
+            return -1
+        i = order[lo] if order is not None else lo
+        return i if bytes(self.raw(i)) == encoded else -1
+
+
+class SortedStringIndex(Mapping):
+    """
+    Read-only mapping from string to its position in a StringTable, found by
+    binary search through a permutation listing the strings in sorted order.
+    """
+
+    def __init__(self, table, order):
+        self._table = table
+        self._order = order
+
+    def __getitem__(self, key):
+        position = self._table.find(key, self._order) if isinstance(key, str) else -1
+        if position == -1:
+            raise KeyError(key)
+        return position
+
+    def __iter__(self):
+        return iter(self._table)
+
+    def __len__(self):
+        return len(self._table)
+
+
+class PostingTable(Mapping):
+    """
+    Read-only mapping from keyword to its posting list stored as a sorted
+    keyword table plus offsets into one postings section. Lists are
+    memoryviews of doc ids, or (when the table is compressed)
+    CompressedPostings or BitmapPostings reading the section in place.
+    """
+
+    def __init__(self, terms, offsets, postings, compressed=False):
+        self.terms = terms
+        self._offsets = offsets
+        self._postings = postings
+        self._compressed = compressed
+
+    def __getitem__(self, keyword):
+        term_id = self.terms.find(keyword) if isinstance(keyword, str) else -1
+        if term_id == -1:
+            raise KeyError(keyword)
+        postings = self._postings[self._offsets[term_id]:self._offsets[term_id + 1]]
+        return open_postings(postings) if self._compressed else postings
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def __len__(self):
+        return len(self.terms)
+
+
+class PrebuiltIndex(ArticleStore):
+    """
+    An ArticleStore read from an index file. Columns and postings are
+    memoryviews into the file; nothing is copied until a lookup asks for it.
+    """
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        if len(view) < HEADER.size + DIRECTORY.size:
+            raise IndexFormatError("index file is truncated")
+        magic, version, mark, size, mtime_ns, n_docs, n_terms = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise IndexFormatError("not an index file")
+        if version != VERSION:
+            raise IndexFormatError("unsupported index version %d" % version)
+        if mark != BYTE_ORDER_MARK:
+            raise IndexFormatError("index was built on a machine with another byte order")
+
+        directory = DIRECTORY.unpack_from(view, HEADER.size)
+        sections = []
+        for section in range(SECTION_COUNT):
+            offset, length = directory[2 * section], directory[2 * section + 1]
+            if offset + length > len(view):
+                raise IndexFormatError("index file is truncated")
+            sections.append(view[offset:offset + length].cast(SECTION_TYPES[section]))
+
+        self.buffer = buffer
+        self.fingerprint = (size, mtime_ns)
+        titles = StringTable(sections[TITLE_OFFSETS], sections[TITLE_BLOB])
+        super().__init__(
+            titles=titles,
+            authors=StringTable(sections[AUTHOR_OFFSETS], sections[AUTHOR_BLOB]),
+            author_ids=sections[AUTHOR_IDS],
+            timestamps=sections[TIMESTAMPS],
+            lengths=sections[LENGTHS],
+            title_ids=SortedStringIndex(titles, sections[TITLE_ORDER]),
+            postings=_open_posting_table(sections, TERM_OFFSETS, compressed=True),
+            by_timestamp=SortedColumn(sections[SORTED_TIMESTAMPS], sections[TIMESTAMP_ORDER]),
+            by_length=SortedColumn(sections[SORTED_LENGTHS], sections[LENGTH_ORDER]),
+            author_postings=_open_posting_table(sections, AUTHOR_TERM_OFFSETS),
+            folded_author_postings=_open_posting_table(sections, FOLDED_TERM_OFFSETS),
+            stopwords=StringTable(sections[STOPWORD_OFFSETS], sections[STOPWORD_BLOB]),
+        )
+        terms = self.postings.terms
+        deletions = DeletionIndex(terms, variants=_open_posting_table(sections, VARIANT_OFFSETS))
+        self._terms = (self.version, TermDictionary(terms, sections[SUFFIX_ORDER], sections[TERM_FREQUENCIES],
+                                                    sections[FREQUENCY_ORDER], deletions))
+        self._facet_sections = [sections[section] for section in
+                                (YEAR_RANGE, YEARS, LENGTH_BUCKET_BOUNDS, LENGTH_BUCKETS)]
+
+    def facet_columns(self):
+        """
+        Returns the facets.FacetColumns stored in the file, read in place.
+        """
+        if self._facets is None:
+            # Imported here: facets.py builds on vector.py, which loaders of
+            # index files should not import until a query needs it
+            from facets import FacetColumns
+
+            (first_year, year_count), years, bounds, buckets = self._facet_sections
+            self._facets = (self.version, FacetColumns(first_year, year_count, years, tuple(bounds), buckets))
+        return self._facets[1]
+
+
+def _open_posting_table(sections, first, compressed=False):
+    return PostingTable(StringTable(sections[first], sections[first + 1]),
+                        sections[first + 2], sections[first + 3], compressed)
+
+
+def open_index(path=INDEX_PATH):
+    """
+    Arguments:
+    - path: Index file to open.
+
+    Returns:
+    - PrebuiltIndex reading the file through mmap. Raises IndexFormatError
+      if the file is not a readable index.
+    """
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise IndexFormatError("index file is empty")
+    return PrebuiltIndex(buffer)
+
+
+def load_index(path=INDEX_PATH, source=SOURCE_PATH, metadata=None, stopwords=None):
+    """
+    Arguments:
+    - path: Index file to open.
+    - source: File the metadata comes from, used to detect a stale index.
+    - metadata: Function returning the 2D metadata list (or any iterable of
+                articles), called only when the index has to be rebuilt.
+                Defaults to streaming the articles from source.
+    - stopwords: Keywords the index must leave out, e.g. store.STOPWORDS
+                 (an empty set for none). None accepts whatever stopwords
+                 the file was built with, and keeps them on a rebuild.
+
+    Returns:
+    - PrebuiltIndex for the current metadata. A missing, unreadable or stale
+      index file, or one built with other stopwords than asked for, is rebuilt
+      first. If the file cannot be written the index is served from memory
+      instead.
+    """
+    if metadata is None:
+        metadata = lambda: wiki.iter_metadata(source)
+    fingerprint = source_fingerprint(source)
+    try:
+        index = open_index(path)
+        if stopwords is None:
+            stopwords = index.stopwords
+        if index.fingerprint == fingerprint and index.stopwords == frozenset(stopwords):
+            return index
+    except (OSError, IndexFormatError):
+        pass
+
+    count("rebuilt")
+    try:
+        data = build_index(metadata(), path, fingerprint, stopwords)
+    except OSError:
+        return PrebuiltIndex(encode_index(metadata(), fingerprint, stopwords))
+    try:
+        return open_index(path)
+    except (OSError, IndexFormatError):
+        return PrebuiltIndex(data)
+
+
+if __name__ == "__main__":
+    # Usage: python index_file.py [--stopwords] [index path] [metadata .jsonl or .jsonl.gz]
+    # With --stopwords the keywords in store.STOPWORDS are left out of the
+    # index; load_index() keeps them out when it rebuilds the file.
+    args = [arg for arg in sys.argv[1:] if arg != "--stopwords"]
+    stopwords = STOPWORDS if "--stopwords" in sys.argv[1:] else None
+    index_path = args[0] if len(args) > 0 else INDEX_PATH
+    source_path = args[1] if len(args) > 1 else SOURCE_PATH
+    build_index(wiki.iter_metadata(source_path), index_path, source_fingerprint(source_path), stopwords)
@@ -0,0 +1,240 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Opt-in query tracing.
+#
+#   with tracing() as trace:
+#       QueryPlan('music').max_length(5000).run(index)
+#   trace.to_dict()      # per-stage timings and counters of that query
+#   METRICS.render()     # totals over every traced query, Prometheus text
+#
+# The search code marks its stages with stage() and reports what it did with
+# count(). Outside a tracing() block both only look up the current trace and
+# return, so an untraced query pays one context variable lookup per stage
+# and nothing per article. Traces follow the current context, so queries
+# traced concurrently in threads or asyncio tasks do not mix.
+#
+# Stage names are joined with "/" when stages nest ("plan/keyword"). Counts
+# go to the innermost open stage. With memory=True, tracemalloc also records
+# the bytes each stage left allocated and the peak for the whole query; this
+# slows the query down several times over.
+
+_current = ContextVar("trace", default=None)
+
+
+class Trace:
+    """
+    Timings and counters collected while one query ran.
+    """
+
+    def __init__(self, name="query", memory=False):
+        """
+        Arguments:
+        - name: Kind of query, used as a label in the aggregate metrics.
+        - memory: Whether to record allocations with tracemalloc.
+        """
+        self.name = name
+        self.memory = memory
+        self.seconds = None
+        self.peak_bytes = None
+        self.stages = []
+        self.counters = {}
+        self._open = []
+
+    def count(self, name, value=1):
+        counters = self._open[-1]["counters"] if self._open else self.counters
+        counters[name] = counters.get(name, 0) + value
+
+    def to_dict(self):
+        """
+        Returns the trace as a JSON-serializable dictionary, stages in the
+        order they started.
+        """
+        result = {"name": self.name, "seconds": self.seconds, "counters": dict(self.counters),
+                  "stages": [dict(stage, counters=dict(stage["counters"])) for stage in self.stages]}
+        if self.memory:
+            result["peak_bytes"] = self.peak_bytes
+        return result
+
+
+class _Stage:
+    __slots__ = ("_trace", "_record", "_started", "_allocated")
+
+    def __init__(self, trace, name):
+        if trace._open:
+            name = trace._open[-1]["name"] + "/" + name
+        self._trace = trace
+        self._record = {"name": name, "seconds": None, "counters": {}}
+
+    def __enter__(self):
+        trace = self._trace
+        trace.stages.append(self._record)
+        trace._open.append(self._record)
+        if trace.memory:
+            self._allocated = tracemalloc.get_traced_memory()[0]
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record = self._record
+        record["seconds"] = time.perf_counter() - self._started
+        if self._trace.memory:
+            record["allocated_bytes"] = tracemalloc.get_traced_memory()[0] - self._allocated
+        self._trace._open.pop()
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def current_trace():
+    """
+    Returns the Trace being collected, or None when not tracing.
+    """
+    return _current.get()
+
+
+def stage(name):
+    """
+    Returns a context manager timing one stage of the current trace; it
+    does nothing when not tracing.
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NO_STAGE
+    return _Stage(trace, name)
+
+
+def count(name, value=1):
+    """
+    Adds value to a counter of the innermost open stage when tracing.
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.count(name, value)
+
+
+@contextmanager
+def tracing(name="query", memory=False, metrics=None):
+    """
+    Arguments:
+    - name: Kind of query, e.g. "search" or "boolean".
+    - memory: Whether to record allocations (see above).
+    - metrics: Metrics to add the finished trace to. Defaults to METRICS;
+               False leaves it out of every aggregate.
+
+    Returns:
+    - Context manager tracing what runs inside it, yielding the Trace.
+    """
+    trace = Trace(name, memory)
+    started_tracemalloc = memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    elif memory:
+        tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0] if memory else 0
+    token = _current.set(trace)
+    started = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace.seconds = time.perf_counter() - started
+        _current.reset(token)
+        if memory:
+            trace.peak_bytes = tracemalloc.get_traced_memory()[1] - baseline
+            if started_tracemalloc:
+                tracemalloc.stop()
+        if metrics is None:
+            metrics = METRICS
+        if metrics is not False:
+            metrics.record(trace)
+
+
+class Metrics:
+    """
+    Totals over traced queries, rendered as Prometheus text metrics.
+    """
+
+    def __init__(self, prefix="search"):
+        self.prefix = prefix
+        self.queries = {}
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, trace):
+        """
+        Adds a finished trace to the totals.
+        """
+        with self._lock:
+            totals = self.queries.setdefault(trace.name, {"count": 0, "seconds": 0.0, "counters": {}})
+            totals["count"] += 1
+            totals["seconds"] += trace.seconds
+            _add_counters(totals["counters"], trace.counters)
+            for record in trace.stages:
+                totals = self.stages.setdefault(record["name"], {"count": 0, "seconds": 0.0, "counters": {}})
+                totals["count"] += 1
+                totals["seconds"] += record["seconds"]
+                _add_counters(totals["counters"], record["counters"])
+
+    def clear(self):
+        with self._lock:
+            self.queries.clear()
+            self.stages.clear()
+
+    def render(self):
+        """
+        Returns the totals in the Prometheus text exposition format.
+        """
+        prefix = self.prefix
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append("# HELP %s_%s %s" % (prefix, name, help_text))
+            lines.append("# TYPE %s_%s %s" % (prefix, name, kind))
+            for labels, value in samples:
+                label_text = ",".join('%s="%s"' % (key, _escape(text)) for key, text in labels)
+                lines.append("%s_%s{%s} %s" % (prefix, name, label_text, repr(float(value))))
+
+        with self._lock:
+            queries = sorted(self.queries.items())
+            stages = sorted(self.stages.items())
+            family("queries_total", "counter", "Traced queries.",
+                   [((("query", name),), totals["count"]) for name, totals in queries])
+            family("query_seconds_total", "counter", "Time spent in traced queries.",
+                   [((("query", name),), totals["seconds"]) for name, totals in queries])
+            family("query_items_total", "counter", "Items counted in traced queries outside any stage.",
+                   [((("query", name), ("counter", counter)), value)
+                    for name, totals in queries for counter, value in sorted(totals["counters"].items())])
+            family("stage_calls_total", "counter", "Times each query stage ran.",
+                   [((("stage", name),), totals["count"]) for name, totals in stages])
+            family("stage_seconds_total", "counter", "Time spent in each query stage.",
+                   [((("stage", name),), totals["seconds"]) for name, totals in stages])
+            family("stage_items_total", "counter", "Items counted in each query stage.",
+                   [((("stage", name), ("counter", counter)), value)
+                    for name, totals in stages for counter, value in sorted(totals["counters"].items())])
+        return "\n".join(lines) + "\n"
+
+
+def _add_counters(totals, counters):
+    for name, value in counters.items():
+        totals[name] = totals.get(name, 0) + value
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = Metrics()
@@ -0,0 +1,287 @@
+import threading
+from array import array
+from bisect import bisect_left
+
+from store import ArticleStore, _versions
+
+# An ArticleStore that can be edited in place.
+#
+# Added articles get the next doc id, so every posting list, author list and
+# column only ever grows at the end and stays sorted. Removing an article
+# leaves a tombstone: its doc id is filtered out of every lookup until a
+# compaction renumbers the remaining articles without the gaps. Updating an
+# article removes it and adds the new version, which therefore comes after
+# the articles that were not edited. A keyword whose articles have all been
+# removed stays in keyword_to_titles, mapped to an empty list, until then.
+#
+# Compaction runs on a background thread against a snapshot of the index.
+# Edits made meanwhile are logged, and the thread that makes the next edit
+# (or calls apply_compaction()) replays them onto the compacted index and
+# swaps it in. Queries therefore never wait for a compaction, and one thread
+# never sees another thread swap the index halfway through a query. An index
+# that is edited from several threads needs the caller to hold index.lock
+# around queries as well as edits.
+
+
+class LiveIndex(ArticleStore):
+    """
+    ArticleStore supporting add_article(), update_article() and
+    remove_article() without a rebuild.
+    """
+
+    def __init__(self, titles, authors, author_ids, timestamps, lengths, title_ids, postings,
+                 by_timestamp=None, by_length=None, author_postings=None, folded_author_postings=None,
+                 stopwords=(), compact_ratio=0.25, compact_min=1000):
+        """
+        Arguments are those of ArticleStore (columns and posting lists must be
+        lists and arrays, not read-only views or bitmaps), plus:
+        - compact_ratio: Start a background compaction once this fraction
+                         of doc ids are tombstones...
+        - compact_min: ...and there are at least this many tombstones.
+        """
+        super().__init__(titles, authors, author_ids, timestamps, lengths, title_ids, postings,
+                         by_timestamp, by_length, author_postings, folded_author_postings, stopwords)
+        self.deleted = set()
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+        self.lock = threading.RLock()
+        self._author_to_id = {author: author_id for author_id, author in enumerate(authors)}
+        self._compaction = None
+        self._log = None
+
+    @classmethod
+    def from_store(cls, store, **options):
+        """
+        Returns a LiveIndex holding a copy of another store's articles, e.g.
+        one opened with index_file.load_index(). Options are passed on to
+        the constructor.
+        """
+        titles = list(store.titles)
+        return cls(
+            titles,
+            list(store.authors),
+            array("I", store.author_ids),
+            array("q", store.timestamps),
+            array("q", store.lengths),
+            dict(zip(titles, range(len(titles)))),
+            {keyword: array("I", store.postings[keyword]) for keyword in store.postings},
+            stopwords=store.stopwords,
+            **options,
+        )
+
+    # Lookups: drop tombstoned doc ids.
+
+    def _live(self, doc_ids):
+        deleted = self.deleted
+        if not deleted:
+            return doc_ids
+        return [doc_id for doc_id in doc_ids if doc_id not in deleted]
+
+    def all_doc_ids(self):
+        return self._live(range(len(self)))
+
+    def article_count(self):
+        return len(self) - len(self.deleted)
+
+    def keyword_postings(self, keyword):
+        return self._live(super().keyword_postings(keyword))
+
+    def author_doc_ids(self, author, ignore_case=False):
+        return self._live(super().author_doc_ids(author, ignore_case))
+
+    def articles_between(self, start=None, end=None):
+        return self._live(super().articles_between(start, end))
+
+    def articles_with_length(self, min_length=None, max_length=None):
+        return self._live(super().articles_with_length(min_length, max_length))
+
+    def average_length(self):
+        if self._average_length is None:
+            count = self.article_count()
+            total = sum(self.lengths[doc_id] for doc_id in self.all_doc_ids()) if self.deleted else sum(self.lengths)
+            self._average_length = total / count if count else 1
+        return self._average_length
+
+    # Edits.
+
+    def add_article(self, article):
+        """
+        Arguments:
+        - article: [title, author, timestamp, article length, keywords].
+
+        Returns:
+        - The new article's doc id. Raises ValueError if the title is already
+          indexed.
+        """
+        with self.lock:
+            self.apply_compaction()
+            doc_id = self._add(article)
+            if self._log is not None:
+                self._log.append(("add", article))
+            self._changed()
+            return doc_id
+
+    def remove_article(self, title):
+        """
+        Removes the article with this title. Raises KeyError if there is none.
+        """
+        with self.lock:
+            self.apply_compaction()
+            self._remove(title)
+            if self._log is not None:
+                self._log.append(("remove", title))
+            self._changed()
+            if len(self.deleted) >= self.compact_min and len(self.deleted) >= self.compact_ratio * len(self):
+                self.compact(background=True)
+
+    def update_article(self, article):
+        """
+        Replaces the article with the same title (or adds it if there is
+        none). Returns the article's new doc id.
+        """
+        with self.lock:
+            if article[0] in self.title_ids:
+                self.remove_article(article[0])
+            return self.add_article(article)
+
+    def _changed(self):
+        self.version = next(_versions)
+        self._average_length = None
+
+    def _add(self, article):
+        title, author, timestamp, length, keywords = article[:5]
+        if title in self.title_ids:
+            raise ValueError("article %r is already indexed" % title)
+        doc_id = len(self.titles)
+
+        author_id = self._author_to_id.get(author)
+        if author_id is None:
+            author_id = self._author_to_id[author] = len(self.authors)
+            self.authors.append(author)
+            self.author_postings[author] = array("I")
+        self.author_postings[author].append(doc_id)
+        folded = self.folded_author_postings.setdefault(author.casefold(), array("I"))
+        folded.append(doc_id)
+
+        self.titles.append(title)
+        self.title_ids[title] = doc_id
+        self.author_ids.append(author_id)
+        self.timestamps.append(timestamp)
+        self.lengths.append(length)
+        self.by_timestamp.insert(timestamp, doc_id)
+        self.by_length.insert(length, doc_id)
+
+        for keyword in keywords:
+            if keyword in self.stopwords:
+                continue
+            postings = self.postings.get(keyword)
+            if postings is None:
+                self.postings[keyword] = array("I", [doc_id])
+            elif postings[-1] != doc_id:
+                postings.append(doc_id)
+        return doc_id
+
+    def _remove(self, title):
+        doc_id = self.title_ids.pop(title)
+        self.deleted.add(doc_id)
+
+    # Compaction.
+
+    def compact(self, background=False):
+        """
+        Renumbers the articles without tombstones. In the background, the
+        compacted index is built on another thread and swapped in by the next
+        edit or apply_compaction(); otherwise it is built and swapped in now.
+        """
+        with self.lock:
+            if not background:
+                self.apply_compaction(wait=True)
+                if not self.deleted:
+                    return
+            elif self._compaction is not None:
+                return
+            snapshot = self._snapshot()
+            self._log = []
+            if not background:
+                self._install(_compacted(self.__class__, snapshot, self.compact_ratio, self.compact_min))
+                return
+            result = {}
+            thread = threading.Thread(target=lambda: result.setdefault(
+                "index", _compacted(self.__class__, snapshot, self.compact_ratio, self.compact_min)), daemon=True)
+            self._compaction = (thread, result)
+            thread.start()
+
+    def apply_compaction(self, wait=False):
+        """
+        Swaps in a finished background compaction, replaying edits made while
+        it ran. With wait, first waits for a running compaction to finish.
+
+        Returns:
+        - True if a compacted index was swapped in.
+        """
+        with self.lock:
+            if self._compaction is None:
+                return False
+            thread, result = self._compaction
+            if wait:
+                thread.join()
+            if thread.is_alive():
+                return False
+            self._compaction = None
+            if "index" not in result:
+                self._log = None
+                return False
+            self._install(result["index"])
+            return True
+
+    def _snapshot(self):
+        n = len(self.titles)
+        return (n, list(self.titles), list(self.authors), array("I", self.author_ids[:n]),
+                array("q", self.timestamps[:n]), array("q", self.lengths[:n]),
+                list(self.postings.items()), set(self.deleted), self.stopwords)
+
+    def _install(self, compacted):
+        log, self._log = self._log, None
+        for action, value in log:
+            if action == "add":
+                compacted._add(value)
+            else:
+                compacted._remove(value)
+        for name in ("titles", "authors", "author_ids", "timestamps", "lengths", "title_ids",
+                     "postings", "by_timestamp", "by_length", "author_postings",
+                     "folded_author_postings", "deleted", "_author_to_id"):
+            setattr(self, name, getattr(compacted, name))
+        self._changed()
+
+
+def _compacted(cls, snapshot, compact_ratio, compact_min):
+    """
+    Builds a new index from a snapshot, leaving out tombstoned articles and
+    numbering the rest consecutively. Author ids are kept as they are.
+    """
+    n, titles, authors, author_ids, timestamps, lengths, postings, deleted, stopwords = snapshot
+    new_ids = array("q", [-1]) * n
+    kept = [doc_id for doc_id in range(n) if doc_id not in deleted]
+    for new_id, doc_id in enumerate(kept):
+        new_ids[doc_id] = new_id
+
+    new_titles = [titles[doc_id] for doc_id in kept]
+    new_postings = {}
+    for keyword, doc_ids in postings:
+        doc_ids = doc_ids[:bisect_left(doc_ids, n)]
+        remapped = array("I", [new_ids[doc_id] for doc_id in doc_ids if doc_id not in deleted])
+        if remapped:
+            new_postings[keyword] = remapped
+
+    return cls(
+        new_titles,
+        authors,
+        array("I", [author_ids[doc_id] for doc_id in kept]),
+        array("q", [timestamps[doc_id] for doc_id in kept]),
+        array("q", [lengths[doc_id] for doc_id in kept]),
+        dict(zip(new_titles, range(len(new_titles)))),
+        new_postings,
+        stopwords=stopwords,
+        compact_ratio=compact_ratio,
+        compact_min=compact_min,
+    )
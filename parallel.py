@@ -0,0 +1,64 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Runs index-building functions over shards of the metadata in a process pool.
+#
+# The metadata (a list or any iterator of articles) is cut into consecutive
+# shards, each shard is handed to a worker process, and the partial results
+# come back in shard order so callers can merge them into exactly what a
+# single-process build would have produced. At most a few shards per worker
+# are in flight at once, so an iterator is never read far ahead of the pool.
+
+DEFAULT_SHARD_SIZE = 10000
+
+
+def shards(metadata, shard_size):
+    """
+    Yields consecutive lists of at most shard_size articles.
+    """
+    iterator = iter(metadata)
+    while True:
+        shard = list(islice(iterator, shard_size))
+        if not shard:
+            return
+        yield shard
+
+
+def map_shards(function, metadata, workers, shard_size=None, pass_start=False):
+    """
+    Arguments:
+    - function: Module-level function taking a list of articles. It runs in
+                worker processes, so it and its result must be picklable.
+    - metadata: 2D list of article metadata, or an iterator yielding it.
+    - workers: Number of worker processes.
+    - shard_size: Articles per shard. Defaults to splitting a list into four
+                  shards per worker, or DEFAULT_SHARD_SIZE for iterators.
+    - pass_start: Also pass the shard's first doc id as a second argument,
+                  so workers can number articles globally themselves.
+
+    Yields:
+    - (first doc id of the shard, function(shard)) in shard order.
+    """
+    if shard_size is None:
+        if isinstance(metadata, list):
+            shard_size = max(1, -(-len(metadata) // (workers * 4)))
+        else:
+            shard_size = DEFAULT_SHARD_SIZE
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        start = 0
+        for shard in shards(metadata, shard_size):
+            if pass_start:
+                future = pool.submit(function, shard, start)
+            else:
+                future = pool.submit(function, shard)
+            pending.append((start, future))
+            start += len(shard)
+            if len(pending) >= workers * 2:
+                first, future = pending.popleft()
+                yield first, future.result()
+        while pending:
+            first, future = pending.popleft()
+            yield first, future.result()
@@ -0,0 +1,380 @@
+import math
+from functools import partial
+
+from compressed import BitmapPostings
+from fuzzy import MAX_EDIT_DISTANCE, fuzzy_postings
+from instrument import count, current_trace, stage
+from store import year_range
+from terms import is_pattern, wildcard_postings
+from vector import VECTORIZE_MIN, ColumnArrays, doc_id_array, numpy, postings_mask, range_mask
+
+# Query plans combine a keyword search with any mix of the advanced filters
+# that display_result() offers one at a time:
+#
+#   plan = QueryPlan('music').max_length(5000).exclude('rock').in_year(2009)
+#   plan.run(index)
+#
+# Running a plan intersects the keyword's postings with the author's postings
+# (if an author filter is set), then makes a single pass over the remaining
+# doc ids, applying the other filters most selective first. No intermediate
+# title lists are built.
+#
+# A keyword stored as a bitmap (one found in a large share of all articles)
+# is never walked when something narrower is at hand: the author's articles,
+# or the articles in the narrowest length or time range, are tested against
+# the bitmap one bit each instead.
+#
+# With NumPy installed, plans with many candidates apply the length, time and
+# exclusion filters as array operations over the candidates instead (see
+# vector.py); the results are the same.
+#
+# Inside instrument.tracing(), running a plan records the time spent on the
+# keyword, author and filter steps and how many candidates each step took in
+# and kept.
+#
+# An index built with stopwords (see store.STOPWORDS) has no postings for
+# them, so a plan cannot tell which articles contain one: searching for or
+# excluding a stopword raises StopwordError rather than returning no
+# articles or ignoring the exclusion.
+
+
+class StopwordError(ValueError):
+    """
+    Raised when a plan searches for or excludes a keyword the index left out
+    as a stopword.
+    """
+
+
+class QueryPlan:
+    """
+    A keyword search plus filters, run against an ArticleStore.
+
+    Builder methods return the plan so calls can be chained. Setting the same
+    kind of range filter twice narrows it to the overlap of both ranges.
+    """
+
+    def __init__(self, keyword=None):
+        """
+        Arguments:
+        - keyword: Keyword to search for, or None to start from every article.
+                   May be a wildcard pattern such as "music*" (see terms.py).
+        """
+        self.keyword = keyword
+        self.max_distance = None
+        self.length_range = (None, None)
+        self.time_range = (None, None)
+        self.author = None
+        self.author_ignore_case = False
+        self.excluded = []
+        self.grouped = False
+        self.group_ignore_case = False
+
+    def fuzzy(self, max_distance=MAX_EDIT_DISTANCE):
+        """
+        Also match keywords within max_distance edits of the keyword, so a
+        misspelled keyword still finds articles.
+        """
+        self.max_distance = max_distance
+        return self
+
+    def min_length(self, length):
+        """
+        Keep articles at least length characters long.
+        """
+        self.length_range = _narrow(self.length_range, length, None)
+        return self
+
+    def max_length(self, length):
+        """
+        Keep articles at most length characters long.
+        """
+        self.length_range = _narrow(self.length_range, None, length + 1)
+        return self
+
+    def between(self, start=None, end=None):
+        """
+        Keep articles with start <= timestamp < end.
+        """
+        self.time_range = _narrow(self.time_range, start, end)
+        return self
+
+    def in_year(self, year):
+        """
+        Keep articles published during a UTC year.
+        """
+        return self.between(*year_range(year))
+
+    def by_author(self, author, ignore_case=False):
+        """
+        Keep articles written by author.
+        """
+        self.author = author
+        self.author_ignore_case = ignore_case
+        return self
+
+    def exclude(self, keyword):
+        """
+        Drop articles containing keyword. May be called several times.
+        """
+        self.excluded.append(keyword)
+        return self
+
+    def group_by_author(self, ignore_case=False):
+        """
+        Return results as a dictionary keyed by author instead of a list.
+        """
+        self.grouped = True
+        self.group_ignore_case = ignore_case
+        return self
+
+    def key(self):
+        """
+        Returns a hashable key identifying what the plan computes. Plans that
+        differ only in how they were built (order of calls, repeated
+        exclusions, author case when case is ignored) share a key.
+        """
+        author = self.author
+        if author is not None and self.author_ignore_case:
+            author = author.casefold()
+        return (
+            self.keyword,
+            self.max_distance,
+            self.length_range,
+            self.time_range,
+            author,
+            self.author_ignore_case if author is not None else False,
+            tuple(sorted(set(self.excluded))),
+            self.grouped,
+            self.group_ignore_case if self.grouped else False,
+        )
+
+    def _filters(self, index):
+        """
+        Returns [(estimated fraction kept, name, predicate factory)] for every
+        filter applied during the scan, most selective first. The factories
+        build the per-doc-id predicates, which only the scan needs.
+        """
+        n = max(index.article_count(), 1)
+        filters = []
+
+        if self.length_range != (None, None):
+            low, high = self.length_range
+            kept = index.by_length.count_between(low, high) / n
+            filters.append((kept, "length", partial(_range_check, index.lengths, low, high)))
+
+        if self.time_range != (None, None):
+            low, high = self.time_range
+            kept = index.by_timestamp.count_between(low, high) / n
+            filters.append((kept, "time", partial(_range_check, index.timestamps, low, high)))
+
+        if self.excluded:
+            # Posting lists may overlap, so this underestimates what is kept
+            excluded = sum(len(index.keyword_postings(keyword)) for keyword in self.excluded)
+            kept = 1 - min(excluded, n) / n
+            filters.append((kept, "exclude", partial(_exclusion_check, index, self.excluded)))
+
+        filters.sort(key=lambda f: f[0])
+        return filters
+
+    def _check_stopwords(self, index):
+        """
+        Raises StopwordError if the plan needs the postings of a keyword the
+        index left out.
+        """
+        if not index.stopwords:
+            return
+        keywords = list(self.excluded)
+        if self.keyword is not None and self.max_distance is None:
+            keywords.append(self.keyword)
+        for keyword in keywords:
+            if keyword in index.stopwords:
+                raise StopwordError("'%s' is a stopword, which the index leaves out" % keyword)
+
+    def explain(self, index):
+        """
+        Returns the steps the plan will run, in order, as a list of
+        (step name, estimated fraction of articles kept).
+        """
+        self._check_stopwords(index)
+        steps = []
+        if self.keyword is not None:
+            postings = self._keyword_postings(index)
+            name = "keyword (bitmap)" if isinstance(postings, BitmapPostings) else "keyword"
+            steps.append((name, len(postings) / max(index.article_count(), 1)))
+        if self.author is not None:
+            author_ids = index.author_doc_ids(self.author, self.author_ignore_case)
+            steps.append(("author", len(author_ids) / max(index.article_count(), 1)))
+        steps += [(name, kept) for kept, name, _ in self._filters(index)]
+        return steps
+
+    def doc_ids(self, index, vectorized=None):
+        """
+        Arguments:
+        - index: ArticleStore (in memory or read from an index file).
+        - vectorized: Apply the length, time and exclusion filters with NumPy
+                      array operations (see vector.py). Defaults to True when
+                      NumPy is installed and there are at least
+                      VECTORIZE_MIN candidates.
+
+        Returns:
+        - Sorted doc ids of the articles matching every filter. Raises
+          StopwordError if the keyword or an excluded keyword is one of the
+          index's stopwords.
+        """
+        self._check_stopwords(index)
+        with stage("keyword"):
+            if self.keyword is not None:
+                candidates = self._keyword_postings(index)
+                count("postings", len(candidates))
+                if isinstance(candidates, BitmapPostings) and self.author is None:
+                    candidates = self._narrow_bitmap(index, candidates, vectorized)
+            else:
+                candidates = index.all_doc_ids()
+            count("candidates_out", len(candidates))
+        if self.author is not None:
+            with stage("author"):
+                count("candidates_in", len(candidates))
+                candidates = index.filter_by_author(candidates, self.author, self.author_ignore_case)
+                count("candidates_out", len(candidates))
+
+        with stage("filters"):
+            filters = self._filters(index)
+            if vectorized is None:
+                vectorized = len(candidates) >= VECTORIZE_MIN and numpy() is not None
+            if filters and vectorized:
+                return self._vector_scan(index, candidates, [name for _, name, _ in filters])
+            tallies = None
+            if filters and current_trace() is not None:
+                tallies = [(name, [0, 0]) for _, name, _ in filters]
+                checks = [_tallied(make_check(), tally) for (_, tally), (_, _, make_check) in zip(tallies, filters)]
+            else:
+                checks = [make_check() for _, _, make_check in filters]
+            if not checks:
+                result = list(candidates)
+            elif len(checks) == 1:
+                result = [doc_id for doc_id in candidates if checks[0](doc_id)]
+            else:
+                result = [doc_id for doc_id in candidates if all(check(doc_id) for check in checks)]
+            if tallies is not None:
+                count("candidates_in", len(candidates))
+                for name, (tested, kept) in tallies:
+                    count(name + "_in", tested)
+                    count(name + "_out", kept)
+                count("candidates_out", len(result))
+        return result
+
+    def _vector_scan(self, index, candidates, names):
+        """
+        Returns the candidates passing the named filters, applied in order,
+        each as one mask over the doc ids still left.
+        """
+        columns = ColumnArrays(index)
+        np = columns.np
+        doc_ids = doc_id_array(candidates)
+        count("candidates_in", len(doc_ids))
+        for name in names:
+            count(name + "_in", len(doc_ids))
+            if name == "length":
+                mask = range_mask(columns.lengths[doc_ids], *self.length_range)
+            elif name == "time":
+                mask = range_mask(columns.timestamps[doc_ids], *self.time_range)
+            else:
+                mask = np.ones(len(doc_ids), dtype=bool)
+                for keyword in self.excluded:
+                    mask &= ~columns.keyword_mask(keyword, doc_ids)
+            doc_ids = doc_ids[mask]
+            count(name + "_out", len(doc_ids))
+        count("candidates_out", len(doc_ids))
+        return doc_ids.tolist()
+
+    def _keyword_postings(self, index):
+        if self.max_distance is not None:
+            return fuzzy_postings(self.keyword, index, self.max_distance)
+        if is_pattern(self.keyword):
+            return wildcard_postings(self.keyword, index)
+        return index.keyword_postings(self.keyword)
+
+    def _narrow_bitmap(self, index, bitmap, vectorized=None):
+        """
+        Returns the doc ids to scan for a bitmap keyword: the articles in the
+        narrowest length or time range, tested against the bitmap, if that
+        range holds fewer articles than the bitmap does; else the bitmap.
+        The range is tested in value order and only the doc ids kept are
+        sorted. With NumPy (see doc_ids() for vectorized) the bits are
+        looked up with one array operation.
+        """
+        narrowest = None
+        smallest = len(bitmap)
+        for column, (low, high) in [(index.by_length, self.length_range), (index.by_timestamp, self.time_range)]:
+            if (low, high) != (None, None):
+                matches = column.count_between(low, high)
+                if matches < smallest:
+                    narrowest, smallest = column.unordered_between(low, high), matches
+        if narrowest is None:
+            return bitmap
+        if vectorized is None:
+            vectorized = smallest >= VECTORIZE_MIN and numpy() is not None
+        if vectorized:
+            doc_ids = doc_id_array(narrowest)
+            doc_ids = doc_ids[postings_mask(bitmap, doc_ids)]
+            doc_ids.sort()
+            return doc_ids.tolist()
+        return sorted(bitmap.intersect(narrowest))
+
+    def run(self, index):
+        """
+        Returns the matching titles: a list, or a dictionary mapping author
+        to titles if the plan groups by author.
+        """
+        with stage("plan"):
+            doc_ids = self.doc_ids(index)
+            with stage("titles"):
+                if not self.grouped:
+                    return index.titles_for(doc_ids)
+                groups = index.group_by_author(doc_ids, self.group_ignore_case)
+                return {author: index.titles_for(ids) for author, ids in groups.items()}
+
+
+def _narrow(current, low, high):
+    """
+    Returns the overlap of a (low, high) range with another; None is open.
+    """
+    old_low, old_high = current
+    if old_low is not None and (low is None or old_low > low):
+        low = old_low
+    if old_high is not None and (high is None or old_high < high):
+        high = old_high
+    return (low, high)
+
+
+def _tallied(check, tally):
+    """
+    Returns check, counting into tally the doc ids it tests and keeps.
+    """
+    def tallied(doc_id):
+        tally[0] += 1
+        if check(doc_id):
+            tally[1] += 1
+            return True
+        return False
+    return tallied
+
+
+def _exclusion_check(index, keywords):
+    """
+    Returns a predicate testing that a doc id is in none of the keywords'
+    posting lists.
+    """
+    excluded = set()
+    for keyword in keywords:
+        excluded.update(index.keyword_postings(keyword))
+    return lambda doc_id: doc_id not in excluded
+
+
+def _range_check(column, low, high):
+    """
+    Returns a predicate testing low <= column[doc_id] < high.
+    """
+    low = -math.inf if low is None else low
+    high = math.inf if high is None else high
+    return lambda doc_id: low <= column[doc_id] < high
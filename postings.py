@@ -0,0 +1,112 @@
+from bisect import bisect_left
+
+from compressed import BitmapPostings, CompressedPostings
+
+# Operations on posting lists: sorted sequences of integer doc ids without
+# duplicates (lists, arrays, memoryviews into an index file, CompressedPostings
+# or BitmapPostings). Every function returns a new list and leaves its inputs
+# untouched.
+
+
+def gallop(postings, target, lo=0):
+    """
+    Arguments:
+    - postings: Sorted sequence of doc ids.
+    - target: Doc id to look for.
+    - lo: Position to start searching from.
+
+    Returns:
+    - First position at or after lo whose doc id is >= target. Probes
+      lo+1, lo+2, lo+4, ... before binary searching, so skipping a short
+      distance costs O(log distance) rather than O(log len(postings)).
+      CompressedPostings and BitmapPostings find the position themselves.
+    """
+    if isinstance(postings, (CompressedPostings, BitmapPostings)):
+        return postings.seek(target, lo)
+    n = len(postings)
+    if lo >= n or postings[lo] >= target:
+        return lo
+    step = 1
+    hi = lo + 1
+    while hi < n and postings[hi] < target:
+        lo = hi
+        step *= 2
+        hi = lo + step
+    return bisect_left(postings, target, lo + 1, min(hi, n))
+
+
+def intersect(a, b):
+    """
+    Returns doc ids present in both a and b. Walks the shorter list and
+    gallops through the longer one (or, if it is compressed, jumps through
+    its skip pointers). Against a bitmap, the other list's doc ids are
+    tested one bit each.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if isinstance(b, BitmapPostings):
+        return b.intersect(a)
+    if isinstance(a, BitmapPostings):
+        return a.intersect(b)
+    if isinstance(b, CompressedPostings):
+        return b.intersect(a)
+    result = []
+    position = 0
+    n = len(b)
+    for doc_id in a:
+        position = gallop(b, doc_id, position)
+        if position == n:
+            break
+        if b[position] == doc_id:
+            result.append(doc_id)
+    return result
+
+
+def union(a, b):
+    """
+    Returns doc ids present in a or b, in sorted order.
+    """
+    result = []
+    i = j = 0
+    n, m = len(a), len(b)
+    while i < n and j < m:
+        x, y = a[i], b[j]
+        if x < y:
+            result.append(x)
+            i += 1
+        elif y < x:
+            result.append(y)
+            j += 1
+        else:
+            result.append(x)
+            i += 1
+            j += 1
+    result.extend(a[i:])
+    result.extend(b[j:])
+    return result
+
+
+def difference(a, b):
+    """
+    Returns doc ids present in a but not in b.
+    """
+    if isinstance(b, BitmapPostings):
+        return b.difference(a)
+    result = []
+    position = 0
+    n = len(b)
+    for doc_id in a:
+        position = gallop(b, doc_id, position)
+        if position == n or b[position] != doc_id:
+            result.append(doc_id)
+    return result
+
+
+def as_array(postings):
+    """
+    Returns postings as a flat buffer of doc ids (for NumPy), decoding
+    CompressedPostings and BitmapPostings and passing anything else through.
+    """
+    if isinstance(postings, (CompressedPostings, BitmapPostings)):
+        return postings.decode()
+    return postings
@@ -0,0 +1,228 @@
+import re
+
+from postings import intersect, union, difference
+from instrument import count, stage
+from fuzzy import MAX_EDIT_DISTANCE, fuzzy_postings, split_fuzzy
+from terms import is_pattern, wildcard_postings
+
+# Boolean keyword queries such as
+#
+#   soccer AND NOT (music OR beach)
+#   canadian pop NOT rock          (adjacent terms are ANDed)
+#   music* AND NOT *ist            (wildcards, see terms.py)
+#   muisc~ OR rock~1               (misspellings, see fuzzy.py)
+#
+# Queries are parsed into a small tree of tuples:
+#
+#   ('term', keyword)  ('wildcard', pattern)  ('fuzzy', keyword, distance)
+#   ('and', [nodes])  ('or', [nodes])  ('not', node)
+#
+# and evaluated over integer posting lists. An index passed to evaluate()
+# needs keyword_postings(keyword), returning the sorted doc ids of articles
+# containing keyword, all_doc_ids(), article_count(), stopwords and
+# term_dictionary() (see ArticleStore). Stopwords the index left out are ignored where they are ANDed
+# with other terms, so "the soccer" finds what "soccer" does.
+# boolean_search() also needs a titles sequence to turn doc ids into titles.
+
+OPERATORS = ("AND", "OR", "NOT")
+
+# Deepest nesting of parentheses and NOTs a query may have. Parsing and
+# evaluating recurse once per level, so this keeps both far from Python's
+# recursion limit.
+MAX_DEPTH = 100
+
+TOKEN_PATTERN = re.compile(r"\(|\)|[^\s()]+")
+
+
+class QuerySyntaxError(ValueError):
+    """
+    Raised when a boolean query cannot be parsed.
+    """
+
+
+def tokenize(query):
+    """
+    Returns the list of tokens in a query: parentheses, operators and terms.
+    """
+    return TOKEN_PATTERN.findall(query)
+
+
+def parse_query(query):
+    """
+    Arguments:
+    - query: Boolean query string. Keywords are case-sensitive, operators
+             must be upper case.
+
+    Returns:
+    - Parsed query tree. Raises QuerySyntaxError for malformed queries.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        raise QuerySyntaxError("empty query")
+    node, position = _parse_or(tokens, 0)
+    if position != len(tokens):
+        raise QuerySyntaxError("unexpected %r" % tokens[position])
+    return node
+
+
+def _parse_or(tokens, position, depth=0):
+    children = []
+    node, position = _parse_and(tokens, position, depth)
+    children.append(node)
+    while position < len(tokens) and tokens[position] == "OR":
+        node, position = _parse_and(tokens, position + 1, depth)
+        children.append(node)
+    return (children[0] if len(children) == 1 else ("or", children)), position
+
+
+def _parse_and(tokens, position, depth):
+    children = []
+    node, position = _parse_not(tokens, position, depth)
+    children.append(node)
+    while position < len(tokens) and tokens[position] not in ("OR", ")"):
+        if tokens[position] == "AND":
+            position += 1
+        node, position = _parse_not(tokens, position, depth)
+        children.append(node)
+    return (children[0] if len(children) == 1 else ("and", children)), position
+
+
+def _parse_not(tokens, position, depth):
+    if position < len(tokens) and tokens[position] == "NOT":
+        node, position = _parse_not(tokens, position + 1, _deeper(depth))
+        return ("not", node), position
+    return _parse_atom(tokens, position, depth)
+
+
+def _parse_atom(tokens, position, depth):
+    if position == len(tokens):
+        raise QuerySyntaxError("query ends where a keyword was expected")
+    token = tokens[position]
+    if token == "(":
+        node, position = _parse_or(tokens, position + 1, _deeper(depth))
+        if position == len(tokens) or tokens[position] != ")":
+            raise QuerySyntaxError("missing ')'")
+        return node, position + 1
+    if token == ")" or token in OPERATORS:
+        raise QuerySyntaxError("unexpected %r" % token)
+    if is_pattern(token):
+        return ("wildcard", token), position + 1
+    fuzzy = split_fuzzy(token)
+    if fuzzy is not None:
+        if fuzzy[1] > MAX_EDIT_DISTANCE:
+            raise QuerySyntaxError("edit distance above %d in %r" % (MAX_EDIT_DISTANCE, token))
+        return ("fuzzy",) + fuzzy, position + 1
+    return ("term", token), position + 1
+
+
+def _deeper(depth):
+    if depth >= MAX_DEPTH:
+        raise QuerySyntaxError("query is nested more than %d levels deep" % MAX_DEPTH)
+    return depth + 1
+
+
+def estimate(node, index):
+    """
+    Returns an upper bound on the number of doc ids a query tree matches,
+    computed from posting list lengths without evaluating anything.
+    """
+    kind = node[0]
+    if kind == "term":
+        return len(index.keyword_postings(node[1]))
+    if kind == "wildcard":
+        return min(index.article_count(), sum(len(index.keyword_postings(term))
+                                              for term in index.term_dictionary().match(node[1])))
+    if kind == "fuzzy":
+        return min(index.article_count(), sum(len(index.keyword_postings(term))
+                                              for _, term in index.term_dictionary().similar(node[1], node[2])))
+    if kind == "and":
+        return min(estimate(child, index) for child in node[1])
+    if kind == "or":
+        return min(index.article_count(), sum(estimate(child, index) for child in node[1]))
+    return index.article_count()
+
+
+def evaluate(node, index):
+    """
+    Arguments:
+    - node: Parsed query tree.
+    - index: Index providing keyword_postings(), all_doc_ids(),
+             article_count() and stopwords.
+
+    Returns:
+    - Sorted list of doc ids matching the query. AND evaluates its operands
+      cheapest first and stops as soon as the running result is empty; NOT
+      operands of an AND are subtracted from the result instead of being
+      complemented against the whole corpus.
+    """
+    kind = node[0]
+    if kind == "term":
+        postings = index.keyword_postings(node[1])
+        count("postings", len(postings))
+        return list(postings)
+
+    if kind == "wildcard":
+        return wildcard_postings(node[1], index)
+
+    if kind == "fuzzy":
+        return fuzzy_postings(node[1], index, node[2])
+
+    if kind == "or":
+        result = []
+        for child in node[1]:
+            result = union(result, evaluate(child, index))
+        return result
+
+    if kind == "not":
+        return difference(index.all_doc_ids(), evaluate(node[1], index))
+
+    children = [child for child in node[1] if not _is_stopword(child, index)]
+    if not children:
+        children = node[1]
+    included = [child for child in children if child[0] != "not"]
+    excluded = [child[1] for child in children if child[0] == "not"]
+    if not included:
+        result = list(index.all_doc_ids())
+    else:
+        included.sort(key=lambda child: estimate(child, index))
+        result = evaluate(included[0], index)
+        for child in included[1:]:
+            if not result:
+                return result
+            if child[0] == "term":
+                postings = index.keyword_postings(child[1])
+                count("postings", len(postings))
+                result = intersect(result, postings)
+            else:
+                result = intersect(result, evaluate(child, index))
+    for child in excluded:
+        if not result:
+            break
+        result = difference(result, evaluate(child, index))
+    return result
+
+
+def _is_stopword(node, index):
+    """
+    Returns whether node is a stopword term, or NOT of one.
+    """
+    if node[0] == "not":
+        node = node[1]
+    return node[0] == "term" and node[1] in index.stopwords
+
+
+def boolean_search(query, index):
+    """
+    Arguments:
+    - query: Boolean query string, e.g. "soccer AND NOT music".
+    - index: Index providing keyword_postings(), all_doc_ids(),
+             article_count(), stopwords and titles.
+
+    Returns:
+    - List of titles of the matching articles, in index order.
+    """
+    with stage("boolean"):
+        titles = index.titles
+        doc_ids = evaluate(parse_query(query), index)
+        count("results", len(doc_ids))
+        return [titles[doc_id] for doc_id in doc_ids]
@@ -0,0 +1,184 @@
+import heapq
+import math
+
+from instrument import count, stage
+from postings import as_array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# BM25 ranking over an ArticleStore.
+#
+# Keyword lists in the metadata say whether an article contains a keyword,
+# not how often, so every term frequency is 1 and an article's score for a
+# query is
+#
+#   sum(idf(term) for matched terms) * (k1 + 1) / (1 + k1 * (1 - b + b * length / avg_length))
+#
+# with length taken from METADATA[i][3] and idf from the keyword's posting
+# list length. Only the best k articles are kept, through a bounded heap (or
+# numpy.argpartition on the vectorized path), so the full result list is
+# never sorted.
+
+K1 = 1.2
+B = 0.75
+
+
+def idf(df, n):
+    """
+    Returns the BM25 inverse document frequency of a keyword found in df of
+    n articles. Always positive, even for keywords in every article.
+    """
+    return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+
+def _terms(query):
+    """
+    Returns the distinct terms of a query string or list, in order.
+    """
+    if isinstance(query, str):
+        query = query.split()
+    return list(dict.fromkeys(query))
+
+
+def corpus_stats(query, index):
+    """
+    Returns (article count, total article length, {term: document
+    frequency}) for the terms of a query: the corpus-wide numbers BM25 needs.
+    Stats of several shards can be added up and passed to bm25_scores() or
+    top_k() so every shard scores as if it held the whole corpus.
+    """
+    n = index.article_count()
+    return n, index.average_length() * n, {term: len(index.keyword_postings(term)) for term in _terms(query)}
+
+
+def _stats(query, index, stats):
+    """
+    Returns (article count, average length, {term: document frequency}) from
+    stats, or the index's own count and average length and None (document
+    frequencies are then the posting list lengths).
+    """
+    if stats is None:
+        return index.article_count(), index.average_length(), None
+    n, total_length, dfs = stats
+    return n, total_length / n if n else 1, dfs
+
+
+def bm25_scores(query, index, candidates=None, k1=K1, b=B, stats=None):
+    """
+    Arguments:
+    - query: Keywords as a list or a whitespace-separated string.
+    - index: ArticleStore to score against.
+    - candidates: Optional doc ids; other articles are not scored.
+    - k1, b: BM25 parameters.
+    - stats: corpus_stats() to score with instead of the index's own.
+
+    Returns:
+    - Dictionary mapping doc id to score for every article containing at
+      least one of the keywords.
+    """
+    n, average_length, dfs = _stats(query, index, stats)
+    if n == 0:
+        return {}
+    allowed = set(candidates) if candidates is not None else None
+
+    idf_sums = {}
+    for term in _terms(query):
+        postings = index.keyword_postings(term)
+        if not len(postings):
+            continue
+        weight = idf(len(postings) if dfs is None else dfs[term], n)
+        for doc_id in postings:
+            if allowed is None or doc_id in allowed:
+                idf_sums[doc_id] = idf_sums.get(doc_id, 0.0) + weight
+
+    lengths = index.lengths
+    scale = k1 * b / average_length
+    base = 1 + k1 * (1 - b)
+    return {doc_id: total * (k1 + 1) / (base + scale * lengths[doc_id])
+            for doc_id, total in idf_sums.items()}
+
+
+def top_k(query, index, k=10, candidates=None, k1=K1, b=B, vectorized=None, stats=None):
+    """
+    Arguments:
+    - query: Keywords as a list or a whitespace-separated string.
+    - index: ArticleStore to score against.
+    - k: Number of results to return.
+    - candidates: Optional doc ids; other articles are not ranked.
+    - k1, b: BM25 parameters.
+    - vectorized: Use the NumPy scoring path. Defaults to True for
+                  multi-keyword queries when NumPy is installed.
+    - stats: corpus_stats() to score with instead of the index's own.
+
+    Returns:
+    - Up to k (doc id, score) pairs, best first. Equal scores are ordered by
+      doc id.
+    """
+    if k <= 0:
+        return []
+    terms = _terms(query)
+    if vectorized is None:
+        vectorized = np is not None and len(terms) > 1
+    if vectorized:
+        if np is None:
+            raise RuntimeError("the vectorized ranking path needs NumPy")
+        return _numpy_top_k(terms, index, k, candidates, k1, b, stats)
+
+    scores = bm25_scores(terms, index, candidates, k1, b, stats)
+    return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+def _numpy_top_k(terms, index, k, candidates, k1, b, stats):
+    n, average_length, dfs = _stats(terms, index, stats)
+    doc_lists = []
+    weight_lists = []
+    for term in terms:
+        postings = index.keyword_postings(term)
+        if len(postings):
+            doc_lists.append(np.asarray(as_array(postings), dtype=np.int64))
+            weight_lists.append(np.full(len(postings), idf(len(postings) if dfs is None else dfs[term], n)))
+    if not doc_lists:
+        return []
+
+    doc_ids, inverse = np.unique(np.concatenate(doc_lists), return_inverse=True)
+    idf_sums = np.bincount(inverse, weights=np.concatenate(weight_lists))
+    if candidates is not None:
+        keep = np.isin(doc_ids, np.asarray(list(candidates), dtype=np.int64))
+        doc_ids, idf_sums = doc_ids[keep], idf_sums[keep]
+        if not len(doc_ids):
+            return []
+
+    lengths = np.frombuffer(index.lengths, dtype=np.int64)[doc_ids]
+    scores = idf_sums * (k1 + 1) / (1 + k1 * (1 - b) + (k1 * b / average_length) * lengths)
+
+    if len(scores) > k:
+        # Keep every article tied with the k-th best score, so ties are
+        # broken by doc id below rather than by where the partition cut them
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        best = scores >= kth
+        doc_ids, scores = doc_ids[best], scores[best]
+    order = np.lexsort((doc_ids, -scores))[:k]
+    return [(int(doc_ids[i]), float(scores[i])) for i in order]
+
+
+def ranked_search(query, index, k=10, candidates=None, vectorized=None):
+    """
+    Arguments:
+    - query: Keywords as a list or a whitespace-separated string.
+    - index: ArticleStore to search.
+    - k: Number of results to return.
+    - candidates: Optional doc ids to rank, e.g. QueryPlan(...).doc_ids(index).
+    - vectorized: See top_k().
+
+    Returns:
+    - Up to k (title, score) pairs, most relevant first.
+    """
+    with stage("rank"):
+        if candidates is not None:
+            count("candidates_in", len(candidates))
+        titles = index.titles
+        return [(titles[doc_id], score)
+                for doc_id, score in top_k(query, index, k, candidates, vectorized=vectorized)]
@@ -1,6 +1,14 @@
-from wiki import article_metadata, ask_search, ask_advanced_search
-import datetime
-import time
+from wiki import ask_search, ask_advanced_search
+from index_file import load_index
+from plan import QueryPlan, StopwordError
+from fuzzy import MAX_EDIT_DISTANCE
+from parallel import map_shards
+from instrument import stage, tracing
+from contextlib import nullcontext
+import calendar
+import json
+import os
+import sys
 
 # FOR ALL OF THESE FUNCTIONS, READ THE FULL INSTRUCTIONS.
 
@@ -12,6 +20,7 @@ import time
 #   metadata - 2D list of article metadata containing 
 #              [title, author, timestamp, article length, keywords]
 #              for each article
+#   workers - optional number of processes to build the dictionary with
 #
 # Return: dictionary mapping keyword to list of article titles in which the
 #         articles contain keyword
@@ -21,16 +30,27 @@ import time
 #   'keyword': ['article title', 'article title 2']
 #   'another_keyword': ['article title 2', 'article title 3']
 # }
-def keyword_to_titles(metadata):
+def keyword_to_titles(metadata, workers=1):
     """
     function takes metadata: 2D list of article metadata containing [title, author, timestamp, article length, keywords]
                 for each article
+    workers: with more than 1, shards of metadata are indexed in that many
+             processes and merged in order, giving the same dictionary.
     
     Returns:
     - Dictionary mapping keyword to a list of article titles 
       containing that keyword.
     """
     keyword_dict = {}
+    if workers > 1:
+        for _, shard_dict in map_shards(keyword_to_titles, metadata, workers):
+            for keyword, titles in shard_dict.items():
+                if keyword not in keyword_dict:
+                    keyword_dict[keyword] = titles
+                else:
+                    keyword_dict[keyword].extend(titles)
+        return keyword_dict
+
     for article in metadata:
 
         for keyword in article[4]:
@@ -49,6 +69,7 @@ def keyword_to_titles(metadata):
 #   metadata - 2D list of article metadata containing 
 #              [title, author, timestamp, article length, keywords]
 #              for each article
+#   workers - optional number of processes to build the dictionary with
 #
 # Return: dictionary mapping article title to a dictionary with the following
 #         keys: author, timestamp, length of article. It may be assumed that
@@ -59,18 +80,25 @@ def keyword_to_titles(metadata):
 #   'article title': {'author': 'some author', 'timestamp': 1234567890, 'length': 2491}
 #   'article title 2': {'author': 'another author', 'timestamp': 9876543210, 'length': 85761}
 # }
-def title_to_info(metadata):
+def title_to_info(metadata, workers=1):
     """
     Arguments:
     - metadata: 2D list of article metadata containing 
                 [title, author, timestamp, article length, keywords]
                 for each article
+    - workers: With more than 1, shards of metadata are processed in that
+               many processes and merged in order.
     
     Returns:
     - Dictionary mapping article title to a dictionary with the 
       following keys: author, timestamp, length of article.
     """
     title_dict = {}
+    if workers > 1:
+        for _, shard_dict in map_shards(title_to_info, metadata, workers):
+            title_dict.update(shard_dict)
+        return title_dict
+
     for article in metadata:
         title_dict[article[0]] = {"author": article[1], "timestamp": article[2], "length": article[3]}
     return title_dict
@@ -98,15 +126,40 @@ def search(keyword, keyword_to_titles):
     - List of titles with articles containing the keyword, 
       case-sensitive, or an empty list if none are found.
     """
-    result = []
-  
+    return list(keyword_to_titles.get(keyword, []))
 
-    for key, value in keyword_to_titles.items():
-        if key == keyword:
-            result.extend(value)
 
-     
-    return result
+# 3a)
+#
+# Function: search_many
+#
+# Parameters:
+#   keywords - list of search words to look for
+#   keyword_to_titles - dictionary mapping keyword to a list of all article
+#                       titles containing that keyword
+#
+# Return: list with one search() result per keyword, in the same order as
+#         keywords
+def search_many(keywords, keyword_to_titles):
+    """
+    Arguments:
+    - keywords: List (or any iterable) of search words to look for.
+    - keyword_to_titles: Dictionary mapping keyword to a list of 
+                         all article titles containing that keyword.
+    
+    Returns:
+    - List with one result list per keyword, in input order. Each distinct
+      keyword is looked up once; repeats of a keyword share the same result
+      list, so copy it before modifying it.
+    """
+    found = {}
+    results = []
+    for keyword in keywords:
+        if keyword not in found:
+            found[keyword] = search(keyword, keyword_to_titles)
+        results.append(found[keyword])
+
+    return results
 
 
 '''
@@ -121,24 +174,28 @@ Functions 4-8 are called after searching for a list of articles containing the u
 #   article_titles - list of article titles resulting from basic search
 #   title_to_info - dictionary mapping article title to a dictionary with the 
 #                   following keys: author, timestamp, length of article
+#   min_length - optional min character length of articles
 #
 # Return: list of article titles from given titles for articles that do not
 #         exceed max_length number of characters
-def article_length(max_length, article_titles, title_to_info):
+def article_length(max_length, article_titles, title_to_info, min_length=None):
     """
     Arguments:
     - max_length: Max character length of articles.
     - article_titles: List of article titles resulting from basic search.
     - title_to_info: Dictionary mapping article title to a dictionary 
                      with the following keys: author, timestamp, length of article.
+    - min_length: Optional min character length of articles.
     
     Returns:
     - List of article titles for articles that do not exceed max_length 
-      in character count according to their metadata.
+      in character count according to their metadata (and are at least
+      min_length long, if given).
     """
     result = []
     for title in article_titles:
-        if title_to_info[title]["length"] <= max_length:
+        length = title_to_info[title]["length"]
+        if length <= max_length and (min_length is None or length >= min_length):
             result.append(title)
 
     return result
@@ -152,6 +209,7 @@ def article_length(max_length, article_titles, title_to_info):
 #   article_titles - list of article titles resulting from basic search
 #   title_to_info - dictionary mapping article title to a dictionary with the 
 #                   following keys: author, timestamp, length of article
+#   ignore_case - optional, group authors whose names differ only in case
 #
 # Return: dictionary that maps author to a list of all articles titles written
 #         by that author
@@ -161,20 +219,25 @@ def article_length(max_length, article_titles, title_to_info):
 #   'author': ['article title', 'article title 2'],
 #   'another author': ['article title 3']
 # }
-def key_by_author(article_titles, title_to_info):
+def key_by_author(article_titles, title_to_info, ignore_case=False):
     """
     Arguments:
     - article_titles: List of article titles resulting from basic search.
     - title_to_info: Dictionary mapping article title to a dictionary 
                      with the following keys: author, timestamp, length of article.
+    - ignore_case: If True, authors whose names differ only in case share
+                   one key, spelled as the first of their articles spells it.
     
     Returns:
-    - Dictionary that uses the author as a key (case-sensitive) and each 
-      value is a list of all articles by that author.
+    - Dictionary that uses the author as a key (case-sensitive unless
+      ignore_case) and each value is a list of all articles by that author.
     """
     author_dict = {}
+    folded_names = {}
     for title in article_titles:
         author = title_to_info[title]["author"]
+        if ignore_case:
+            author = folded_names.setdefault(author.casefold(), author)
         if author not in author_dict:
             author_dict[author] = [title]
         else:
@@ -194,24 +257,31 @@ def key_by_author(article_titles, title_to_info):
 #   article_titles - list of article titles resulting from basic search
 #   title_to_info - dictionary mapping article title to a dictionary with the 
 #                   following keys: author, timestamp, length of article
+#   ignore_case - optional, compare author names case-insensitively
 #
 # Return: list of article titles from the initial search written by the author
 #         or an empty list if none.
-def filter_to_author(author, article_titles, title_to_info):
+def filter_to_author(author, article_titles, title_to_info, ignore_case=False):
     """
     Arguments:
     - author: Author name to filter results to.
     - article_titles: List of article titles resulting from basic search.
     - title_to_info: Dictionary mapping article title to a dictionary 
                      with the following keys: author, timestamp, length of article.
+    - ignore_case: If True, compare author names after case folding.
     
     Returns:
     - List of article titles from the initial search written by the provided author 
-      (case-sensitive). If no articles were written by the author, return an empty list.
+      (case-sensitive unless ignore_case). If no articles were written by the 
+      author, return an empty list.
     """
+    if ignore_case:
+        author = author.casefold()
+
     result = []
     for title in article_titles:
-        if title_to_info[title]["author"] == author:
+        name = title_to_info[title]["author"]
+        if (name.casefold() if ignore_case else name) == author:
             result.append(title)
 
     return result
@@ -222,7 +292,8 @@ def filter_to_author(author, article_titles, title_to_info):
 # Function: filter_out
 #
 # Parameters:
-#   keyword - a second keyword to use to filter out results
+#   keyword - a second keyword (or list of keywords) to use to filter out
+#             results
 #   article_titles - list of article titles resulting from basic search
 #   keyword_to_titles - dictionary mapping keyword to a list of all article
 #                       titles containing that keyword
@@ -233,7 +304,8 @@ def filter_to_author(author, article_titles, title_to_info):
 def filter_out(keyword, article_titles, keyword_to_titles):
     """
     Arguments:
-    - keyword: A second keyword to use to filter out results.
+    - keyword: A second keyword to use to filter out results, or a list of
+               keywords to exclude all at once.
     - article_titles: List of article titles resulting from basic search.
     - keyword_to_titles: Dictionary mapping keyword to a list of all 
                          article titles containing that keyword.
@@ -241,21 +313,17 @@ def filter_out(keyword, article_titles, keyword_to_titles):
     Returns:
     - List of article titles from the basic search that do not include the new keyword.
     """
-  
-    result = []
-    if keyword not in keyword_to_titles:
-        return article_titles
+    keywords = [keyword] if isinstance(keyword, str) else keyword
 
-    if keyword in keyword_to_titles:
-        keyword_titles = keyword_to_titles[keyword]
+    excluded = set()
+    for word in keywords:
+        if word in keyword_to_titles:
+            excluded.update(keyword_to_titles[word])
 
+    if not excluded:
+        return article_titles
 
-        for title in article_titles:
-            # Check if the title is not in the article_titles list
-            if title not in keyword_titles:
-                result.append(title)
-
-    return result
+    return [title for title in article_titles if title not in excluded]
 
 # 8) 
 #
@@ -268,7 +336,7 @@ def filter_out(keyword, article_titles, keyword_to_titles):
 #                   following keys: author, timestamp, length of article
 #
 # Return: list of article titles from the basic search that were published
-#         during the provided year.
+#         during the provided year (in UTC).
 
 def articles_from_year(year, article_titles, title_to_info):
     """
@@ -280,14 +348,12 @@ def articles_from_year(year, article_titles, title_to_info):
     
     Returns:
     - List of article titles from the basic search that were published during 
-      the provided year.
+      the provided year. Years are UTC, so results do not depend on the
+      timezone of the machine running the search.
     """
     result = []
-    year_begin = datetime.date(year, 1, 1)
-    year_begin_timestamp = time.mktime(year_begin.timetuple())
-
-    year_end = datetime.date(year, 12, 31)
-    year_end_timestamp = time.mktime(year_end.timetuple())
+    year_begin_timestamp = calendar.timegm((year, 1, 1, 0, 0, 0))
+    next_year_timestamp = calendar.timegm((year + 1, 1, 1, 0, 0, 0))
 
     for title in article_titles:
     # Check if the title is in the title_to_info dictionary
@@ -296,7 +362,7 @@ def articles_from_year(year, article_titles, title_to_info):
                
             # Check if the year matches the provided year
 
-            if year_begin_timestamp <= timestamp and year_end_timestamp >= timestamp:
+            if year_begin_timestamp <= timestamp < next_year_timestamp:
                 result.append(title)
 
     return result
@@ -305,43 +371,68 @@ def articles_from_year(year, article_titles, title_to_info):
 
 # Prints out articles based on searched keyword and advanced options
 def display_result():
-    # Preprocess all metadata to dictionaries
-    keyword_to_titles_dict = keyword_to_titles(article_metadata())
-    title_to_info_dict = title_to_info(article_metadata())
+    # With SEARCH_TRACE set in the environment, the time spent loading the
+    # index and on each step of the query is printed to stderr as JSON
+    traced = os.environ.get("SEARCH_TRACE")
+    with tracing("display_result") if traced else nullcontext() as trace:
+        # Open the prebuilt index (rebuilt first if the metadata changed)
+        with stage("load_index"):
+            index = load_index()
     
-    # Stores list of articles returned from searching user's keyword
-    articles = search(ask_search(), keyword_to_titles_dict)
-
-    # advanced stores user's chosen advanced option (1-7)
-    # value stores user's response in being asked the advanced option
-    advanced, value = ask_advanced_search()
-
-    if advanced == 1:
-        # value stores max length of articles
-        # Update articles to contain only ones not exceeding the maximum length
-        articles = article_length(value, articles, title_to_info_dict)
-    if advanced == 2:
-        # Update articles to be a dictionary keyed by author
-        articles = key_by_author(articles, title_to_info_dict)
-    elif advanced == 3:
-        # value stores author name
-        # Update article metadata to only contain titles and timestamps
-        articles = filter_to_author(value, articles, title_to_info_dict)
-    elif advanced == 4:
-        # value stores a second keyword
-        # Filter articles to exclude those containing the new keyword.
-        articles = filter_out(value, articles, keyword_to_titles_dict)
-    elif advanced == 5:
-        # value stores year as an int
-        # Update article metadata to contain only articles from that year
-        articles = articles_from_year(value, articles, title_to_info_dict)
-
-    print()
-
-    if not articles:
-        print("No articles found")
-    else:
-        print("Here are your articles: " + str(articles))
+        # Stores the user's keyword; every advanced option below becomes a step
+        # of one query plan that runs in a single pass over the keyword's articles
+        keyword = ask_search()
+        plan = QueryPlan(keyword)
+
+        # advanced stores user's chosen advanced option (1-7)
+        # value stores user's response in being asked the advanced option
+        advanced, value = ask_advanced_search()
+
+        if advanced == 1:
+            # value stores max length of articles
+            # Keep only articles not exceeding the maximum length
+            plan.max_length(value)
+        if advanced == 2:
+            # Return articles as a dictionary keyed by author
+            plan.group_by_author()
+        elif advanced == 3:
+            # value stores author name
+            # Keep only articles written by that author
+            plan.by_author(value)
+        elif advanced == 4:
+            # value stores a second keyword
+            # Filter articles to exclude those containing the new keyword.
+            plan.exclude(value)
+        elif advanced == 5:
+            # value stores year as an int
+            # Keep only articles from that year
+            plan.in_year(value)
+
+        print()
+
+        try:
+            articles = plan.run(index)
+        except StopwordError as error:
+            # The index was built with index_file.py --stopwords, leaving this keyword out
+            print(error)
+        else:
+            if not articles and keyword not in index.term_dictionary():
+                # No article has the keyword at all, so it may be misspelled:
+                # retry with the keywords one edit away from it, then two
+                for max_distance in range(1, MAX_EDIT_DISTANCE + 1):
+                    articles = plan.fuzzy(max_distance).run(index)
+                    if articles:
+                        print("No articles contain '" + keyword + "', showing similar keywords instead")
+                        break
+
+            if not articles:
+                print("No articles found")
+            else:
+                print("Here are your articles: " + str(articles))
+
+    if trace is not None:
+        print(json.dumps(trace.to_dict()), file=sys.stderr)
+
 
 if __name__ == "__main__":
     display_result()
@@ -1,8 +1,38 @@
-from search import keyword_to_titles, title_to_info, search, article_length,key_by_author, filter_to_author, filter_out, articles_from_year
+from search import keyword_to_titles, title_to_info, search, search_many, article_length,key_by_author, filter_to_author, filter_out, articles_from_year
 from search_tests_helper import get_print, print_basic, print_advanced, print_advanced_option
-from wiki import article_metadata
+from wiki import article_metadata, iter_metadata, load_metadata
+from index_file import build_index, load_index, open_index, IndexFormatError, encode_index, PrebuiltIndex
+from store import ArticleStore, year_range, month_range, STOPWORDS
+from plan import QueryPlan, StopwordError
+from cache import QueryCache
+from live import LiveIndex
+from sharded import ShardedIndex
+from server import SearchServer
+from terms import TermDictionary, wildcard_search, suggest
+from fuzzy import DeletionIndex, edit_distance, fuzzy_search
+from rank import bm25_scores, top_k, ranked_search, idf
+import rank
+import bench
+import vector
+from vector import ColumnArrays
+from facets import facet_counts, length_bucket_labels
+from instrument import Metrics, current_trace, tracing
+from postings import gallop, intersect, union, difference
+from compressed import CompressedPostings, BitmapPostings, encode_postings, encode_bitmap, encode, open_postings, BITMAP_RATIO
+from query import parse_query, boolean_search, QuerySyntaxError
 from unittest.mock import patch
-from unittest import TestCase, main
+from tempfile import TemporaryDirectory
+import os
+import gzip
+import json
+import time
+import asyncio
+from unittest import TestCase, main, skipIf, skipUnless
+from fnmatch import fnmatchcase
+
+
+def fnmatchcase_all(words, pattern):
+    return [word for word in words if fnmatchcase(word, pattern)]
 
 class TestSearch(TestCase):
 
@@ -129,6 +159,35 @@ class TestSearch(TestCase):
         self.assertEqual(search(keyword, keyword_to_titles), expected)
 
 
+    def test_search_does_not_return_index_list(self):
+        keyword_to_titles = {'beach': ['Spain national beach soccer team']}
+        result = search('beach', keyword_to_titles)
+        result.append('other')
+
+        self.assertEqual(keyword_to_titles['beach'], ['Spain national beach soccer team'])
+
+
+    # search_many test
+
+    def test_search_many_keeps_input_order(self):
+        keyword_to_titles = {'cat': ['title1', 'title2'], 'dog': ['title3']}
+        keywords = ['dog', 'bird', 'cat', 'dog']
+        expected = [['title3'], [], ['title1', 'title2'], ['title3']]
+
+        self.assertEqual(search_many(keywords, keyword_to_titles), expected)
+
+    def test_search_many_empty(self):
+        self.assertEqual(search_many([], {'cat': ['title1']}), [])
+
+    def test_search_many_repeated_keyword_looked_up_once(self):
+        keyword_to_titles = {'cat': ['title1']}
+        with patch('search.search', wraps=search) as search_mock:
+            results = search_many(['cat'] * 1000, keyword_to_titles)
+
+        self.assertEqual(search_mock.call_count, 1)
+        self.assertEqual(len(results), 1000)
+
+
     # article_length test
 
     def test_article_length_all_titles(self):
@@ -177,6 +236,45 @@ class TestSearch(TestCase):
 
         self.assertEqual(article_length(50, article_titles, titles_to_info), expected)
 
+    def test_article_length_min_length(self):
+        titles_to_info = {
+            'music city': {"author": 'Mary', "timestamp":2005, "length": 300},
+            'ran': {"author": 'Joe', "timestamp": 1988, "length": 5000},
+            'kim': {"author": 'Andrea', "timestamp": 1960, "length": 200}
+            }
+        article_titles = ['music city', 'ran', 'kim']
+
+        self.assertEqual(article_length(6000, article_titles, titles_to_info, min_length=300), ['music city', 'ran'])
+
+
+    # length index test
+
+    def test_articles_with_length(self):
+        metadata = [
+            ['a', 'x', 0, 300, ['k']],
+            ['b', 'x', 0, 5000, ['k']],
+            ['c', 'x', 0, 200, []],
+            ['d', 'x', 0, 300, ['k']]
+        ]
+        for store in [ArticleStore.from_metadata(metadata), PrebuiltIndex(encode_index(metadata))]:
+            self.assertEqual(store.articles_with_length(max_length=300), [0, 2, 3])
+            self.assertEqual(store.articles_with_length(min_length=300), [0, 1, 3])
+            self.assertEqual(store.articles_with_length(250, 4999), [0, 3])
+            self.assertEqual(store.articles_with_length(6000), [])
+            self.assertEqual(store.filter_by_length([0, 1, 3], max_length=300), [0, 3])
+            self.assertEqual(store.filter_by_length([0, 1, 3], min_length=1000), [1])
+
+    def test_filter_by_length_matches_article_length(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+        info = title_to_info(metadata)
+
+        for keyword in ['music', 'the', 'soccer']:
+            titles = keyword_to_titles(metadata)[keyword]
+            for max_length in [0, 5000, 20000, 10 ** 6]:
+                filtered = store.filter_by_length(store.keyword_postings(keyword), max_length=max_length)
+                self.assertEqual(store.titles_for(filtered), article_length(max_length, titles, info))
+
 
     # key_by_author
 
@@ -227,6 +325,19 @@ class TestSearch(TestCase):
 
         self.assertEqual(key_by_author(article_titles, titles_to_info), expected)
     
+    def test_key_by_author_ignore_case(self):
+        titles_to_info = {
+            'music city': {"author": 'Mary', "timestamp":2005, "length": 300},
+            'ran': {"author": 'MARY', "timestamp": 1988, "length": 5000},
+            'kim': {"author": 'Andrea', "timestamp": 1960, "length": 200}
+            }
+        article_titles = ['music city', 'ran', 'kim']
+        expected = {
+            'Mary' : ['music city', 'ran'],
+            'Andrea' : ['kim']
+        }
+
+        self.assertEqual(key_by_author(article_titles, titles_to_info, ignore_case=True), expected)
 
     # filter_to_author
     
@@ -265,6 +376,50 @@ class TestSearch(TestCase):
     
         self.assertEqual(filter_to_author(author_name, article_titles, titles_to_info), expected)
 
+    def test_filter_to_author_ignore_case(self):
+        titles_to_info = {
+            'music city': {"author": 'Mary', "timestamp":2005, "length": 300},
+            'ran': {"author": 'MARY', "timestamp": 1988, "length": 5000},
+            'kim': {"author": 'Andrea', "timestamp": 1960, "length": 200}
+            }
+        article_titles = ['music city', 'ran', 'kim']
+
+        self.assertEqual(filter_to_author('mary', article_titles, titles_to_info, ignore_case=True), ['music city', 'ran'])
+
+
+    # author index test
+
+    def test_author_index(self):
+        metadata = [
+            ['a', 'Mary', 0, 1, ['k']],
+            ['b', 'Joe', 0, 1, ['k']],
+            ['c', 'MARY', 0, 1, ['k']],
+            ['d', 'Mary', 0, 1, []]
+        ]
+        for store in [ArticleStore.from_metadata(metadata), PrebuiltIndex(encode_index(metadata))]:
+            self.assertEqual(list(store.author_doc_ids('Mary')), [0, 3])
+            self.assertEqual(list(store.author_doc_ids('mary', ignore_case=True)), [0, 2, 3])
+            self.assertEqual(list(store.author_doc_ids('Nobody')), [])
+            self.assertEqual(store.filter_by_author([0, 1, 2], 'Mary'), [0])
+            self.assertEqual(store.filter_by_author([0, 1, 2], 'mary', ignore_case=True), [0, 2])
+            self.assertEqual(store.group_by_author([0, 1, 2]), {'Mary': [0], 'Joe': [1], 'MARY': [2]})
+            self.assertEqual(store.group_by_author([0, 1, 2], ignore_case=True), {'Mary': [0, 2], 'Joe': [1]})
+
+    def test_author_index_matches_title_functions(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+        info = title_to_info(metadata)
+        titles = keyword_to_titles(metadata)['music']
+        doc_ids = store.keyword_postings('music')
+
+        grouped = {author: store.titles_for(ids) for author, ids in store.group_by_author(doc_ids).items()}
+        self.assertEqual(grouped, key_by_author(titles, info))
+        for author in ['jack johnson', 'Jack Johnson', 'Burna Boy']:
+            self.assertEqual(store.titles_for(store.filter_by_author(doc_ids, author)),
+                             filter_to_author(author, titles, info))
+            self.assertEqual(store.titles_for(store.filter_by_author(doc_ids, author, ignore_case=True)),
+                             filter_to_author(author, titles, info, ignore_case=True))
+
 
     # filter_out
 
@@ -301,6 +456,124 @@ class TestSearch(TestCase):
 
         self.assertEqual(filter_out(keyword, article_titles, keyword_to_titles), expected)
 
+    def test_filter_out_several_keywords(self):
+        keyword_to_titles = {'music': ['city', 'ran'], 'sport': ['say'], 'food': ['kim']}
+        article_titles = ['say', 'city', 'ran', 'kim', 'tim']
+        expected = ['kim', 'tim']
+
+        self.assertEqual(filter_out(['music', 'sport', 'missing'], article_titles, keyword_to_titles), expected)
+
+
+    # postings test
+
+    def test_postings_operations(self):
+        a = [1, 3, 5, 7, 9, 11, 13]
+        b = [0, 3, 4, 9, 13, 20]
+
+        self.assertEqual(intersect(a, b), [3, 9, 13])
+        self.assertEqual(union(a, b), [0, 1, 3, 4, 5, 7, 9, 11, 13, 20])
+        self.assertEqual(difference(a, b), [1, 5, 7, 11])
+        self.assertEqual(intersect([], b), [])
+        self.assertEqual(difference(a, []), a)
+
+    def test_gallop(self):
+        postings = list(range(0, 200, 2))
+
+        self.assertEqual(gallop(postings, 0), 0)
+        self.assertEqual(gallop(postings, 101, 3), 51)
+        self.assertEqual(gallop(postings, 500), 100)
+
+    def test_compressed_postings_round_trip(self):
+        lists = [[], [7], [3, 4], list(range(5, 300)), list(range(0, 1000, 3)),
+                 [1, 70000, 70001, 5000000], list(range(0, 40000, 250)) + [10 ** 9]]
+        for doc_ids in lists:
+            postings = CompressedPostings(encode_postings(doc_ids))
+            self.assertEqual(list(postings), doc_ids)
+            self.assertEqual(len(postings), len(doc_ids))
+            self.assertEqual(list(postings.decode()), doc_ids)
+            if doc_ids:
+                self.assertEqual(postings[-1], doc_ids[-1])
+                self.assertEqual(postings[len(doc_ids) // 2], doc_ids[len(doc_ids) // 2])
+            for target in [0, 4, 6, 129, 300, 999, 70001, 10 ** 9, 10 ** 10]:
+                for lo in [0, len(doc_ids) // 2]:
+                    self.assertEqual(gallop(postings, target, lo), gallop(doc_ids, target, lo))
+
+        self.assertEqual(len(encode_postings([7])), 5)
+        self.assertLess(len(encode_postings(range(0, 100000, 2))), 100000 * 4 // 3)
+
+    def test_compressed_postings_operations(self):
+        a = list(range(0, 3000, 3))
+        b = list(range(0, 3000, 5)) + [4000, 90000]
+        compressed_a = CompressedPostings(encode_postings(a))
+        compressed_b = CompressedPostings(encode_postings(b))
+
+        self.assertEqual(intersect(compressed_a, compressed_b), intersect(a, b))
+        self.assertEqual(intersect(b[:20], compressed_a), intersect(b[:20], a))
+        self.assertEqual(union(compressed_a, b), union(a, b))
+        self.assertEqual(difference(compressed_b, compressed_a), difference(b, a))
+
+    def test_compressed_store_matches_plain_store(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+        compressed = ArticleStore.from_metadata(metadata, compressed=True)
+
+        self.assertEqual(dict(compressed.keyword_to_titles.items()), keyword_to_titles(metadata))
+        for plan in [QueryPlan('music').exclude('rock').max_length(20000), QueryPlan('soccer').in_year(2009)]:
+            self.assertEqual(plan.run(compressed), plan.run(store))
+        self.assertEqual(boolean_search('music AND NOT (rock OR pop)', compressed),
+                         boolean_search('music AND NOT (rock OR pop)', store))
+        self.assertEqual(top_k('music the', compressed, vectorized=False), top_k('music the', store, vectorized=False))
+        self.assertIsInstance(PrebuiltIndex(encode_index(metadata)).postings['jazz'], CompressedPostings)
+
+
+    def test_bitmap_postings(self):
+        doc_ids = [0, 3, 7, 8, 9, 64, 65, 500]
+        bitmap = BitmapPostings(encode_bitmap(doc_ids))
+
+        self.assertEqual(list(bitmap), doc_ids)
+        self.assertEqual(len(bitmap), len(doc_ids))
+        self.assertIn(64, bitmap)
+        self.assertNotIn(10, bitmap)
+        self.assertNotIn(10 ** 6, bitmap)
+        self.assertEqual(bitmap[-1], 500)
+        other = list(range(0, 600, 3))
+        self.assertEqual(intersect(other, bitmap), intersect(other, doc_ids))
+        self.assertEqual(intersect(bitmap, other[:3]), intersect(doc_ids, other[:3]))
+        self.assertEqual(difference(other, bitmap), difference(other, doc_ids))
+        self.assertEqual(union(bitmap, other), union(doc_ids, other))
+        self.assertEqual(gallop(bitmap, 10, 2), gallop(doc_ids, 10, 2))
+        self.assertIsInstance(open_postings(encode(doc_ids, 20)), BitmapPostings)
+        self.assertIsInstance(open_postings(encode(doc_ids, 1000)), CompressedPostings)
+
+    # boolean query test
+
+    def test_parse_query(self):
+        expected = ('and', [('term', 'soccer'), ('not', ('or', [('term', 'music'), ('term', 'beach')]))])
+
+        self.assertEqual(parse_query('soccer AND NOT (music OR beach)'), expected)
+        self.assertEqual(parse_query('soccer NOT (music OR beach)'), expected)
+
+    def test_parse_query_errors(self):
+        for query in ['', 'soccer AND', '(soccer', 'soccer )', 'OR music']:
+            with self.assertRaises(QuerySyntaxError):
+                parse_query(query)
+
+    def test_boolean_search_matches_set_operations(self):
+        metadata = article_metadata()
+        index = PrebuiltIndex(encode_index(metadata))
+        keywords = {article[0]: set(article[4]) for article in metadata}
+
+        def titles(predicate):
+            return [title for title, words in keywords.items() if predicate(words)]
+
+        self.assertEqual(boolean_search('soccer', index), titles(lambda w: 'soccer' in w))
+        self.assertEqual(boolean_search('music AND the AND NOT rock', index),
+                         titles(lambda w: 'music' in w and 'the' in w and 'rock' not in w))
+        self.assertEqual(boolean_search('soccer OR (jazz NOT pop)', index),
+                         titles(lambda w: 'soccer' in w or ('jazz' in w and 'pop' not in w)))
+        self.assertEqual(boolean_search('NOT the', index), titles(lambda w: 'the' not in w))
+        self.assertEqual(boolean_search('soccer AND missingword', index), [])
+
 
     # article_from_year test.
 
@@ -328,6 +601,850 @@ class TestSearch(TestCase):
 
         self.assertEqual(articles_from_year(year, article_titles, title_to_info), expected)
 
+    def test_articles_from_year_includes_december_31(self):
+        # 2008-12-31 12:00:00 UTC and 2009-01-01 00:00:00 UTC
+        title_to_info = {'say': {'timestamp': 1230724800}, 'ran': {'timestamp': 1230768000}}
+
+        self.assertEqual(articles_from_year(2008, ['say', 'ran'], title_to_info), ['say'])
+
+    def test_articles_from_year_ignores_local_timezone(self):
+        title_to_info = {'say': {'timestamp': 1199145600}, 'ran': {'timestamp': 1230767999}}
+        old_tz = os.environ.get('TZ')
+        try:
+            for tz in ['UTC', 'America/Los_Angeles', 'Asia/Tokyo']:
+                os.environ['TZ'] = tz
+                time.tzset()
+                self.assertEqual(articles_from_year(2008, ['say', 'ran'], title_to_info), ['say', 'ran'])
+        finally:
+            if old_tz is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = old_tz
+            time.tzset()
+
+    # article store test
+
+    def test_article_store_columns(self):
+        metadata = [
+            ['List of Canadian musicians', 'author1', 3567876543, 97547, ['c', 'd']],
+            ['2009 in music', 'author2', 5876543267, 4564, ['d']],
+            ['Lights (musician)', 'author1', 8655459, 14678, ['c', 'c']]
+        ]
+        store = ArticleStore.from_metadata(metadata)
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual(list(store.authors), ['author1', 'author2'])
+        self.assertEqual(list(store.author_ids), [0, 1, 0])
+        self.assertEqual(list(store.timestamps), [3567876543, 5876543267, 8655459])
+        self.assertEqual(list(store.lengths), [97547, 4564, 14678])
+        self.assertEqual(list(store.keyword_postings('c')), [0, 2])
+        self.assertEqual(list(store.keyword_postings('x')), [])
+        self.assertEqual(store.doc_id('2009 in music'), 1)
+        self.assertEqual(store.doc_id('missing'), -1)
+        self.assertEqual(store.info(2), {'author': 'author1', 'timestamp': 8655459, 'length': 14678})
+
+    def test_article_store_dictionary_views(self):
+        metadata = article_metadata()
+        stores = [ArticleStore.from_metadata(metadata), PrebuiltIndex(encode_index(metadata))]
+
+        for store in stores:
+            self.assertEqual(dict(store.keyword_to_titles), keyword_to_titles(metadata))
+            self.assertEqual(dict(store.title_to_info), title_to_info(metadata))
+
+
+    def test_stopwords_left_out_of_index(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata, stopwords=STOPWORDS)
+        full = ArticleStore.from_metadata(metadata)
+
+        self.assertNotIn('the', store.keyword_to_titles)
+        self.assertEqual(store.keyword_to_titles['music'], full.keyword_to_titles['music'])
+        self.assertEqual(boolean_search('the soccer AND NOT and', store), boolean_search('soccer', full))
+        self.assertEqual(boolean_search('the', store), [])
+
+        encoded = encode_index(metadata, stopwords=STOPWORDS)
+        self.assertEqual(PrebuiltIndex(encoded).stopwords, STOPWORDS)
+        self.assertLess(len(encoded), len(encode_index(metadata)))
+
+        with self.assertRaises(StopwordError):
+            QueryPlan('the').doc_ids(store)
+        with self.assertRaises(StopwordError):
+            QueryPlan('music').exclude('and').run(store)
+        self.assertTrue(QueryPlan('the').doc_ids(full))
+        self.assertEqual(SearchServer(store).handle('GET', '/search?keyword=music&exclude=the')[0], 400)
+
+    def test_bitmap_keywords_match_lists(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+        plans = [QueryPlan('the').max_length(3000), QueryPlan('the').in_year(2009).exclude('and'),
+                 QueryPlan('and').by_author('jack johnson', ignore_case=True), QueryPlan('music').exclude('the')]
+
+        for bitmaps in [ArticleStore.from_metadata(metadata, bitmap_ratio=BITMAP_RATIO), PrebuiltIndex(encode_index(metadata))]:
+            self.assertIsInstance(bitmaps.keyword_postings('the'), BitmapPostings)
+            self.assertEqual(dict(bitmaps.keyword_to_titles.items()), dict(store.keyword_to_titles.items()))
+            for plan in plans:
+                self.assertEqual(plan.run(bitmaps), plan.run(store))
+            self.assertEqual(bitmaps.filter_by_length(bitmaps.keyword_postings('the'), 1000, 3000),
+                             store.filter_by_length(store.keyword_postings('the'), 1000, 3000))
+            self.assertEqual(boolean_search('the AND NOT (music OR and)', bitmaps),
+                             boolean_search('the AND NOT (music OR and)', store))
+        self.assertEqual(QueryPlan('the').explain(bitmaps)[0][0], 'keyword (bitmap)')
+
+    # wildcard and autocomplete test
+
+    def test_term_dictionary_prefix_suffix_and_patterns(self):
+        words = ['music', 'musical', 'musician', 'museum', 'artist', 'pianist', 'list', 'mist', 'rock', 'm\u00fcnchen']
+        terms = TermDictionary(sorted(words))
+
+        self.assertEqual(terms.with_prefix('music'), ['music', 'musical', 'musician'])
+        self.assertEqual(terms.with_prefix('x'), [])
+        self.assertEqual(terms.with_suffix('ist'), ['artist', 'list', 'mist', 'pianist'])
+        for pattern in ['music*', '*ist', 'mu*an', '*usi*', 'm?st', 'm*', '*', 'rock', 'roc', 'm\u00fc*']:
+            self.assertEqual(terms.match(pattern), sorted(fnmatchcase_all(words, pattern)))
+        self.assertEqual(terms.suggest('mus', 2), ['museum', 'music'])
+        self.assertEqual(terms.suggest('mus', 2, frequency=len), ['musician', 'musical'])
+
+        weighted = TermDictionary(sorted(words), frequencies=len)
+        for prefix in ['', 'm', 'mus', 'x']:
+            self.assertEqual(weighted.suggest(prefix, 3), terms.suggest(prefix, 3, frequency=len))
+
+    def test_wildcard_search_and_suggest(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+        keywords = keyword_to_titles(metadata)
+        matching = [keyword for keyword in keywords if keyword.startswith('music')]
+        expected = [article[0] for article in metadata if any(keyword in matching for keyword in article[4])]
+
+        for index in [store, PrebuiltIndex(encode_index(metadata))]:
+            self.assertEqual(wildcard_search('music*', index), expected)
+            self.assertEqual(QueryPlan('music*').max_length(20000).run(index),
+                             article_length(20000, expected, title_to_info(metadata)))
+            self.assertEqual(boolean_search('music* AND NOT *ist', index),
+                             boolean_search('(' + ' OR '.join(matching) + ') AND NOT (' +
+                                            ' OR '.join(k for k in keywords if k.endswith('ist')) + ')', store))
+            suggestions = suggest('mu', index, k=3)
+            self.assertEqual(suggestions[0], 'music')
+            self.assertTrue(all(keyword.startswith('mu') for keyword in suggestions))
+        self.assertEqual(SearchServer(store).handle('GET', '/suggest?prefix=mu&k=3')[1], {'suggestions': suggestions})
+
+    # fuzzy keyword test
+
+    def test_edit_distance_and_deletion_index(self):
+        self.assertEqual(edit_distance('music', 'music', 2), 0)
+        self.assertEqual(edit_distance('musc', 'music', 2), 1)
+        self.assertEqual(edit_distance('msuic', 'music', 2), 1)
+        self.assertEqual(edit_distance('mosaic', 'music', 2), 2)
+        self.assertEqual(edit_distance('rock', 'music', 2), 3)
+
+        words = sorted(keyword_to_titles(article_metadata()))
+        deletions = DeletionIndex(words)
+        for word in ['musc', 'muisc', 'socer', 'bech', 'radio', 'xyzzy', 'a']:
+            for max_distance in [0, 1, 2]:
+                expected = sorted((edit_distance(word, term, max_distance), term) for term in words
+                                  if edit_distance(word, term, max_distance) <= max_distance)
+                self.assertEqual(deletions.lookup(word, max_distance), expected)
+        with self.assertRaises(ValueError):
+            deletions.lookup('musc', 3)
+
+        stored = PrebuiltIndex(encode_index(article_metadata())).term_dictionary().deletion_index()
+        self.assertNotIsInstance(stored.variants, dict)
+        for word in ['musc', 'muisc', 'socer', 'xyzzy', 'a']:
+            self.assertEqual(stored.lookup(word), deletions.lookup(word))
+
+    def test_fuzzy_search(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+        keywords = keyword_to_titles(metadata)
+
+        for index in [store, PrebuiltIndex(encode_index(metadata))]:
+            self.assertEqual(fuzzy_search('socer', index, 1), search('soccer', keywords))
+            self.assertEqual(fuzzy_search('soccer', index, 0), search('soccer', keywords))
+            self.assertEqual(QueryPlan('muisc').fuzzy(1).exclude('rock').run(index),
+                             QueryPlan('music').exclude('rock').run(index))
+            self.assertEqual(boolean_search('socer~1 AND NOT muisc~', index),
+                             boolean_search('soccer AND NOT (music OR miss OR must OR usc)', index))
+        self.assertNotEqual(QueryPlan('socer').fuzzy().key(), QueryPlan('socer').key())
+        with self.assertRaises(QuerySyntaxError):
+            parse_query('socer~3')
+        self.assertEqual(SearchServer(store).handle('GET', '/search?keyword=socer&fuzzy=1')[1],
+                         {'results': search('soccer', keywords)})
+        self.assertEqual(SearchServer(store).handle('GET', '/search?keyword=socer&fuzzy=5')[0], 400)
+
+    # benchmark test
+
+    def test_benchmark_corpus_and_report(self):
+        metadata = bench.generate_metadata(500)
+        self.assertEqual(metadata, bench.generate_metadata(500))
+        self.assertEqual(len(metadata), 500)
+        for title, author, timestamp, length, keywords in metadata:
+            self.assertTrue(bench.FIRST_TIMESTAMP <= timestamp < bench.LAST_TIMESTAMP)
+            self.assertTrue(0 <= length <= bench.MAX_LENGTH)
+            self.assertEqual(len(keywords), len(set(keywords)))
+        counts = sorted((len(titles) for titles in keyword_to_titles(metadata).values()), reverse=True)
+        self.assertGreater(counts[0], 10 * counts[len(counts) // 2])
+
+        report = bench.run([200], only=['search', 'plan_filters'], min_runs=2, min_seconds=0)
+        self.assertEqual(set(report['results']['200']), {'search', 'plan_filters'})
+        measured = report['results']['200']['search']
+        self.assertTrue(measured['p50_ms'] <= measured['p99_ms'])
+        self.assertGreater(measured['ops_per_sec'], 0)
+        json.dumps(report)
+
+        self.assertEqual(bench.compare(report, report), [])
+        faster = json.loads(json.dumps(report))
+        faster['results']['200']['search']['p50_ms'] /= 2
+        self.assertEqual([regression[:3] for regression in bench.compare(report, faster)], [('200', 'search', 'p50_ms')])
+
+    # tracing test
+
+    def test_traced_plan_counts_every_step(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+        plan = QueryPlan('music').by_author('jack johnson').max_length(20000).exclude('rock')
+        metrics = Metrics()
+
+        with tracing('search', metrics=metrics) as trace:
+            results = plan.run(store)
+        self.assertEqual(results, plan.run(store))
+        stages = {stage['name']: stage for stage in trace.to_dict()['stages']}
+        self.assertEqual(list(stages), ['plan', 'plan/keyword', 'plan/author', 'plan/filters', 'plan/titles'])
+        self.assertEqual(stages['plan/keyword']['counters']['postings'], len(search('music', keyword_to_titles(metadata))))
+        self.assertEqual(stages['plan/author']['counters']['candidates_out'],
+                         len(filter_to_author('jack johnson', search('music', keyword_to_titles(metadata)), title_to_info(metadata))))
+        filters = stages['plan/filters']['counters']
+        self.assertEqual(filters['candidates_in'], stages['plan/author']['counters']['candidates_out'])
+        self.assertEqual(filters['candidates_out'], len(results))
+        self.assertTrue(all(stage['seconds'] >= 0 for stage in stages.values()))
+
+        with tracing('search', memory=True, metrics=metrics) as trace:
+            plan.run(store)
+        self.assertIn('allocated_bytes', trace.to_dict()['stages'][0])
+        self.assertGreaterEqual(trace.peak_bytes, 0)
+
+        text = metrics.render()
+        self.assertIn('search_queries_total{query="search"} 2.0', text)
+        self.assertIn('search_stage_calls_total{stage="plan/filters"} 2.0', text)
+        self.assertIn('search_stage_items_total{stage="plan/keyword",counter="postings"}', text)
+
+    def test_tracing_is_off_by_default(self):
+        store = ArticleStore.from_metadata(article_metadata())
+        self.assertIsNone(current_trace())
+        metrics = Metrics()
+        server = SearchServer(store, metrics=metrics)
+        status, payload = server.handle('GET', '/search?keyword=soccer')
+        self.assertNotIn('trace', payload)
+        self.assertEqual(metrics.queries, {})
+
+        status, payload = server.handle('GET', '/boolean?q=soccer+AND+NOT+music&trace=1')
+        self.assertEqual(payload['results'], boolean_search('soccer AND NOT music', store))
+        self.assertEqual([stage['name'] for stage in payload['trace']['stages']], ['boolean'])
+        self.assertIn('search_queries_total{query="boolean"} 1.0', server.handle('GET', '/metrics')[1])
+        status, payload = server.handle('GET', '/metrics?trace=1')
+        self.assertEqual(status, 200)
+        self.assertIn('search_queries_total{query="boolean"} 1.0', payload)
+
+    # parallel build test
+
+    def test_parallel_dictionaries_match_serial(self):
+        metadata = article_metadata()
+
+        self.assertEqual(list(keyword_to_titles(metadata, workers=2).items()), list(keyword_to_titles(metadata).items()))
+        self.assertEqual(list(title_to_info(metadata, workers=2).items()), list(title_to_info(metadata).items()))
+
+    def test_parallel_store_matches_serial(self):
+        metadata = article_metadata()
+        serial = ArticleStore.from_metadata(metadata)
+        for parallel in [ArticleStore.from_metadata(metadata, workers=2),
+                         ArticleStore.from_metadata(iter(metadata), workers=3, shard_size=7)]:
+            self.assertEqual(parallel.titles, serial.titles)
+            self.assertEqual(parallel.authors, serial.authors)
+            self.assertEqual(parallel.author_ids, serial.author_ids)
+            self.assertEqual(parallel.timestamps, serial.timestamps)
+            self.assertEqual(parallel.lengths, serial.lengths)
+            self.assertEqual(parallel.title_ids, serial.title_ids)
+            self.assertEqual(list(parallel.postings.items()), list(serial.postings.items()))
+
+
+    # streaming metadata test
+
+    def test_iter_metadata_plain_and_gzip(self):
+        metadata = article_metadata()
+        with TemporaryDirectory() as tmp:
+            plain = os.path.join(tmp, 'articles.jsonl')
+            compressed = os.path.join(tmp, 'articles.jsonl.gz')
+            lines = ''.join(json.dumps(article) + '\n' for article in metadata)
+            with open(plain, 'w', encoding='utf-8') as f:
+                f.write(lines + '\n')
+            with gzip.open(compressed, 'wt', encoding='utf-8') as f:
+                f.write(lines)
+
+            self.assertEqual(load_metadata(plain), metadata)
+            self.assertEqual(list(iter_metadata(compressed)), metadata)
+
+    def test_iter_metadata_object_records(self):
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'articles.ndjson')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'keywords': ['k'], 'title': 'T', 'author': 'a', 'length': 1, 'timestamp': 2}) + '\n')
+
+            self.assertEqual(list(iter_metadata(path)), [['T', 'a', 2, 1, ['k']]])
+
+    def test_store_built_from_stream(self):
+        metadata = article_metadata()
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'articles.jsonl.gz')
+            with gzip.open(path, 'wt', encoding='utf-8') as f:
+                for article in metadata:
+                    f.write(json.dumps(article) + '\n')
+
+            store = ArticleStore.from_metadata(iter_metadata(path))
+            self.assertEqual(dict(store.keyword_to_titles), keyword_to_titles(metadata))
+            self.assertEqual(search('soccer', store.keyword_to_titles), search('soccer', keyword_to_titles(metadata)))
+
+            index_path = os.path.join(tmp, 'wiki.idx')
+            index = load_index(index_path, path)
+            self.assertEqual(dict(index.title_to_info), title_to_info(metadata))
+
+
+    # index_file test
+
+    def test_index_file_matches_dictionaries(self):
+        metadata = article_metadata()
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'wiki.idx')
+            umask = os.umask(0o022)
+            try:
+                build_index(metadata, path)
+            finally:
+                os.umask(umask)
+            index = open_index(path)
+
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+            self.assertEqual(dict(index.keyword_to_titles), keyword_to_titles(metadata))
+            self.assertEqual(dict(index.title_to_info), title_to_info(metadata))
+            self.assertNotIn('not a keyword', index.keyword_to_titles)
+            self.assertNotIn('not a title', index.title_to_info)
+
+    def test_index_file_rebuilt_when_source_changes(self):
+        old = [['Old title', 'author1', 1181623340, 100, ['old']]]
+        new = [['New title', 'author2', 1181623340, 200, ['new']]]
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'wiki.idx')
+            source = os.path.join(tmp, 'source')
+            with open(source, 'w') as f:
+                f.write('old')
+            self.assertEqual(load_index(path, source, lambda: old).keyword_to_titles['old'], ['Old title'])
+
+            with open(source, 'w') as f:
+                f.write('newer')
+            self.assertEqual(dict(load_index(path, source, lambda: new).keyword_to_titles), {'new': ['New title']})
+            self.assertEqual(dict(open_index(path).keyword_to_titles), {'new': ['New title']})
+
+    def test_index_file_rebuilt_when_stopwords_change(self):
+        metadata = [['T', 'a', 0, 1, ['the', 'k']]]
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'wiki.idx')
+            source = os.path.join(tmp, 'source')
+            with open(source, 'w') as f:
+                f.write('old')
+            self.assertIn('the', load_index(path, source, lambda: metadata).keyword_to_titles)
+            self.assertNotIn('the', load_index(path, source, lambda: metadata, STOPWORDS).keyword_to_titles)
+            self.assertEqual(load_index(path, source, lambda: metadata).stopwords, STOPWORDS)
+
+            with open(source, 'w') as f:
+                f.write('newer')
+            self.assertEqual(load_index(path, source, lambda: metadata).stopwords, STOPWORDS)
+            self.assertIn('the', load_index(path, source, lambda: metadata, set()).keyword_to_titles)
+
+    def test_index_file_rejects_other_files(self):
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'wiki.idx')
+            with open(path, 'wb') as f:
+                f.write(b'not an index' * 100)
+
+            with self.assertRaises(IndexFormatError):
+                open_index(path)
+            index = load_index(path, path, lambda: [['T', 'a', 0, 1, ['k']]])
+            self.assertEqual(index.title_to_info['T'], {'author': 'a', 'timestamp': 0, 'length': 1})
+
+    @skipUnless(hasattr(os, 'fork'), 'os.fork() is not available')
+    def test_index_file_is_read_in_place(self):
+        metadata = article_metadata()
+        with TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'wiki.idx')
+            build_index(metadata, path)
+            index = open_index(path)
+            facets = index.facet_columns()
+            for view in [index.lengths, index.timestamps, index.author_ids, index.author_doc_ids('jack johnson'),
+                         index.term_dictionary().suffix_order, facets.years, facets.buckets]:
+                self.assertIs(view.obj, index.buffer)
+            store = ArticleStore.from_metadata(metadata)
+            self.assertEqual(facet_counts(index, QueryPlan('music').doc_ids(index), 2),
+                             facet_counts(store, QueryPlan('music').doc_ids(store), 2))
+            if vector.numpy() is not None:
+                columns = ColumnArrays(index)
+                self.assertFalse(columns.lengths.flags.owndata or columns.lengths.flags.writeable)
+
+            # A forked worker searches the mapping it inherited
+            read_end, write_end = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    os.write(write_end, json.dumps(QueryPlan('music').max_length(5000).run(index)).encode())
+                finally:
+                    os._exit(0)
+            os.close(write_end)
+            with os.fdopen(read_end, 'rb') as f:
+                results = json.loads(f.read())
+            os.waitpid(pid, 0)
+            self.assertEqual(results, QueryPlan('music').max_length(5000).run(store))
+
+
+    # date range test
+
+    def test_year_and_month_range(self):
+        self.assertEqual(year_range(2008), (1199145600, 1230768000))
+        self.assertEqual(month_range(2008, 2), (1201824000, 1204329600))
+        self.assertEqual(month_range(2008, 12), (1228089600, 1230768000))
+        self.assertEqual(year_range(9999)[1], month_range(9999, 12)[1])
+        self.assertEqual(year_range(9999)[1] - month_range(9999, 12)[0], 31 * 86400)
+
+    def test_articles_between(self):
+        metadata = [
+            ['a', 'x', 1230768000, 1, []],
+            ['b', 'x', 1199145600, 1, []],
+            ['c', 'x', 1230724800, 1, []],
+            ['d', 'x', 1201824000, 1, []]
+        ]
+        for store in [ArticleStore.from_metadata(metadata), PrebuiltIndex(encode_index(metadata))]:
+            self.assertEqual(store.articles_between(1199145600, 1230768000), [1, 2, 3])
+            self.assertEqual(store.articles_between(start=1230724800), [0, 2])
+            self.assertEqual(store.articles_between(end=1199145600), [])
+            self.assertEqual(store.articles_in_year(2008), [1, 2, 3])
+            self.assertEqual(store.articles_in_month(2008, 2), [3])
+            self.assertEqual(store.articles_in_month(2008, 12), [2])
+
+    def test_articles_in_year_matches_articles_from_year(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+        titles = [article[0] for article in metadata]
+
+        for year in range(2000, 2013):
+            self.assertEqual(store.titles_for(store.articles_in_year(year)),
+                             articles_from_year(year, titles, title_to_info(metadata)))
+
+    # query plan test
+
+    def test_query_plan_matches_chained_filters(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+        info = title_to_info(metadata)
+        keywords = keyword_to_titles(metadata)
+
+        plan = QueryPlan('music').max_length(20000).exclude('rock').exclude('pop').in_year(2009)
+        expected = keywords['music']
+        expected = article_length(20000, expected, info)
+        expected = filter_out(['rock', 'pop'], expected, keywords)
+        expected = articles_from_year(2009, expected, info)
+        self.assertEqual(plan.run(store), expected)
+
+        plan = QueryPlan('music').by_author('jack johnson').min_length(3000).group_by_author()
+        expected = filter_to_author('jack johnson', keywords['music'], info)
+        expected = key_by_author(article_length(10 ** 9, expected, info, min_length=3000), info)
+        self.assertEqual(plan.run(store), expected)
+
+    def test_query_plan_without_filters(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+
+        self.assertEqual(QueryPlan('soccer').run(store), keyword_to_titles(metadata)['soccer'])
+        self.assertEqual(QueryPlan('missing').run(store), [])
+        self.assertEqual(QueryPlan().run(store), [article[0] for article in metadata])
+
+    def test_query_plan_orders_filters_by_selectivity(self):
+        metadata = [['t%d' % i, 'x', i, i, ['k']] for i in range(100)]
+        store = ArticleStore.from_metadata(metadata)
+        plan = QueryPlan('k').max_length(89).between(start=90).exclude('missing')
+
+        self.assertEqual([name for name, _ in plan.explain(store)], ['keyword', 'time', 'length', 'exclude'])
+        self.assertEqual(plan.run(store), [])
+
+    def test_query_plan_narrows_repeated_ranges(self):
+        metadata = [['t%d' % i, 'x', i, i, ['k']] for i in range(10)]
+        store = ArticleStore.from_metadata(metadata)
+        plan = QueryPlan('k').min_length(2).max_length(8).min_length(4).max_length(6)
+
+        self.assertEqual(plan.run(store), ['t4', 't5', 't6'])
+
+    def test_query_plan_key_is_normalized(self):
+        a = QueryPlan('music').exclude('rock').exclude('pop').by_author('Mary', ignore_case=True)
+        b = QueryPlan('music').by_author('MARY', ignore_case=True).exclude('pop').exclude('rock').exclude('pop')
+
+        self.assertEqual(a.key(), b.key())
+        self.assertNotEqual(a.key(), QueryPlan('music').key())
+        self.assertNotEqual(QueryPlan('music').by_author('Mary').key(), QueryPlan('music').by_author('MARY').key())
+
+
+    # query cache test
+
+    def test_query_cache_hits_and_misses(self):
+        store = ArticleStore.from_metadata(article_metadata())
+        cache = QueryCache()
+        plan = QueryPlan('music').exclude('rock')
+
+        first = cache.run(plan, store)
+        second = cache.run(QueryPlan('music').exclude('rock'), store)
+
+        self.assertEqual(first, plan.run(store))
+        self.assertIs(second, first)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_query_cache_lru_eviction(self):
+        store = ArticleStore.from_metadata(article_metadata())
+        cache = QueryCache(maxsize=2)
+        for keyword in ['music', 'soccer', 'music', 'jazz', 'soccer']:
+            cache.run(QueryPlan(keyword), store)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()['evictions'], 2)
+        self.assertEqual(cache.hits, 1)
+
+    def test_query_cache_ttl(self):
+        now = [0.0]
+        store = ArticleStore.from_metadata(article_metadata())
+        cache = QueryCache(ttl=10, clock=lambda: now[0])
+        cache.run(QueryPlan('music'), store)
+        now[0] = 5
+        cache.run(QueryPlan('music'), store)
+        now[0] = 20
+        cache.run(QueryPlan('music'), store)
+
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_query_cache_invalidated_by_new_index(self):
+        metadata = article_metadata()
+        cache = QueryCache()
+        cache.run(QueryPlan('music'), ArticleStore.from_metadata(metadata))
+        result = cache.run(QueryPlan('music'), ArticleStore.from_metadata(metadata[:10]))
+
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(result, keyword_to_titles(metadata[:10])['music'])
+        self.assertEqual(len(cache), 1)
+
+
+    # ranking test
+
+    def test_bm25_prefers_rare_keywords_and_short_articles(self):
+        metadata = [
+            ['long common', 'x', 0, 10000, ['the']],
+            ['short common', 'x', 0, 100, ['the']],
+            ['short rare', 'x', 0, 100, ['the', 'jazz']],
+            ['other', 'x', 0, 100, ['rock']]
+        ]
+        store = ArticleStore.from_metadata(metadata)
+
+        self.assertGreater(idf(1, 4), idf(3, 4))
+        self.assertEqual([title for title, _ in ranked_search('the jazz', store, vectorized=False)],
+                         ['short rare', 'short common', 'long common'])
+        self.assertEqual([title for title, _ in ranked_search(['the'], store, k=1)], ['short common'])
+        self.assertEqual(ranked_search('missing', store), [])
+        self.assertEqual(ranked_search('the', store, k=0), [])
+
+    def test_top_k_matches_full_sort(self):
+        store = ArticleStore.from_metadata(article_metadata())
+        query = 'music the and rock'
+        scores = bm25_scores(query, store)
+        expected = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:5]
+
+        self.assertEqual(top_k(query, store, k=5, vectorized=False), expected)
+
+    def test_top_k_with_candidates(self):
+        store = ArticleStore.from_metadata(article_metadata())
+        candidates = QueryPlan('music').max_length(10000).doc_ids(store)
+        results = top_k('music the', store, k=100, candidates=candidates, vectorized=False)
+
+        self.assertEqual(sorted(doc_id for doc_id, _ in results), candidates)
+
+    @skipIf(rank.np is None, 'NumPy is not installed')
+    def test_top_k_vectorized_matches_heap(self):
+        for store in [ArticleStore.from_metadata(article_metadata()), PrebuiltIndex(encode_index(article_metadata()))]:
+            for query in ['music the and rock', 'soccer', 'jazz pop missing']:
+                expected = top_k(query, store, k=7, vectorized=False)
+                results = top_k(query, store, k=7, vectorized=True)
+                self.assertEqual([doc_id for doc_id, _ in results], [doc_id for doc_id, _ in expected])
+                for (_, score), (_, expected_score) in zip(results, expected):
+                    self.assertAlmostEqual(score, expected_score)
+
+    @skipIf(rank.np is None, 'NumPy is not installed')
+    def test_top_k_ties_are_ordered_by_doc_id(self):
+        metadata = [['article %d' % doc_id, 'x', 0, 100, ['x', 'y']] for doc_id in range(300)]
+        store = ArticleStore.from_metadata(metadata)
+        expected = [0, 1, 2, 3, 4, 5, 6]
+
+        self.assertEqual([doc_id for doc_id, _ in top_k('x y', store, 7, vectorized=False)], expected)
+        self.assertEqual([doc_id for doc_id, _ in top_k('x y', store, 7, vectorized=True)], expected)
+
+    # vectorized filter test
+
+    @skipIf(vector.numpy() is None, 'NumPy is not installed')
+    def test_column_arrays_match_filter_functions(self):
+        metadata = article_metadata()
+        info = title_to_info(metadata)
+        keywords = keyword_to_titles(metadata)
+        for index in [ArticleStore.from_metadata(metadata), PrebuiltIndex(encode_index(metadata))]:
+            columns = ColumnArrays(index)
+            everything = index.all_doc_ids()
+            titles = search('music', keywords)
+            music = index.keyword_postings('music')
+            self.assertEqual(index.titles_for(columns.filter_by_length(everything, None, 5000)),
+                             article_length(5000, [article[0] for article in metadata], info))
+            self.assertEqual(index.titles_for(columns.filter_by_length(music, None, 5000)), article_length(5000, titles, info))
+            self.assertEqual(index.titles_for(columns.filter_by_year(music, 2009)), articles_from_year(2009, titles, info))
+            for author, ignore_case in [('jack johnson', False), ('JACK JOHNSON', True), ('nobody', False)]:
+                self.assertEqual(index.titles_for(columns.filter_by_author(music, author, ignore_case)),
+                                 filter_to_author(author, titles, info, ignore_case))
+            self.assertEqual(index.titles_for(columns.filter_out(music, 'rock')), filter_out('rock', titles, keywords))
+            self.assertEqual(columns.year_mask(2009).sum(), len(index.articles_in_year(2009)))
+
+    @skipIf(vector.numpy() is None, 'NumPy is not installed')
+    def test_vectorized_plans_match_scans(self):
+        metadata = article_metadata()
+        for index in [ArticleStore.from_metadata(metadata), ArticleStore.from_metadata(metadata, compressed=True, bitmap_ratio=BITMAP_RATIO),
+                      PrebuiltIndex(encode_index(metadata))]:
+            for plan in [QueryPlan('music').max_length(20000).exclude('rock').exclude('jazz'),
+                         QueryPlan('music').in_year(2009),
+                         QueryPlan().min_length(1000).between(1100000000, None),
+                         QueryPlan('mus*').by_author('jack johnson').max_length(10000),
+                         QueryPlan('missing').max_length(5000)]:
+                self.assertEqual(plan.doc_ids(index, vectorized=True), plan.doc_ids(index, vectorized=False))
+
+    # facet test
+
+    def test_facet_counts_match_filters(self):
+        metadata = article_metadata()
+        info = title_to_info(metadata)
+        titles = search('music', keyword_to_titles(metadata))
+        for index in [ArticleStore.from_metadata(metadata), PrebuiltIndex(encode_index(metadata))]:
+            doc_ids = QueryPlan('music').doc_ids(index)
+            facets = facet_counts(index, doc_ids, examples=2, vectorized=False)
+
+            by_author = key_by_author(titles, info)
+            self.assertEqual({value['value']: value['count'] for value in facets['author']},
+                             {author: len(found) for author, found in by_author.items()})
+            counts = [value['count'] for value in facets['author']]
+            self.assertEqual(counts, sorted(counts, reverse=True))
+            for value in facets['author']:
+                self.assertEqual(value['examples'], by_author[value['value']][:2])
+            for value in facets['year']:
+                self.assertEqual(value['count'], len(articles_from_year(value['value'], titles, info)))
+            self.assertEqual(sum(value['count'] for value in facets['year']), len(titles))
+            self.assertEqual([value['value'] for value in facets['length']],
+                             [label for label in length_bucket_labels() if label in {value['value'] for value in facets['length']}])
+            self.assertEqual(facets['length'][-1], {'value': '100000+', 'count': 3, 'examples': ['Rock music', '2006 in music']})
+
+            folded = facet_counts(index, doc_ids, ignore_case=True)
+            self.assertEqual({value['value']: value['count'] for value in folded['author']},
+                             {author: len(found) for author, found in key_by_author(titles, info, True).items()})
+            self.assertEqual(facet_counts(index, []), {'author': [], 'year': [], 'length': []})
+
+    @skipIf(vector.numpy() is None, 'NumPy is not installed')
+    def test_facet_counts_vectorized(self):
+        store = ArticleStore.from_metadata(article_metadata())
+        for doc_ids in [QueryPlan('music').doc_ids(store), store.all_doc_ids(), []]:
+            for examples, ignore_case in [(0, False), (3, True)]:
+                self.assertEqual(facet_counts(store, doc_ids, examples, ignore_case, vectorized=True),
+                                 facet_counts(store, doc_ids, examples, ignore_case, vectorized=False))
+        status, payload = SearchServer(store).handle('GET', '/search?keyword=music&facets=1&examples=1')
+        self.assertEqual(payload['facets'], facet_counts(store, QueryPlan('music').doc_ids(store), 1))
+
+    # live index test
+
+    def assert_same_results(self, live, metadata):
+        store = ArticleStore.from_metadata(metadata)
+        self.assertEqual({keyword: titles for keyword, titles in live.keyword_to_titles.items() if titles},
+                         dict(store.keyword_to_titles.items()))
+        self.assertEqual(dict(live.title_to_info.items()), dict(store.title_to_info.items()))
+        for plan in [QueryPlan('music').min_length(3000), QueryPlan('soccer').in_year(2009).exclude('team'),
+                     QueryPlan().by_author('jack johnson', ignore_case=True), QueryPlan('music').group_by_author()]:
+            self.assertEqual(plan.run(live), plan.run(store))
+        self.assertEqual(boolean_search('music AND NOT rock', live), boolean_search('music AND NOT rock', store))
+        self.assertAlmostEqual(live.average_length(), store.average_length())
+
+    def test_live_index_add_update_remove(self):
+        metadata = article_metadata()
+        live = LiveIndex.from_metadata(metadata[:-5])
+        for article in metadata[-5:]:
+            live.add_article(article)
+        self.assert_same_results(live, metadata)
+        with self.assertRaises(ValueError):
+            live.add_article(metadata[0])
+
+        removed = [article[0] for article in metadata[10:40]]
+        for title in removed:
+            live.remove_article(title)
+        updated = [metadata[3][0], 'new author', metadata[3][2], 123, ['music', 'fresh']]
+        live.update_article(updated)
+        expected = [article for article in metadata if article[0] not in removed and article[0] != updated[0]]
+        self.assert_same_results(live, expected + [updated])
+        self.assertEqual(search('fresh', live.keyword_to_titles), [updated[0]])
+        self.assertEqual(live.article_count(), len(expected) + 1)
+        with self.assertRaises(KeyError):
+            live.remove_article(removed[0])
+
+    def test_live_index_compaction(self):
+        metadata = article_metadata()
+        live = LiveIndex.from_store(PrebuiltIndex(encode_index(metadata)), compact_ratio=0.1, compact_min=1)
+        for article in metadata[:30]:
+            live.remove_article(article[0])
+        live.add_article(['added', 'someone', 0, 10, ['music']])
+        live.remove_article(metadata[30][0])
+        live.compact()
+
+        self.assertEqual(live.deleted, set())
+        self.assertEqual(len(live), live.article_count())
+        self.assert_same_results(live, metadata[31:] + [['added', 'someone', 0, 10, ['music']]])
+
+    def test_live_index_invalidates_cache(self):
+        live = LiveIndex.from_metadata(article_metadata())
+        cache = QueryCache()
+        before = cache.run(QueryPlan('music'), live)
+        live.remove_article(before[0])
+
+        self.assertEqual(cache.run(QueryPlan('music'), live), before[1:])
+        self.assertEqual(cache.misses, 2)
+
+    # sharded index test
+
+    def test_sharded_index_matches_single_store(self):
+        metadata = article_metadata()
+        store = ArticleStore.from_metadata(metadata)
+        plans = [QueryPlan('music'), QueryPlan('music').max_length(20000).exclude('rock').in_year(2009),
+                 QueryPlan().by_author('jack johnson', ignore_case=True), QueryPlan('music').group_by_author(),
+                 QueryPlan('soccer').group_by_author(ignore_case=True), QueryPlan('missing')]
+
+        with ShardedIndex(metadata, partitions=3) as sharded:
+            self.assertEqual(len(sharded), 3)
+            self.assertEqual(sharded.article_count(), len(metadata))
+            for plan in plans:
+                self.assertEqual(sharded.run(plan), plan.run(store))
+            self.assertEqual(sharded.search('soccer'), keyword_to_titles(metadata)['soccer'])
+            self.assertEqual(sharded.boolean_search('music AND NOT (rock OR pop)'),
+                             boolean_search('music AND NOT (rock OR pop)', store))
+            with self.assertRaises(QuerySyntaxError):
+                sharded.boolean_search('music AND')
+
+            for query, plan in [('music the and rock', None), ('soccer team', QueryPlan().max_length(10000))]:
+                candidates = plan.doc_ids(store) if plan is not None else None
+                expected = top_k(query, store, k=7, candidates=candidates, vectorized=False)
+                results = sharded.top_k(query, k=7, plan=plan)
+                self.assertEqual([doc_id for doc_id, _, _ in results], [doc_id for doc_id, _ in expected])
+                for (_, score, _), (_, expected_score) in zip(results, expected):
+                    self.assertAlmostEqual(score, expected_score)
+
+    def test_sharded_top_k_orders_ties_like_single_store(self):
+        metadata = [['article %d' % doc_id, 'x', 0, 100, ['x', 'y']] for doc_id in range(900)]
+        store = ArticleStore.from_metadata(metadata)
+        expected = [doc_id for doc_id, _ in top_k('x y', store, k=7, vectorized=False)]
+
+        with ShardedIndex(metadata, partitions=3) as sharded:
+            self.assertEqual([doc_id for doc_id, _, _ in sharded.top_k('x y', k=7)], expected)
+            self.assertEqual(expected, list(range(7)))
+
+    # server test
+
+    def test_server_handle(self):
+        store = ArticleStore.from_metadata(article_metadata())
+        server = SearchServer(store)
+        plan = QueryPlan('music').max_length(20000).exclude('rock').exclude('pop').in_year(2009)
+
+        status, payload = server.handle('GET', '/search?keyword=music&max_length=20000&exclude=rock&exclude=pop&year=2009')
+        self.assertEqual((status, payload), (200, {'results': plan.run(store)}))
+        status, payload = server.handle('POST', '/search', json.dumps(
+            {'keyword': 'music', 'max_length': 20000, 'exclude': ['rock', 'pop'], 'year': 2009}).encode())
+        self.assertEqual(payload, {'results': plan.run(store)})
+        status, payload = server.handle('GET', '/search?keyword=music&group_by_author=1')
+        self.assertEqual(payload['results'], QueryPlan('music').group_by_author().run(store))
+
+        status, payload = server.handle('GET', '/ranked?q=music+rock&k=3')
+        self.assertEqual([result['title'] for result in payload['results']],
+                         [title for title, _ in ranked_search('music rock', store, 3)])
+        status, payload = server.handle('GET', '/boolean?q=music+AND+NOT+rock')
+        self.assertEqual(payload['results'], boolean_search('music AND NOT rock', store))
+
+        self.assertEqual(server.handle('GET', '/search?max_length=long')[0], 400)
+        self.assertEqual(server.handle('GET', '/boolean?q=music+AND')[0], 400)
+        self.assertEqual(server.handle('POST', '/search', b'[1]')[0], 400)
+        self.assertEqual(server.handle('GET', '/missing')[0], 404)
+        self.assertEqual(server.handle('DELETE', '/search')[0], 405)
+
+    def test_server_rejects_out_of_range_values(self):
+        server = SearchServer(ArticleStore.from_metadata(article_metadata()))
+
+        for target in ['/search?keyword=music&year=0', '/search?keyword=music&year=99999999999',
+                       '/search?keyword=music&start=-99999999999999999999', '/search?keyword=music&max_length=1.5',
+                       '/boolean?q=' + '(' * 5000 + 'music' + ')' * 5000, '/boolean?q=' + 'NOT+' * 5000 + 'music']:
+            self.assertEqual(server.handle('GET', target)[0], 400)
+        for body in [{'max_length': 1e400}, {'max_length': 1.5}, {'min_length': True}, {'year': 10000}]:
+            self.assertEqual(server.handle('POST', '/search', json.dumps(body).encode())[0], 400)
+
+        self.assertEqual(server.handle('GET', '/search?keyword=music&year=9999'), (200, {'results': []}))
+        self.assertEqual(server.handle('GET', '/search?keyword=music&year=1'), (200, {'results': []}))
+        self.assertEqual(server.handle('POST', '/search', b'{"keyword": "music", "max_length": 20000.0}')[1],
+                         {'results': QueryPlan('music').max_length(20000).run(server.index)})
+        self.assertEqual(server.handle('GET', '/boolean?q=' + '(' * 50 + 'music' + ')' * 50)[1],
+                         {'results': boolean_search('music', server.index)})
+
+    @patch('traceback.print_exc')
+    def test_server_answers_500_and_keeps_the_connection(self, print_exc):
+        store = ArticleStore.from_metadata(article_metadata())
+        server = SearchServer(store)
+        server.ROUTES = dict(SearchServer.ROUTES, **{'/broken': lambda self, params: 1 / 0})
+        self.assertEqual(server.handle('GET', '/broken')[0], 500)
+
+        async def exchange():
+            listener = await server.serve('127.0.0.1', 0)
+            async with listener:
+                port = listener.sockets[0].getsockname()[1]
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(b'GET /broken HTTP/1.1\r\n\r\n'
+                             b'GET /search?keyword=music&year=0 HTTP/1.1\r\n\r\n'
+                             b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n')
+                await writer.drain()
+                data = await reader.read()
+                writer.close()
+                return data
+
+        responses = asyncio.run(exchange()).split(b'HTTP/1.1 ')[1:]
+        self.assertEqual([response[:3] for response in responses], [b'500', b'400', b'200'])
+        self.assertEqual(json.loads(responses[2].split(b'\r\n\r\n', 1)[1]), {'articles': len(store)})
+
+    def test_server_keep_alive_and_pipelining(self):
+        store = ArticleStore.from_metadata(article_metadata())
+
+        async def exchange():
+            server = await SearchServer(store).serve('127.0.0.1', 0)
+            async with server:
+                port = server.sockets[0].getsockname()[1]
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                body = b'{"keyword": "soccer"}'
+                writer.write(b'GET /search?keyword=music HTTP/1.1\r\nHost: x\r\n\r\n'
+                             b'POST /search HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s'
+                             b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n' % (len(body), body))
+                await writer.drain()
+                data = await reader.read()
+                writer.close()
+                return data
+
+        responses = asyncio.run(exchange()).split(b'HTTP/1.1 ')[1:]
+        self.assertEqual(len(responses), 3)
+        self.assertIn(b'Connection: keep-alive', responses[0])
+        self.assertIn(b'Connection: close', responses[2])
+        payloads = [json.loads(response.split(b'\r\n\r\n', 1)[1]) for response in responses]
+        self.assertEqual(payloads, [{'results': QueryPlan('music').run(store)},
+                                    {'results': QueryPlan('soccer').run(store)},
+                                    {'articles': len(store)}])
+
     #####################
     # INTEGRATION TESTS #
     #####################
@@ -387,6 +1504,16 @@ class TestSearch(TestCase):
 
         self.assertEqual(output, expected)
     
+    @patch('builtins.input')
+    def test_misspelled_keyword_integration_test(self, input_mock):
+        keyword = 'socer'
+        advanced_option = 6
+
+        output = get_print(input_mock, [keyword, advanced_option])
+        expected = print_basic() + keyword + '\n' + print_advanced() + str(advanced_option) + '\n' + print_advanced_option(advanced_option) + "\nNo articles contain 'socer', showing similar keywords instead\nHere are your articles: ['Spain national beach soccer team', 'Will Johnson (soccer)', 'Steven Cohen (soccer)']\n"
+
+        self.assertEqual(output, expected)
+
     @patch('builtins.input')
     def test_search_integration_test(self, input_mock):
         keyword = 'radio'
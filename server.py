@@ -0,0 +1,413 @@
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from cache import QueryCache
+from facets import facet_counts
+from fuzzy import MAX_EDIT_DISTANCE
+from index_file import load_index
+from instrument import METRICS, tracing
+from plan import QueryPlan, StopwordError
+from query import QuerySyntaxError, boolean_search
+from rank import ranked_search
+from terms import suggest as suggest_keywords
+
+# Long-running HTTP/JSON front end: the index is loaded once and every request
+# is answered from it, instead of display_result() rebuilding it per query.
+#
+#   GET  /search?keyword=music&max_length=5000&exclude=rock&year=2009
+#   GET  /search?keyword=muisc&fuzzy=2
+#   GET  /search?keyword=music&facets=1&examples=3
+#   POST /search   {"keyword": "music", "author": "jack johnson", "group_by_author": true}
+#   GET  /ranked?q=music+rock&k=10
+#   GET  /boolean?q=music+AND+NOT+rock
+#   GET  /suggest?prefix=mus&k=5
+#   GET  /health
+#   GET  /metrics
+#
+# Adding trace=1 to a request returns the timings and counters of each step
+# of the query with the results (see instrument.py). A server started with
+# trace=True traces every request; /metrics serves the totals over traced
+# requests as Prometheus text.
+#
+# /search accepts every advanced option of display_result() at once (see
+# plan_from_params); with facets=1 it also returns the counts of the results
+# by author, year and length bucket (see facets.py). Connections are HTTP/1.1
+# keep-alive: requests on one connection are answered in order, so a client
+# may pipeline several requests without waiting for each response.
+#
+# serve_workers() (python server.py HOST PORT WORKERS) forks several worker
+# processes after mapping the index file once, so they all share one copy of
+# the index.
+
+HOST = "127.0.0.1"
+PORT = 8080
+KEEPALIVE_TIMEOUT = 30
+MAX_BODY = 1 << 20
+MAX_RANKED = 1000
+
+# Lengths and timestamps are 64-bit columns; years are what calendar handles.
+MAX_INTEGER = 2 ** 63 - 1
+MIN_YEAR = 1
+MAX_YEAR = 9999
+
+
+class BadRequest(ValueError):
+    """
+    Raised for a request whose parameters cannot be understood.
+    """
+
+
+def _values(params, name):
+    """
+    Returns the list of values given for a parameter: parse_qs() already
+    gives lists, JSON bodies may give a single value or a list.
+    """
+    value = params.get(name)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _one(params, name, convert=str):
+    values = _values(params, name)
+    if not values:
+        return None
+    try:
+        return convert(values[-1])
+    except (TypeError, ValueError, OverflowError):
+        raise BadRequest("invalid %s: %r" % (name, values[-1]))
+
+
+def _integer(value):
+    """
+    Converts a query string or JSON value to an int that fits the 64-bit
+    columns. Raises ValueError for fractions, infinities, booleans and
+    anything out of range.
+    """
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+    number = int(value)
+    if not -MAX_INTEGER <= number <= MAX_INTEGER:
+        raise ValueError(value)
+    return number
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in ("1", "true", "yes", "on", ""):
+        return True
+    if str(value).lower() in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(value)
+
+
+def plan_from_params(params):
+    """
+    Arguments:
+    - params: Dictionary of query parameters (values may be lists) with any of
+              keyword, fuzzy (maximum edit distance), min_length,
+              max_length, start, end, year, author, ignore_case, exclude
+              (repeatable), group_by_author.
+
+    Returns:
+    - QueryPlan combining all of them. Raises BadRequest for bad values.
+    """
+    plan = QueryPlan(_one(params, "keyword"))
+    max_distance = _one(params, "fuzzy", _integer)
+    if max_distance is not None:
+        if not 0 <= max_distance <= MAX_EDIT_DISTANCE:
+            raise BadRequest("fuzzy must be between 0 and %d" % MAX_EDIT_DISTANCE)
+        plan.fuzzy(max_distance)
+    min_length = _one(params, "min_length", _integer)
+    if min_length is not None:
+        plan.min_length(min_length)
+    max_length = _one(params, "max_length", _integer)
+    if max_length is not None:
+        plan.max_length(max_length)
+    start, end = _one(params, "start", _integer), _one(params, "end", _integer)
+    if start is not None or end is not None:
+        plan.between(start, end)
+    year = _one(params, "year", _integer)
+    if year is not None:
+        if not MIN_YEAR <= year <= MAX_YEAR:
+            raise BadRequest("year must be between %d and %d" % (MIN_YEAR, MAX_YEAR))
+        plan.in_year(year)
+    ignore_case = bool(_one(params, "ignore_case", _flag))
+    author = _one(params, "author")
+    if author is not None:
+        plan.by_author(author, ignore_case)
+    for keyword in _values(params, "exclude"):
+        plan.exclude(str(keyword))
+    if _one(params, "group_by_author", _flag):
+        plan.group_by_author(ignore_case)
+    return plan
+
+
+class SearchServer:
+    """
+    Answers search requests against one index. handle() maps a parsed
+    request to a (status, JSON payload) pair; serve() runs it over HTTP.
+    """
+
+    def __init__(self, index=None, cache=None, trace=False, metrics=METRICS):
+        """
+        Arguments:
+        - index: ArticleStore to serve. Defaults to index_file.load_index().
+        - cache: QueryCache for /search results, or None for a new one.
+        - trace: Whether to trace every request, not only those asking for it.
+        - metrics: instrument.Metrics collecting traced requests.
+        """
+        self.index = index if index is not None else load_index()
+        self.cache = cache if cache is not None else QueryCache()
+        self.trace = trace
+        self.metrics = metrics
+
+    def handle(self, method, target, body=b""):
+        """
+        Arguments:
+        - method: HTTP method.
+        - target: Request target, path plus query string.
+        - body: Request body; a JSON object of parameters for POST.
+
+        Returns:
+        - (HTTP status, JSON-serializable payload), or a string payload for
+          /metrics.
+        """
+        url = urlsplit(target)
+        params = parse_qs(url.query, keep_blank_values=True)
+        if method == "POST":
+            try:
+                body = json.loads(body or b"{}")
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, {"error": "body is not valid JSON"}
+            if not isinstance(body, dict):
+                return HTTPStatus.BAD_REQUEST, {"error": "body must be a JSON object"}
+            params.update(body)
+        elif method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use GET or POST"}
+
+        route = self.ROUTES.get(url.path)
+        if route is None:
+            return HTTPStatus.NOT_FOUND, {"error": "no such endpoint: %s" % url.path}
+        try:
+            show_trace = _one(params, "trace", _flag)
+            if not (self.trace or show_trace):
+                return HTTPStatus.OK, route(self, params)
+            with tracing(url.path.strip("/"), metrics=self.metrics) as trace:
+                payload = route(self, params)
+            if show_trace and isinstance(payload, dict):
+                payload["trace"] = trace.to_dict()
+            return HTTPStatus.OK, payload
+        except (BadRequest, QuerySyntaxError, StopwordError) as error:
+            return HTTPStatus.BAD_REQUEST, {"error": str(error)}
+        except Exception:
+            # A bug must not drop the connection and the requests pipelined
+            # behind this one: answer 500 and keep serving
+            traceback.print_exc()
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}
+
+    def search(self, params):
+        plan = plan_from_params(params)
+        payload = {"results": self.cache.run(plan, self.index)}
+        if _one(params, "facets", _flag):
+            examples = min(_one(params, "examples", _integer) or 0, MAX_RANKED)
+            payload["facets"] = facet_counts(self.index, plan.doc_ids(self.index), max(examples, 0),
+                                             bool(_one(params, "ignore_case", _flag)))
+        return payload
+
+    def ranked(self, params):
+        query = _one(params, "q")
+        if not query:
+            raise BadRequest("missing q")
+        k = _one(params, "k", _integer)
+        k = 10 if k is None else min(k, MAX_RANKED)
+        candidates = None
+        if any(name not in ("q", "k", "trace") for name in params):
+            candidates = plan_from_params(params).doc_ids(self.index)
+        results = ranked_search(query, self.index, k, candidates)
+        return {"results": [{"title": title, "score": score} for title, score in results]}
+
+    def boolean(self, params):
+        query = _one(params, "q")
+        if query is None:
+            raise BadRequest("missing q")
+        return {"results": boolean_search(query, self.index)}
+
+    def suggest(self, params):
+        prefix = _one(params, "prefix")
+        if prefix is None:
+            raise BadRequest("missing prefix")
+        k = _one(params, "k", _integer)
+        return {"suggestions": suggest_keywords(prefix, self.index, 10 if k is None else min(k, MAX_RANKED))}
+
+    def health(self, params):
+        return {"articles": self.index.article_count()}
+
+    def metrics_text(self, params):
+        return self.metrics.render()
+
+    ROUTES = {
+        "/search": search,
+        "/ranked": ranked,
+        "/boolean": boolean,
+        "/suggest": suggest,
+        "/health": health,
+        "/metrics": metrics_text,
+    }
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves requests from one connection until the client closes it, asks
+        for it to be closed, or stays idle for KEEPALIVE_TIMEOUT seconds.
+        """
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                        {"error": "request head too large"}, False)
+                    break
+
+                try:
+                    method, target, version, headers = _parse_head(head)
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "malformed request"}, False)
+                    break
+                if length > MAX_BODY:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"}, False)
+                    break
+                try:
+                    body = await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                status, payload = self.handle(method, target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode(), "application/json"
+        writer.write(("HTTP/1.1 %d %s\r\n"
+                      "Content-Type: %s\r\n"
+                      "Content-Length: %d\r\n"
+                      "Connection: %s\r\n\r\n" % (status, status.phrase, content_type, len(body),
+                                                  "keep-alive" if keep_alive else "close")).encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host=HOST, port=PORT, sock=None):
+        """
+        Returns a started asyncio server; call serve_forever() on it or use
+        it as an async context manager. With sock, accepts connections on
+        that listening socket instead of binding host and port.
+        """
+        if sock is not None:
+            return await asyncio.start_server(self.handle_connection, sock=sock)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+def _parse_head(head):
+    """
+    Returns (method, target, version, headers) from the bytes of a request
+    line and headers. Header names are lower-cased. Raises ValueError if the
+    request is malformed.
+    """
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, version = lines[0].split(" ")
+    if not version.startswith("HTTP/1."):
+        raise ValueError(version)
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+async def _serve_socket(server, sock):
+    async with await server.serve(sock=sock) as listener:
+        await listener.serve_forever()
+
+
+def serve_workers(workers, host=HOST, port=PORT, index=None):
+    """
+    Arguments:
+    - workers: Number of worker processes.
+    - host, port: Address to listen on.
+    - index: Index to serve. Defaults to index_file.load_index().
+
+    Opens the index and the listening socket once, then forks the workers,
+    which all accept connections on that socket. The index file's mapping
+    is inherited, so the workers share one copy of the index; each keeps
+    its own QueryCache. Returns when every worker has exited.
+    """
+    if index is None:
+        index = load_index()
+    sock = socket.create_server((host, port))
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                asyncio.run(_serve_socket(SearchServer(index), sock))
+            except KeyboardInterrupt:
+                pass
+            except BaseException:
+                status = 1
+            finally:
+                os._exit(status)
+        children.append(pid)
+    sock.close()
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            os.waitpid(pid, 0)
+
+
+async def main(host=HOST, port=PORT):
+    server = await SearchServer().serve(host, port)
+    print("Serving on http://%s:%d" % (host, port))
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    # python server.py [host] [port] [workers]
+    if len(sys.argv) > 3 and int(sys.argv[3]) > 1:
+        print("Serving on http://%s:%s with %s workers" % tuple(sys.argv[1:4]))
+        serve_workers(int(sys.argv[3]), sys.argv[1], int(sys.argv[2]))
+    else:
+        asyncio.run(main(*sys.argv[1:2], *map(int, sys.argv[2:3])))
@@ -0,0 +1,223 @@
+import heapq
+import multiprocessing
+import threading
+
+from parallel import DEFAULT_SHARD_SIZE, shards
+from plan import QueryPlan
+from query import boolean_search
+from rank import corpus_stats, top_k
+from store import ArticleStore
+
+# Partitioned index: the corpus is split by doc id into consecutive shards and
+# each shard is indexed and queried by its own worker process, standing in for
+# one node of a cluster. The coordinator (ShardedIndex) scatters every query to
+# all shards and gathers the answers:
+#
+# - Filtered searches (QueryPlan) and boolean queries only look at one article
+#   at a time, so each shard answers for its own articles and the results are
+#   concatenated in shard order, which is doc id order.
+# - Ranked searches need corpus-wide BM25 statistics. The coordinator first
+#   collects article counts, total lengths and document frequencies from every
+#   shard, then sends their sum back with the query so each shard scores
+#   exactly as a single index would; the per-shard top k are merged into the
+#   overall top k.
+#
+# Results match those of one ArticleStore built from the whole metadata.
+
+
+def _serve(connection, metadata, start):
+    """
+    Worker process loop: indexes one shard, then answers (method, arguments)
+    requests with (True, result) or (False, exception) until it receives None.
+    """
+    store = ArticleStore.from_metadata(metadata)
+    del metadata
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        method, arguments = request
+        try:
+            result = _METHODS[method](store, start, *arguments)
+        except Exception as error:
+            connection.send((False, error))
+        else:
+            connection.send((True, result))
+    connection.close()
+
+
+def _run(store, start, plan):
+    return plan.run(store)
+
+
+def _boolean_search(store, start, query):
+    return boolean_search(query, store)
+
+
+def _corpus_stats(store, start, query):
+    return corpus_stats(query, store)
+
+
+def _top_k(store, start, query, k, plan, stats):
+    candidates = plan.doc_ids(store) if plan is not None else None
+    titles = store.titles
+    return [(start + doc_id, score, titles[doc_id])
+            for doc_id, score in top_k(query, store, k, candidates, stats=stats)]
+
+
+def _article_count(store, start):
+    return store.article_count()
+
+
+_METHODS = {
+    "run": _run,
+    "boolean_search": _boolean_search,
+    "corpus_stats": _corpus_stats,
+    "top_k": _top_k,
+    "article_count": _article_count,
+}
+
+
+class ShardedIndex:
+    """
+    Coordinator for an index partitioned across local worker processes.
+    Use as a context manager, or call close() to stop the workers.
+    """
+
+    def __init__(self, metadata, partitions=4, shard_size=None):
+        """
+        Arguments:
+        - metadata: 2D list of article metadata, or an iterator yielding it.
+        - partitions: Number of shards a metadata list is split into.
+        - shard_size: Articles per shard. Defaults to splitting a list into
+                      partitions shards, or DEFAULT_SHARD_SIZE for iterators.
+        """
+        if shard_size is None:
+            if isinstance(metadata, list):
+                shard_size = max(1, -(-len(metadata) // partitions))
+            else:
+                shard_size = DEFAULT_SHARD_SIZE
+
+        self._lock = threading.Lock()
+        self._workers = []
+        start = 0
+        try:
+            for shard in shards(metadata, shard_size):
+                connection, child = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_serve, args=(child, shard, start), daemon=True)
+                process.start()
+                child.close()
+                self._workers.append((process, connection))
+                start += len(shard)
+        except BaseException:
+            self.close()
+            raise
+
+    def __len__(self):
+        return len(self._workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        with self._lock:
+            for process, connection in self._workers:
+                try:
+                    connection.send(None)
+                except OSError:
+                    pass
+                connection.close()
+            for process, _ in self._workers:
+                process.join()
+            self._workers = []
+
+    def _scatter(self, method, *arguments):
+        """
+        Sends one request to every shard and returns their results in shard
+        order. All shards work on it at once; if any fails, its exception is
+        raised once every shard has answered.
+        """
+        with self._lock:
+            for _, connection in self._workers:
+                connection.send((method, arguments))
+            replies = [connection.recv() for _, connection in self._workers]
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
+
+    def article_count(self):
+        """
+        Returns the number of articles across all shards.
+        """
+        return sum(self._scatter("article_count"))
+
+    def run(self, plan):
+        """
+        Returns plan.run() over the whole corpus: a list of titles, or a
+        dictionary mapping author to titles if the plan groups by author.
+        """
+        results = self._scatter("run", plan)
+        if not plan.grouped:
+            return [title for titles in results for title in titles]
+
+        names = {}
+        merged = {}
+        for groups in results:
+            for author, titles in groups.items():
+                name = names.setdefault(author.casefold() if plan.group_ignore_case else author, author)
+                if name in merged:
+                    merged[name].extend(titles)
+                else:
+                    merged[name] = titles
+        return merged
+
+    def search(self, keyword):
+        """
+        Returns the titles of articles containing keyword.
+        """
+        return self.run(QueryPlan(keyword))
+
+    def boolean_search(self, query):
+        """
+        Returns the titles matching a boolean query (see query.py).
+        """
+        return [title for titles in self._scatter("boolean_search", query) for title in titles]
+
+    def top_k(self, query, k=10, plan=None):
+        """
+        Arguments:
+        - query: Keywords as a list or a whitespace-separated string.
+        - k: Number of results to return.
+        - plan: Optional QueryPlan; only articles it matches are ranked.
+
+        Returns:
+        - Up to k (doc id, score, title) triples, best first, as
+          rank.top_k() would rank them over one index of the whole corpus.
+        """
+        if k <= 0:
+            return []
+        n = 0
+        total_length = 0
+        dfs = {}
+        for shard_n, shard_length, shard_dfs in self._scatter("corpus_stats", query):
+            n += shard_n
+            total_length += shard_length
+            for term, df in shard_dfs.items():
+                dfs[term] = dfs.get(term, 0) + df
+
+        results = self._scatter("top_k", query, k, plan, (n, total_length, dfs))
+        return heapq.nlargest(k, (result for shard in results for result in shard),
+                              key=lambda result: (result[1], -result[0]))
+
+    def ranked_search(self, query, k=10, plan=None):
+        """
+        Returns up to k (title, score) pairs, most relevant first.
+        """
+        return [(title, score) for _, score, title in self.top_k(query, k, plan)]
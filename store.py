@@ -0,0 +1,592 @@
+import calendar
+import itertools
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from datetime import MAXYEAR
+
+from compressed import BitmapPostings, compress, encode_bitmap
+from parallel import map_shards
+from postings import intersect
+from terms import TermDictionary
+
+# Columnar article store.
+#
+# Every article gets an integer doc id: its position in the metadata list.
+# Article fields live in parallel columns indexed by doc id instead of one
+# dictionary per article, authors are stored once and referenced by id, and
+# posting lists hold doc ids rather than repeating title strings.
+#
+# The same class serves an index built in memory (columns are arrays, lookups
+# are dicts) and one read from an index file (columns are memoryviews into the
+# mapped file, lookups binary-search sorted tables); see index_file.py.
+
+# Source of ArticleStore.version values.
+_versions = itertools.count(1)
+
+# Keywords that say nothing about an article. Stores built with
+# stopwords=STOPWORDS leave them out of the postings, and boolean queries skip
+# them (see query.evaluate()).
+STOPWORDS = frozenset([
+    "a", "about", "after", "all", "also", "an", "and", "are", "as", "at", "be", "been", "but", "by",
+    "can", "for", "from", "had", "has", "have", "his", "her", "in", "into", "is", "it", "its", "may",
+    "more", "not", "of", "on", "one", "or", "other", "some", "such", "that", "the", "their", "they",
+    "this", "to", "was", "were", "which", "with",
+])
+
+
+class ArticleStore:
+    """
+    Articles addressed by doc id.
+
+    Columns (all indexed by doc id except authors):
+    - titles: Sequence of article titles.
+    - authors: Sequence of distinct author names, indexed by author id.
+    - author_ids: Author id of each article.
+    - timestamps: Timestamp of each article.
+    - lengths: Length of each article in characters.
+
+    Lookups:
+    - title_ids: Mapping from title to doc id.
+    - postings: Mapping from keyword to the sorted doc ids containing it.
+    - by_timestamp: SortedColumn over timestamps. Built from the timestamps
+                    column when not given.
+    - by_length: SortedColumn over lengths. Built from the lengths column
+                 when not given.
+    - author_postings: Mapping from author name to the sorted doc ids of
+                       their articles.
+    - folded_author_postings: The same keyed by case-folded author name, for
+                              case-insensitive author queries.
+    Author postings are built from the columns when not given.
+
+    stopwords is the set of keywords deliberately left out of the postings.
+
+    version identifies the store's contents: it differs between any two
+    stores, so results cached for one are never served for another.
+    """
+
+    def __init__(self, titles, authors, author_ids, timestamps, lengths, title_ids, postings,
+                 by_timestamp=None, by_length=None, author_postings=None, folded_author_postings=None,
+                 stopwords=()):
+        self.titles = titles
+        self.authors = authors
+        self.author_ids = author_ids
+        self.timestamps = timestamps
+        self.lengths = lengths
+        self.title_ids = title_ids
+        self.postings = postings
+        self.by_timestamp = by_timestamp if by_timestamp is not None else SortedColumn.from_column(timestamps, "q")
+        self.by_length = by_length if by_length is not None else SortedColumn.from_column(lengths, "q")
+        if author_postings is None or folded_author_postings is None:
+            author_postings, folded_author_postings = _author_postings(authors, author_ids)
+        self.author_postings = author_postings
+        self.folded_author_postings = folded_author_postings
+        self.stopwords = frozenset(stopwords)
+        self._average_length = None
+        self._terms = None
+        self._facets = None
+        self.version = next(_versions)
+        self.keyword_to_titles = KeywordToTitles(self)
+        self.title_to_info = TitleToInfo(self)
+
+    @classmethod
+    def from_metadata(cls, metadata, workers=1, shard_size=None, compressed=False, stopwords=None,
+                      bitmap_ratio=None):
+        """
+        Arguments:
+        - metadata: 2D list of article metadata containing
+                    [title, author, timestamp, article length, keywords]
+                    for each article, or any iterable yielding them, such as
+                    wiki.iter_metadata(). It is read once and no record is
+                    kept after it has been indexed.
+        - workers: Number of processes to build with. Above 1, the metadata
+                   is split into shards that are indexed in parallel and
+                   merged in order, giving the same store as workers=1.
+        - shard_size: Articles per shard when workers > 1 (see
+                      parallel.map_shards).
+        - compressed: Keep keyword posting lists block-compressed (see
+                      compressed.py) instead of as arrays.
+        - stopwords: Keywords to leave out of the index, e.g. STOPWORDS.
+        - bitmap_ratio: Store keywords found in at least this share of all
+                        articles as bitmaps (e.g. compressed.BITMAP_RATIO).
+
+        Returns:
+        - ArticleStore holding the metadata in array columns. A keyword listed
+          twice for the same article is only posted once.
+        """
+        if workers > 1:
+            titles, authors, author_ids, timestamps, lengths, title_ids, postings = _merge_shards(
+                map_shards(_shard_columns, metadata, workers, shard_size, pass_start=True))
+        else:
+            titles, authors, author_ids, timestamps, lengths, postings = _shard_columns(metadata)
+            title_ids = dict(zip(titles, range(len(titles))))
+        postings = _finish_postings(postings, len(titles), compressed, stopwords, bitmap_ratio)
+        return cls(titles, authors, author_ids, timestamps, lengths, title_ids, postings, stopwords=stopwords or ())
+
+    def __len__(self):
+        return len(self.titles)
+
+    def all_doc_ids(self):
+        """
+        Returns the doc ids of every article, in order.
+        """
+        return range(len(self))
+
+    def article_count(self):
+        """
+        Returns the number of articles. Same as len() here; stores that
+        leave gaps in their doc ids (see live.py) count only real articles.
+        """
+        return len(self)
+
+    def doc_id(self, title):
+        """
+        Returns the doc id of the article with this title, or -1.
+        """
+        return self.title_ids.get(title, -1)
+
+    def keyword_postings(self, keyword):
+        """
+        Returns the sorted doc ids of articles containing keyword (empty if
+        the keyword is not indexed).
+        """
+        return self.postings.get(keyword, ())
+
+    def term_dictionary(self):
+        """
+        Returns a TermDictionary of the indexed keywords, built on first use
+        and again after the store's contents change.
+        """
+        if self._terms is None or self._terms[0] != self.version:
+            keyword_postings = self.keyword_postings
+            self._terms = (self.version, TermDictionary(sorted(self.postings),
+                                                        frequencies=lambda term: len(keyword_postings(term))))
+        return self._terms[1]
+
+    def facet_columns(self):
+        """
+        Returns the facets.FacetColumns of this store, computed on first use
+        and again after the store changes.
+        """
+        # Imported here: facets.py builds on vector.py, which imports this module
+        from facets import FacetColumns
+
+        if self._facets is None or self._facets[0] != self.version:
+            self._facets = (self.version, FacetColumns.from_store(self))
+        return self._facets[1]
+
+    def average_length(self):
+        """
+        Returns the mean article length (1 for an empty store), computed
+        once and cached.
+        """
+        if self._average_length is None:
+            self._average_length = sum(self.lengths) / len(self.lengths) if len(self.lengths) else 1
+        return self._average_length
+
+    def author(self, doc_id):
+        """
+        Returns the author name of one article.
+        """
+        return self.authors[self.author_ids[doc_id]]
+
+    def info(self, doc_id):
+        """
+        Returns the title_to_info style dictionary for one article.
+        """
+        return {
+            "author": self.author(doc_id),
+            "timestamp": self.timestamps[doc_id],
+            "length": self.lengths[doc_id],
+        }
+
+    def articles_between(self, start=None, end=None):
+        """
+        Arguments:
+        - start: First timestamp to include, or None for no lower bound.
+        - end: First timestamp to exclude, or None for no upper bound.
+
+        Returns:
+        - Sorted doc ids of articles with start <= timestamp < end.
+        """
+        return self.by_timestamp.between(start, end)
+
+    def articles_in_year(self, year):
+        """
+        Returns sorted doc ids of articles published during a UTC year.
+        """
+        return self.articles_between(*year_range(year))
+
+    def articles_in_month(self, year, month):
+        """
+        Returns sorted doc ids of articles published during a UTC month.
+        """
+        return self.articles_between(*month_range(year, month))
+
+    def filter_by_time(self, doc_ids, start=None, end=None):
+        """
+        Arguments:
+        - doc_ids: Sorted doc ids, e.g. a keyword's posting list.
+        - start: First timestamp to include, or None for no lower bound.
+        - end: First timestamp to exclude, or None for no upper bound.
+
+        Returns:
+        - The doc ids from doc_ids with start <= timestamp < end.
+        """
+        return _restrict(doc_ids, self.by_timestamp, self.timestamps, start, end)
+
+    def articles_with_length(self, min_length=None, max_length=None):
+        """
+        Arguments:
+        - min_length: Shortest length to include, or None for no minimum.
+        - max_length: Longest length to include, or None for no maximum.
+
+        Returns:
+        - Sorted doc ids of articles with min_length <= length <= max_length.
+        """
+        return self.by_length.between(min_length, _after(max_length))
+
+    def filter_by_length(self, doc_ids, min_length=None, max_length=None):
+        """
+        Arguments:
+        - doc_ids: Sorted doc ids, e.g. a keyword's posting list.
+        - min_length: Shortest length to include, or None for no minimum.
+        - max_length: Longest length to include, or None for no maximum.
+
+        Returns:
+        - The doc ids from doc_ids with min_length <= length <= max_length.
+        """
+        return _restrict(doc_ids, self.by_length, self.lengths, min_length, _after(max_length))
+
+    def author_doc_ids(self, author, ignore_case=False):
+        """
+        Returns the sorted doc ids of articles by author. With ignore_case,
+        names are compared after case folding.
+        """
+        if ignore_case:
+            return self.folded_author_postings.get(author.casefold(), ())
+        return self.author_postings.get(author, ())
+
+    def filter_by_author(self, doc_ids, author, ignore_case=False):
+        """
+        Arguments:
+        - doc_ids: Sorted doc ids, e.g. a keyword's posting list.
+        - author: Author name to filter to.
+        - ignore_case: Match author names case-insensitively.
+
+        Returns:
+        - The doc ids from doc_ids written by author: an intersection with the
+          author's posting list, not a lookup per article.
+        """
+        return intersect(doc_ids, self.author_doc_ids(author, ignore_case))
+
+    def group_by_author(self, doc_ids, ignore_case=False):
+        """
+        Arguments:
+        - doc_ids: Doc ids, e.g. a keyword's posting list.
+        - ignore_case: Put authors whose names differ only in case in one
+                       group, keyed by the first spelling seen.
+
+        Returns:
+        - Dictionary mapping author name to the list of their doc ids, in
+          order of each author's first article. Articles are grouped by
+          integer author id, so each distinct author's name is looked up
+          (and case-folded) only once.
+        """
+        author_ids = self.author_ids
+        names = {}
+        folded_names = {}
+        result = {}
+        for doc_id in doc_ids:
+            author_id = author_ids[doc_id]
+            name = names.get(author_id)
+            if name is None:
+                name = self.authors[author_id]
+                if ignore_case:
+                    name = folded_names.setdefault(name.casefold(), name)
+                names[author_id] = name
+            if name in result:
+                result[name].append(doc_id)
+            else:
+                result[name] = [doc_id]
+        return result
+
+    def titles_for(self, doc_ids):
+        """
+        Returns the list of titles for a sequence of doc ids.
+        """
+        titles = self.titles
+        return [titles[doc_id] for doc_id in doc_ids]
+
+
+class SortedColumn:
+    """
+    A column sorted once at build time: values in ascending order alongside
+    the doc id each value came from. Range queries bisect the values: the k
+    matching doc ids come out in value order in O(log n + k), and sorting
+    them by doc id adds O(k log k).
+    """
+
+    def __init__(self, values, doc_ids):
+        self.values = values
+        self.doc_ids = doc_ids
+
+    @classmethod
+    def from_column(cls, column, typecode):
+        """
+        Arguments:
+        - column: Column indexed by doc id.
+        - typecode: array typecode of the column values.
+
+        Returns:
+        - SortedColumn over the column. Equal values stay in doc id order.
+        """
+        order = sorted(range(len(column)), key=column.__getitem__)
+        return cls(array(typecode, [column[doc_id] for doc_id in order]), array("I", order))
+
+    def __len__(self):
+        return len(self.values)
+
+    def _bounds(self, low, high):
+        lo = 0 if low is None else bisect_left(self.values, low)
+        hi = len(self.values) if high is None else bisect_left(self.values, high)
+        return lo, max(lo, hi)
+
+    def insert(self, value, doc_id):
+        """
+        Adds a value for a doc id larger than any already present, keeping
+        the values sorted and equal values in doc id order.
+        """
+        position = bisect_right(self.values, value)
+        self.values.insert(position, value)
+        self.doc_ids.insert(position, doc_id)
+
+    def count_between(self, low=None, high=None):
+        """
+        Returns the number of values with low <= value < high, without
+        touching the matching doc ids.
+        """
+        lo, hi = self._bounds(low, high)
+        return hi - lo
+
+    def unordered_between(self, low=None, high=None):
+        """
+        Returns the doc ids whose value satisfies low <= value < high in
+        value order, not doc id order, without sorting them. A bound of None
+        leaves that side open.
+        """
+        lo, hi = self._bounds(low, high)
+        return self.doc_ids[lo:hi]
+
+    def between(self, low=None, high=None):
+        """
+        Same as unordered_between() with the doc ids sorted.
+        """
+        return sorted(self.unordered_between(low, high))
+
+
+def _shard_columns(metadata, start=0):
+    """
+    Returns (titles, authors, author ids, timestamps, lengths, postings) for
+    a run of articles whose first doc id is start. Used directly for a
+    single-process build and in worker processes for a parallel one.
+    """
+    titles = []
+    authors = []
+    author_to_id = {}
+    author_ids = array("I")
+    timestamps = array("q")
+    lengths = array("q")
+    postings = {}
+
+    for doc_id, article in enumerate(metadata, start):
+        titles.append(article[0])
+
+        author = article[1]
+        if author not in author_to_id:
+            author_to_id[author] = len(authors)
+            authors.append(author)
+        author_ids.append(author_to_id[author])
+        timestamps.append(article[2])
+        lengths.append(article[3])
+
+        for keyword in article[4]:
+            if keyword not in postings:
+                postings[keyword] = array("I", [doc_id])
+            elif postings[keyword][-1] != doc_id:
+                postings[keyword].append(doc_id)
+
+    return titles, authors, author_ids, timestamps, lengths, postings
+
+
+def _merge_shards(shards):
+    """
+    Returns (titles, authors, author ids, timestamps, lengths, title ids,
+    postings) from (first doc id, _shard_columns() result) pairs given in
+    shard order. Posting lists already hold global doc ids, so merging
+    them is a concatenation.
+    """
+    titles = []
+    authors = []
+    author_to_id = {}
+    author_ids = array("I")
+    timestamps = array("q")
+    lengths = array("q")
+    title_ids = {}
+    postings = {}
+
+    for start, shard in shards:
+        shard_titles, shard_authors, shard_author_ids, shard_timestamps, shard_lengths, shard_postings = shard
+        remap = []
+        for author in shard_authors:
+            if author not in author_to_id:
+                author_to_id[author] = len(authors)
+                authors.append(author)
+            remap.append(author_to_id[author])
+
+        title_ids.update(zip(shard_titles, range(start, start + len(shard_titles))))
+        titles.extend(shard_titles)
+        author_ids.extend(map(remap.__getitem__, shard_author_ids))
+        timestamps.extend(shard_timestamps)
+        lengths.extend(shard_lengths)
+        for keyword, doc_ids in shard_postings.items():
+            if keyword in postings:
+                postings[keyword].extend(doc_ids)
+            else:
+                postings[keyword] = doc_ids
+
+    return titles, authors, author_ids, timestamps, lengths, title_ids, postings
+
+
+def _finish_postings(postings, article_count, compressed, stopwords, bitmap_ratio):
+    """
+    Applies the from_metadata() options to freshly built keyword postings.
+    """
+    for keyword in stopwords or ():
+        postings.pop(keyword, None)
+    if compressed:
+        return compress(postings, article_count, bitmap_ratio)
+    if bitmap_ratio is not None:
+        for keyword, doc_ids in postings.items():
+            if len(doc_ids) >= bitmap_ratio * article_count:
+                postings[keyword] = BitmapPostings(encode_bitmap(doc_ids))
+    return postings
+
+
+def _author_postings(authors, author_ids):
+    """
+    Returns (author postings, case-folded author postings) built from the
+    author id column.
+    """
+    by_id = [array("I") for _ in authors]
+    for doc_id, author_id in enumerate(author_ids):
+        by_id[author_id].append(doc_id)
+
+    author_postings = {}
+    folded_author_postings = {}
+    for author_id, doc_ids in enumerate(by_id):
+        author_postings[authors[author_id]] = doc_ids
+        folded = authors[author_id].casefold()
+        if folded in folded_author_postings:
+            folded_author_postings[folded] = array("I", sorted(folded_author_postings[folded] + doc_ids))
+        else:
+            folded_author_postings[folded] = doc_ids
+    return author_postings, folded_author_postings
+
+
+def _after(value):
+    """
+    Turns an inclusive integer upper bound into an exclusive one.
+    """
+    return None if value is None else value + 1
+
+
+def _restrict(doc_ids, sorted_column, column, low, high):
+    """
+    Returns the doc ids from doc_ids whose column value satisfies
+    low <= value < high. Whichever side is smaller is walked: when fewer
+    articles fall in the range than there are doc ids, the range is read from
+    the sorted column and intersected; otherwise each doc id's value is
+    checked directly. Against a bitmap the range is tested bit by bit in
+    value order and only the doc ids kept are sorted.
+    """
+    if low is None and high is None:
+        return list(doc_ids)
+    if sorted_column.count_between(low, high) < len(doc_ids):
+        if isinstance(doc_ids, BitmapPostings):
+            return sorted(doc_ids.intersect(sorted_column.unordered_between(low, high)))
+        return intersect(doc_ids, sorted_column.between(low, high))
+    return [doc_id for doc_id in doc_ids
+            if (low is None or column[doc_id] >= low) and (high is None or column[doc_id] < high)]
+
+
+def year_range(year):
+    """
+    Returns (start, end) timestamps of a UTC year: end is the first second of
+    the following year, so every second of December 31 is included.
+    """
+    return calendar.timegm((year, 1, 1, 0, 0, 0)), _new_year(year + 1)
+
+
+def month_range(year, month):
+    """
+    Returns (start, end) timestamps of a UTC month (month is 1-12).
+    """
+    start = calendar.timegm((year, month, 1, 0, 0, 0))
+    if month == 12:
+        return start, _new_year(year + 1)
+    return start, calendar.timegm((year, month + 1, 1, 0, 0, 0))
+
+
+def _new_year(year):
+    """
+    Returns the timestamp of January 1 of a UTC year. timegm() stops at
+    datetime.MAXYEAR, so the year after it is counted from its December 31.
+    """
+    if year > MAXYEAR:
+        return calendar.timegm((year - 1, 12, 31, 0, 0, 0)) + 86400
+    return calendar.timegm((year, 1, 1, 0, 0, 0))
+
+
+class KeywordToTitles(Mapping):
+    """
+    Read-only keyword_to_titles dictionary computed from an ArticleStore.
+    """
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, keyword):
+        if keyword not in self._store.postings:
+            raise KeyError(keyword)
+        return self._store.titles_for(self._store.keyword_postings(keyword))
+
+    def __contains__(self, keyword):
+        return keyword in self._store.postings
+
+    def __iter__(self):
+        return iter(self._store.postings)
+
+    def __len__(self):
+        return len(self._store.postings)
+
+
+class TitleToInfo(Mapping):
+    """
+    Read-only title_to_info dictionary computed from an ArticleStore.
+    """
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, title):
+        return self._store.info(self._store.title_ids[title])
+
+    def __contains__(self, title):
+        return title in self._store.title_ids
+
+    def __iter__(self):
+        return iter(self._store.titles_for(self._store.all_doc_ids()))
+
+    def __len__(self):
+        return self._store.article_count()
@@ -0,0 +1,256 @@
+import heapq
+import re
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+
+from fuzzy import MAX_EDIT_DISTANCE, DeletionIndex
+
+# Keyword vocabulary lookups: prefix, suffix and wildcard matching, and
+# autocomplete.
+#
+# A TermDictionary keeps the keywords in sorted order, plus a permutation
+# listing them sorted by their reversed spelling. Every keyword starting with
+# "music" then sits in one contiguous run of the first order, and every
+# keyword ending in "ist" in one run of the second, each found with two
+# binary searches. A wildcard pattern such as "m*ic" reads whichever of its
+# two runs is shorter and checks the rest of the pattern on those keywords
+# only; patterns with no fixed prefix or suffix ("*us*") are checked against
+# the whole vocabulary.
+#
+# Patterns use "*" for any run of characters and "?" for one character.
+#
+# Autocomplete ranks keywords by document frequency, which is kept per
+# keyword (in the index file, or computed once per dictionary) along with
+# the keyword positions sorted most frequent first. A short prefix covers
+# much of the vocabulary, so its suggestions are the first few keywords of
+# that order inside its run; a longer prefix weighs the keywords of its run.
+
+WILDCARDS = "*?"
+
+
+def is_pattern(keyword):
+    """
+    Returns whether a keyword contains wildcard characters.
+    """
+    return any(wildcard in keyword for wildcard in WILDCARDS)
+
+
+def _successor(prefix):
+    """
+    Returns the smallest string greater than every string starting with
+    prefix, or None if there is none.
+    """
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
+
+
+def _compile(pattern):
+    return re.compile("".join(".*" if c == "*" else "." if c == "?" else re.escape(c) for c in pattern), re.DOTALL)
+
+
+class _ReversedTerms(Sequence):
+    """
+    The terms in suffix order, each spelled backwards, for bisecting.
+    """
+
+    def __init__(self, terms, order):
+        self._terms = terms
+        self._order = order
+
+    def __len__(self):
+        return len(self._order)
+
+    def __getitem__(self, i):
+        return self._terms[self._order[i]][::-1]
+
+
+class TermDictionary:
+    """
+    Sorted keyword vocabulary supporting prefix, suffix and wildcard lookups
+    in O(log V + matches) for V keywords.
+    """
+
+    def __init__(self, terms, suffix_order=None, frequencies=None, frequency_order=None, deletions=None):
+        """
+        Arguments:
+        - terms: Keywords in sorted order (a list, or a StringTable read from
+                 an index file).
+        - suffix_order: Positions in terms sorted by reversed keyword. Built
+                        when not given.
+        - frequencies: Number of articles containing each keyword, in term
+                       order, or a function giving it for one keyword
+                       (called for every keyword on first use). Without it
+                       suggestions are alphabetical.
+        - frequency_order: Positions in terms sorted by frequency, most
+                           first, ties in term order. Built when not given.
+        - deletions: fuzzy.DeletionIndex over terms. Built on first use when
+                     not given.
+        """
+        if suffix_order is None:
+            suffix_order = array("I", sorted(range(len(terms)), key=lambda i: terms[i][::-1]))
+        self.terms = terms
+        self.suffix_order = suffix_order
+        self._reversed = _ReversedTerms(terms, suffix_order)
+        self._frequencies = frequencies
+        self._frequency_order = frequency_order
+        self._deletions = deletions
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, term):
+        position = bisect_left(self.terms, term)
+        return position < len(self.terms) and self.terms[position] == term
+
+    def frequencies(self):
+        """
+        Returns the number of articles containing each keyword, in term
+        order, or None if the dictionary was built without them.
+        """
+        if callable(self._frequencies):
+            self._frequencies = array("I", map(self._frequencies, self.terms))
+        return self._frequencies
+
+    def frequency_order(self):
+        """
+        Returns the term positions sorted by frequency, most first, ties in
+        term order, or None without frequencies.
+        """
+        frequencies = self.frequencies()
+        if self._frequency_order is None and frequencies is not None:
+            self._frequency_order = array("I", sorted(range(len(frequencies)), key=lambda i: -frequencies[i]))
+        return self._frequency_order
+
+    def _prefix_range(self, prefix):
+        return _range(self.terms, prefix)
+
+    def _suffix_range(self, suffix):
+        return _range(self._reversed, suffix[::-1])
+
+    def with_prefix(self, prefix):
+        """
+        Returns the keywords starting with prefix, in sorted order.
+        """
+        lo, hi = self._prefix_range(prefix)
+        terms = self.terms
+        return [terms[i] for i in range(lo, hi)]
+
+    def with_suffix(self, suffix):
+        """
+        Returns the keywords ending with suffix, in sorted order.
+        """
+        lo, hi = self._suffix_range(suffix)
+        terms = self.terms
+        return sorted(terms[self.suffix_order[i]] for i in range(lo, hi))
+
+    def match(self, pattern):
+        """
+        Returns the keywords matching a wildcard pattern, in sorted order. A
+        pattern without wildcards matches only itself.
+        """
+        if not is_pattern(pattern):
+            return [pattern] if pattern in self else []
+
+        positions = [i for i, character in enumerate(pattern) if character in WILDCARDS]
+        prefix, suffix = pattern[:positions[0]], pattern[positions[-1] + 1:]
+        lo, hi = self._prefix_range(prefix)
+        suffix_lo, suffix_hi = self._suffix_range(suffix)
+        if suffix_hi - suffix_lo < hi - lo:
+            candidates = (self.terms[self.suffix_order[i]] for i in range(suffix_lo, suffix_hi))
+        else:
+            candidates = (self.terms[i] for i in range(lo, hi))
+
+        matcher = _compile(pattern).fullmatch
+        return sorted(term for term in candidates if matcher(term))
+
+    def suggest(self, prefix, k=10, frequency=None):
+        """
+        Arguments:
+        - prefix: What has been typed so far.
+        - k: Number of suggestions.
+        - frequency: Function giving a keyword's weight. Defaults to the
+                     dictionary's frequencies; without either suggestions
+                     are alphabetical.
+
+        Returns:
+        - Up to k keywords starting with prefix, heaviest first, ties in
+          alphabetical order. Finding the prefix's keywords costs O(log V).
+          With stored frequencies, a run of m keywords is weighed in O(m)
+          array reads, or, when m**2 > k * V, read from the frequency order,
+          where k of them are expected within the first k * V / m entries.
+        """
+        lo, hi = self._prefix_range(prefix)
+        terms = self.terms
+        if frequency is not None:
+            return heapq.nsmallest(k, (terms[i] for i in range(lo, hi)), key=lambda term: (-frequency(term), term))
+        frequencies = self.frequencies()
+        if frequencies is None:
+            return [terms[i] for i in range(lo, min(hi, lo + k))]
+        if (hi - lo) ** 2 > k * len(terms):
+            found = []
+            for i in self.frequency_order():
+                if lo <= i < hi:
+                    found.append(terms[i])
+                    if len(found) == k:
+                        break
+            return found
+        return [terms[i] for i in heapq.nsmallest(k, range(lo, hi), key=lambda i: (-frequencies[i], i))]
+
+    def deletion_index(self):
+        """
+        Returns the fuzzy.DeletionIndex over the keywords, built on the first
+        call unless the dictionary was given one.
+        """
+        if self._deletions is None:
+            self._deletions = DeletionIndex(self.terms)
+        return self._deletions
+
+    def similar(self, word, max_distance=MAX_EDIT_DISTANCE):
+        """
+        Returns [(edit distance, keyword)] for the keywords within
+        max_distance edits of word, nearest first.
+        """
+        return self.deletion_index().lookup(word, max_distance)
+
+
+def _range(terms, prefix):
+    """
+    Returns the (lo, hi) positions of the strings starting with prefix in a
+    sorted sequence.
+    """
+    lo = bisect_left(terms, prefix)
+    successor = _successor(prefix)
+    hi = len(terms) if successor is None else bisect_left(terms, successor, lo)
+    return lo, hi
+
+
+def wildcard_postings(pattern, index):
+    """
+    Returns the sorted doc ids of articles containing any keyword matching a
+    wildcard pattern.
+    """
+    doc_ids = set()
+    for term in index.term_dictionary().match(pattern):
+        doc_ids.update(index.keyword_postings(term))
+    return sorted(doc_ids)
+
+
+def wildcard_search(pattern, index):
+    """
+    Returns the titles of articles containing any keyword matching a wildcard
+    pattern (e.g. "music*" or "*ist"), in index order.
+    """
+    return index.titles_for(wildcard_postings(pattern, index))
+
+
+def suggest(prefix, index, k=10):
+    """
+    Returns up to k keywords starting with prefix, those found in the most
+    articles first.
+    """
+    return index.term_dictionary().suggest(prefix, k)
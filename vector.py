@@ -0,0 +1,190 @@
+import functools
+
+from compressed import BitmapPostings
+from postings import as_array
+from store import year_range
+
+# Vectorized filters over an ArticleStore's columns.
+#
+# ColumnArrays wraps the lengths, timestamps and author ids columns as NumPy
+# arrays without copying them (np.frombuffer over the array or memoryview the
+# store already holds), so every length, time or author predicate is one
+# array comparison instead of a Python loop with a lookup per article.
+# Predicates return boolean masks, either over every article or over an
+# array of doc ids; filter_by_*() apply them and return the doc ids kept.
+#
+# The arrays share memory with the store's columns. A LiveIndex cannot grow
+# its columns while such a view exists, so make a ColumnArrays per query
+# (it costs a few microseconds) rather than keeping one around.
+#
+# NumPy is optional: without it QueryPlan scans candidates one at a time as
+# before, giving the same results. It is imported by numpy() the first time a
+# query is large enough to use it, so importing the search modules and
+# answering small queries never pays for the NumPy import.
+
+# Fewest candidates for which QueryPlan.doc_ids() uses the vectorized path;
+# below this the fixed cost of the NumPy calls outweighs the scan.
+VECTORIZE_MIN = 512
+
+
+@functools.cache
+def numpy():
+    """
+    Returns the numpy module, imported on the first call, or None if NumPy
+    is not installed.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def doc_id_array(doc_ids):
+    """
+    Returns sorted doc ids (a list, range, array, memoryview or encoded
+    posting list) as an int64 NumPy array. Bitmaps are expanded with one unpackbits
+    call.
+    """
+    np = numpy()
+    if isinstance(doc_ids, range):
+        return np.arange(doc_ids.start, doc_ids.stop, doc_ids.step, dtype=np.int64)
+    if isinstance(doc_ids, BitmapPostings):
+        bits = np.frombuffer(doc_ids.bitmap(), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(bits, bitorder="little")).astype(np.int64)
+    return np.asarray(as_array(doc_ids), dtype=np.int64)
+
+
+def postings_mask(postings, doc_ids):
+    """
+    Returns the boolean mask of the doc ids (a NumPy array, in any order)
+    found in a posting list: one bit lookup each against a bitmap, else a
+    binary search of the sorted doc ids.
+    """
+    np = numpy()
+    mask = np.zeros(len(doc_ids), dtype=bool)
+    if isinstance(postings, BitmapPostings):
+        bits = np.frombuffer(postings.bitmap(), dtype=np.uint8)
+        inside = (doc_ids >> 3) < len(bits)
+        ids = doc_ids[inside]
+        mask[inside] = (bits[ids >> 3] >> (ids & 7)) & 1 == 1
+        return mask
+    postings = doc_id_array(postings)
+    if len(postings):
+        positions = np.searchsorted(postings, doc_ids)
+        inside = positions < len(postings)
+        mask[inside] = postings[positions[inside]] == doc_ids[inside]
+    return mask
+
+
+def range_mask(values, low=None, high=None):
+    """
+    Returns the boolean mask of low <= values < high; None is open.
+    """
+    np = numpy()
+    if low is None and high is None:
+        return np.ones(len(values), dtype=bool)
+    if low is None:
+        return values < high
+    if high is None:
+        return values >= low
+    return (values >= low) & (values < high)
+
+
+class ColumnArrays:
+    """
+    NumPy views of an ArticleStore's columns, with vectorized predicates.
+    """
+
+    def __init__(self, index):
+        """
+        Arguments:
+        - index: ArticleStore (in memory or read from an index file).
+        """
+        np = numpy()
+        if np is None:
+            raise RuntimeError("vectorized filters need NumPy")
+        self.np = np
+        self.index = index
+        self.lengths = np.frombuffer(index.lengths, dtype=np.int64)
+        self.timestamps = np.frombuffer(index.timestamps, dtype=np.int64)
+        self.author_ids = np.frombuffer(index.author_ids, dtype=np.uint32)
+
+    def _values(self, column, doc_ids):
+        return column if doc_ids is None else column[doc_ids]
+
+    def length_mask(self, min_length=None, max_length=None, doc_ids=None):
+        """
+        Returns the mask of articles with min_length <= length <= max_length,
+        over every article or over an array of doc ids.
+        """
+        return range_mask(self._values(self.lengths, doc_ids), min_length,
+                          None if max_length is None else max_length + 1)
+
+    def time_mask(self, start=None, end=None, doc_ids=None):
+        """
+        Returns the mask of articles with start <= timestamp < end.
+        """
+        return range_mask(self._values(self.timestamps, doc_ids), start, end)
+
+    def year_mask(self, year, doc_ids=None):
+        """
+        Returns the mask of articles published during a UTC year.
+        """
+        return self.time_mask(*year_range(year), doc_ids)
+
+    def _postings_mask(self, postings, doc_ids):
+        if doc_ids is None:
+            mask = self.np.zeros(len(self.lengths), dtype=bool)
+            mask[doc_id_array(postings)] = True
+            return mask
+        return postings_mask(postings, doc_ids)
+
+    def author_mask(self, author, ignore_case=False, doc_ids=None):
+        """
+        Returns the mask of articles written by author, looked up in the
+        store's author postings. With ignore_case, names are compared after
+        case folding.
+        """
+        return self._postings_mask(self.index.author_doc_ids(author, ignore_case), doc_ids)
+
+    def keyword_mask(self, keyword, doc_ids=None):
+        """
+        Returns the mask of articles containing keyword.
+        """
+        return self._postings_mask(self.index.keyword_postings(keyword), doc_ids)
+
+    def filter_by_length(self, doc_ids, min_length=None, max_length=None):
+        """
+        Returns the doc ids from doc_ids with min_length <= length <=
+        max_length, as an array.
+        """
+        doc_ids = doc_id_array(doc_ids)
+        return doc_ids[self.length_mask(min_length, max_length, doc_ids)]
+
+    def filter_by_time(self, doc_ids, start=None, end=None):
+        """
+        Returns the doc ids from doc_ids with start <= timestamp < end.
+        """
+        doc_ids = doc_id_array(doc_ids)
+        return doc_ids[self.time_mask(start, end, doc_ids)]
+
+    def filter_by_year(self, doc_ids, year):
+        """
+        Returns the doc ids from doc_ids published during a UTC year.
+        """
+        return self.filter_by_time(doc_ids, *year_range(year))
+
+    def filter_by_author(self, doc_ids, author, ignore_case=False):
+        """
+        Returns the doc ids from doc_ids written by author.
+        """
+        doc_ids = doc_id_array(doc_ids)
+        return doc_ids[self.author_mask(author, ignore_case, doc_ids)]
+
+    def filter_out(self, doc_ids, keyword):
+        """
+        Returns the doc ids from doc_ids of articles not containing keyword.
+        """
+        doc_ids = doc_id_array(doc_ids)
+        return doc_ids[~self.keyword_mask(keyword, doc_ids)]